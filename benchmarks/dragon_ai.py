@@ -0,0 +1,144 @@
+"""Measures how moving dragons region by region scales with threads
+
+Builds a large open map full of alerted dragons and times one turn of
+region_dragon_moves with each thread count. Every run starts from the
+same random seed, so the moves must come out the same however many
+threads there are, and the benchmark fails if they don't. The speedup is
+against one thread; without a free-threaded build there is none to see.
+
+    python benchmarks/dragon_ai.py --dragons 100000 --threads 1 2 4 8
+"""
+import os
+import sys
+import time
+import random
+import argparse
+from array import array
+from statistics import median
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_ROOT)
+
+from dungeon_and_dragons.bitboard import make_bitboard  # noqa: E402
+from dungeon_and_dragons.cells import (  # noqa: E402
+    cell_of,
+    cells_of,
+    make_grid
+)
+from dungeon_and_dragons.parallel_ai import (  # noqa: E402
+    gil_disabled,
+    region_dragon_moves
+)
+
+ALT_MOVEMENTS: list = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+
+
+def make_world(size: int, dragon_num: int, seed: int) -> Dict:
+    """Creates a square map with walls around it and dragons on it
+
+    Parameters
+    ----------
+    size: int : width and height of the map
+
+    dragon_num: int : number of dragons, all of them alerted
+
+    seed: int : seed of the dragon positions
+
+
+    Returns dict with the 'grid', 'dragon_cells', 'alerted_dragons' and
+    'player_cell'
+    -------
+
+    """
+    wall_board = make_bitboard(size, size)
+    border = (1 << size) - 1
+    wall_board['rows'] = (
+        [border] + [1 | 1 << (size - 1)] * (size - 2) + [border]
+    )
+    grid = make_grid(wall_board, ALT_MOVEMENTS)
+    cells = random.Random(seed).sample(range((size - 2) ** 2), dragon_num)
+    return {
+        'grid': grid,
+        'dragon_cells': cells_of(grid, [
+            (cell % (size - 2) + 1, cell // (size - 2) + 1)
+            for cell in cells
+        ]),
+        'alerted_dragons': array('i', range(dragon_num)),
+        'player_cell': cell_of(grid, (size // 2, size // 2)),
+    }
+
+
+def time_turns(
+    world: Dict,
+    threads: int,
+    repeats: int,
+    seed: int
+) -> Tuple[List[float], List]:
+    """Times one turn of every dragon, several times
+
+    Parameters
+    ----------
+    world: dict : see make_world
+
+    threads: int : number of threads
+
+    repeats: int : number of timed turns
+
+    seed: int : random seed every turn starts from
+
+
+    Returns list of seconds of every turn and the moves of the last one
+    -------
+
+    """
+    timings = list()
+    for _ in range(repeats):
+        random.seed(seed)
+        start = time.perf_counter()
+        moves = region_dragon_moves(
+            world['grid'],
+            world['alerted_dragons'],
+            world['dragon_cells'],
+            world['player_cell'],
+            threads
+        )
+        timings.append(time.perf_counter() - start)
+
+    return timings, moves
+
+
+def main() -> None:
+    """Runs the benchmark and prints a table of thread counts"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size', type=int, default=2048)
+    parser.add_argument('--dragons', type=int, default=100_000)
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 2, 4, 8])
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    world = make_world(args.size, args.dragons, args.seed)
+    print(f"{sys.version.split()[0]}, GIL "
+          f"{'disabled' if gil_disabled() else 'enabled'}, "
+          f"{os.cpu_count()} CPUs, {args.size}x{args.size} map, "
+          f"{args.dragons} dragons")
+    print(f"{'threads':>8} {'median ms':>10} {'speedup':>8}")
+    baseline = reference = None
+    for threads in args.threads:
+        timings, moves = time_turns(world, threads, args.repeats, args.seed)
+        elapsed = median(timings)
+        if baseline is None:
+            baseline, reference = elapsed, moves
+        print(f"{threads:>8} {elapsed * 1000:>10.1f} "
+              f"{baseline / elapsed:>7.2f}x")
+        if moves != reference:
+            sys.exit(f"the moves with {threads} threads are different")
+
+
+if __name__ == '__main__':
+    main()
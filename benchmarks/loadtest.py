@@ -0,0 +1,432 @@
+"""Load test with many interactive sessions of the game at once
+
+Starts --sessions copies of soheil_dragons.py, each under its own
+pseudo-terminal, so the game takes the same path as for a real player:
+input() on a tty, clear_terminal() and a shard of the player store
+rewritten on every register and every finished game. Every session
+registers a new player, picks a mode and plays with a simple bot until it
+wins, loses or runs out of --turns.
+
+clear_terminal() runs `clear` once per session and reuses what it
+printed, see render.clear_sequence, so the latencies don't include a
+`clear` process on every frame like those of older runs did.
+
+Reported are the latencies from sending a line to the game printing its
+next prompt or frame, the CPU time and peak RSS of every session, and
+what the concurrent rewrites of the shards lost: players that were
+registered but are missing, and finished games that weren't counted.
+Exits with status 1 if the p99 turn latency is over --budget-ms.
+
+    python benchmarks/loadtest.py --sessions 50 --turns 200
+"""
+import os
+import re
+import sys
+import pty
+import json
+import time
+import random
+import select
+import termios
+import argparse
+import tempfile
+import threading
+from glob import glob
+from statistics import quantiles
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GAME_SCRIPT: str = os.path.join(REPO_ROOT, 'soheil_dragons.py')
+# seconds a session may go without printing what it's waited for
+TIMEOUT: float = 30
+# printed by print_info under every frame of the game
+FRAME_END: bytes = b"Enter 'q' to quit the game."
+GAME_OVER: Dict[bytes, str] = {b'YOU WON': 'win', b'YOU LOST': 'loss'}
+# what the game prints before waiting for each line of the menus, and the
+# line the bot answers with
+MENU_SCRIPT: List[Tuple[bytes, str]] = [
+    (b"Enter 'Q' to exit the game", 'r'),
+    (b'Username: ', '{user_name}'),
+    (b'Password: ', 'load'),
+    (b'Repeat password: ', 'load'),
+    (b'Press RETURN to start the game', ''),
+    (b'Enter 1, 2, 3 or 4: ', '{mode}'),
+]
+MOVES: Dict[str, Tuple[int, int]] = {
+    'up': (0, -1), 'down': (0, 1), 'left': (-1, 0), 'right': (1, 0)
+}
+ESCAPE_CODES = re.compile(r'\x1b\[[0-9;?]*[A-Za-z]')
+
+
+def spawn_game(work_dir: str, term: str) -> Tuple[int, int]:
+    """Starts the game under a new pseudo-terminal
+
+    Parameters
+    ----------
+    work_dir: str : where the game keeps its player store
+
+    term: str : TERM of the session, used by `clear`
+
+
+    Returns pid of the game and the file descriptor of the terminal
+    -------
+
+    """
+    pid, terminal = pty.fork()
+    if not pid:
+        os.chdir(work_dir)
+        env = dict(os.environ, PYTHONPATH=REPO_ROOT, TERM=term)
+        os.execve(sys.executable, [sys.executable, GAME_SCRIPT], env)
+
+    # the lines the bot types aren't echoed back into the output
+    attributes = termios.tcgetattr(terminal)
+    attributes[3] &= ~termios.ECHO
+    termios.tcsetattr(terminal, termios.TCSANOW, attributes)
+
+    return pid, terminal
+
+
+def read_until(
+    session: Dict,
+    markers: List[bytes]
+) -> Tuple[bytes, bytes]:
+    """Reads the output of a session until one of markers is printed
+
+    Parameters
+    ----------
+    session: dict : see play_session
+
+    markers: list : what to wait for
+
+
+    Returns the marker that was found and the output up to it
+    -------
+
+    """
+    output = session['pending']
+    deadline = time.monotonic() + TIMEOUT
+    while True:
+        found = [(output.find(marker), marker) for marker in markers]
+        found = [(index, marker) for index, marker in found if index != -1]
+        if found:
+            index, marker = min(found)
+            session['pending'] = output[index + len(marker):]
+            return marker, output[:index]
+
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"waited {TIMEOUT}s for {markers}")
+        ready, _, _ = select.select([session['terminal']], [], [], remaining)
+        if not ready:
+            continue
+        try:
+            chunk = os.read(session['terminal'], 65536)
+        except OSError:
+            # Linux reports the end of a terminal as EIO
+            chunk = b''
+        if not chunk:
+            raise EOFError('the game exited')
+        output += chunk
+        session['output'] += chunk
+
+
+def send_line(session: Dict, line: str) -> None:
+    """Types a line into a session and starts its latency clock
+
+    Parameters
+    ----------
+    session: dict : see play_session
+
+    line: str : the line, without the newline
+
+
+    Returns None
+    -------
+
+    """
+    session['sent'] = time.perf_counter()
+    os.write(session['terminal'], line.encode() + b'\n')
+
+
+def bot_move(frame: bytes) -> str:
+    """Picks the next move from the last frame the game printed
+
+    Heads up, where the door is, and sideways around walls, never next to
+    a dragon that can be seen
+
+    Parameters
+    ----------
+    frame: bytes : output of the game up to the end of a frame
+
+
+    Returns the move
+    -------
+
+    """
+    text = ESCAPE_CODES.sub('', frame.decode(errors='replace'))
+    lines = text.replace('\r', '').split('\n')
+    # frame only holds what was printed since the previous frame
+    rows = [line for line in lines if line.startswith('⬛')]
+    cells = {
+        (x, y): cell
+        for y, row in enumerate(rows) for x, cell in enumerate(row)
+    }
+    player = next((cell for cell, glyph in cells.items() if glyph == '😎'),
+                  None)
+    if player is None:
+        return random.choice(list(MOVES))
+    dragons = [cell for cell, glyph in cells.items() if glyph == '🐉']
+
+    moves = ['up'] if random.random() < 0.6 else list()
+    moves += random.sample(list(MOVES), len(MOVES))
+    for move in moves:
+        x_move, y_move = MOVES[move]
+        target = player[0] + x_move, player[1] + y_move
+        if cells.get(target, '⬛') == '⬛':
+            continue
+        if any(abs(target[0] - x) + abs(target[1] - y) <= 1
+               for x, y in dragons):
+            continue
+        return move
+
+    return random.choice(list(MOVES))
+
+
+def play_session(
+    number: int,
+    work_dir: str,
+    args: argparse.Namespace,
+    results: List[Dict]
+) -> None:
+    """Registers, starts a game and plays it with the bot
+
+    Parameters
+    ----------
+    number: int : number of the session, part of the player's name
+
+    work_dir: str : shared by all sessions, so is the player store
+
+    args: Namespace : parsed command line arguments
+
+    results: list : the result dict of the session is appended to it
+
+
+    Returns None
+    -------
+
+    """
+    pid, terminal = spawn_game(work_dir, args.term)
+    session = {
+        'terminal': terminal, 'pending': b'', 'output': b'', 'sent': None
+    }
+    result = {
+        'user_name': f'load{number}',
+        'result': 'error',
+        'turns': 0,
+        'menu_latencies': list(),
+        'turn_latencies': list(),
+    }
+    mode = args.mode or random.choice('123')
+    try:
+        for marker, line in MENU_SCRIPT:
+            read_until(session, [marker])
+            if session['sent'] is not None:
+                result['menu_latencies'].append(
+                    time.perf_counter() - session['sent']
+                )
+            send_line(
+                session, line.format(user_name=result['user_name'], mode=mode)
+            )
+
+        result['result'] = 'quit'
+        while True:
+            marker, frame = read_until(session, [FRAME_END, *GAME_OVER])
+            latency = time.perf_counter() - session['sent']
+            if marker in GAME_OVER:
+                result['result'] = GAME_OVER[marker]
+                result['turn_latencies'].append(latency)
+                break
+            if result['turns']:
+                result['turn_latencies'].append(latency)
+            else:
+                # the first frame comes after the map is generated
+                result['menu_latencies'].append(latency)
+            if result['turns'] >= args.turns:
+                send_line(session, 'q')
+                break
+            if args.think_ms:
+                time.sleep(random.uniform(0, 2 * args.think_ms) / 1000)
+            send_line(session, bot_move(frame))
+            result['turns'] += 1
+
+        # drains the output until the game exits
+        read_until(session, [b'\0never printed\0'])
+    except EOFError:
+        pass
+    except TimeoutError as error:
+        result['result'] = 'error'
+        result['error'] = str(error)
+        os.kill(pid, 9)
+    finally:
+        _, status, usage = os.wait4(pid, 0)
+        os.close(terminal)
+
+    if b'Traceback' in session['output']:
+        result['result'] = 'error'
+        text = session['output'].decode(errors='replace')
+        result['error'] = text[text.rindex('Traceback'):].strip()
+    result['exit_status'] = os.waitstatus_to_exitcode(status)
+    result['cpu'] = usage.ru_utime + usage.ru_stime
+    # ru_maxrss is in KiB on Linux
+    result['rss'] = usage.ru_maxrss * 1024
+    results.append(result)
+
+
+def percentiles(values: List[float]) -> str:
+    """Formats the p50, p90, p99 and max of latencies in seconds
+
+    Parameters
+    ----------
+    values: list : the latencies
+
+
+    Returns the formatted line
+    -------
+
+    """
+    if len(values) < 2:
+        return 'not enough samples'
+    cuts = quantiles(values, n=100, method='inclusive')
+    return (
+        f"p50 {cuts[49] * 1000:.1f} ms, p90 {cuts[89] * 1000:.1f} ms, "
+        f"p99 {cuts[98] * 1000:.1f} ms, max {max(values) * 1000:.1f} ms "
+        f"({len(values)} samples)"
+    )
+
+
+def check_database(work_dir: str, results: List[Dict]) -> List[str]:
+    """Finds what concurrent rewrites of the player shards lost
+
+    Parameters
+    ----------
+    work_dir: str : where the sessions ran
+
+    results: list : results of the sessions
+
+
+    Returns lines of the report
+    -------
+
+    """
+    players = dict()
+    # every shard is named <shards>-<index>.json, next to shards.json
+    for path in glob(os.path.join(work_dir, 'players', '*-*.json')):
+        try:
+            with open(path) as shard:
+                players.update(json.load(shard)['players'])
+        except ValueError as error:
+            return [f"{os.path.basename(path)} is corrupt: {error}"]
+
+    # the game menu is only shown once register() has written the player
+    registered = [
+        result for result in results if len(result['menu_latencies']) >= 4
+    ]
+    missing = [result['user_name'] for result in registered
+               if result['user_name'] not in players]
+    finished = sum(result['result'] in ('win', 'loss') for result in results)
+    counted = sum(
+        player['games won'] + player['games lost']
+        for name, player in players.items() if name.startswith('load')
+    )
+    decode_errors = sum(
+        'JSONDecodeError' in result.get('error', '') for result in results
+    )
+    return [
+        f"players registered {len(registered)}, missing from the database "
+        f"{len(missing)}",
+        f"games finished {finished}, counted in the database {counted}, "
+        f"lost updates {finished - counted}",
+        f"sessions that read a half written database {decode_errors}",
+    ]
+
+
+def main() -> None:
+    """Runs the sessions and prints the report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20)
+    parser.add_argument('--turns', type=int, default=100,
+                        help='moves before a session quits')
+    parser.add_argument('--mode', choices=['1', '2', '3'],
+                        help='difficulty, random for each session by default')
+    parser.add_argument('--ramp', type=float, default=1.0,
+                        help='seconds over which the sessions are started')
+    parser.add_argument('--think-ms', type=float, default=0,
+                        help='mean pause of the bot before each move')
+    parser.add_argument('--term', default=os.environ.get('TERM', 'xterm'))
+    parser.add_argument('--work-dir',
+                        help='keep the players here, a temp dir by default')
+    parser.add_argument('--budget-ms', type=float, default=None)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        work_dir = args.work_dir or temp_dir
+        results = list()
+        threads = list()
+        start = time.perf_counter()
+        for number in range(args.sessions):
+            thread = threading.Thread(
+                target=play_session, args=(number, work_dir, args, results)
+            )
+            thread.start()
+            threads.append(thread)
+            time.sleep(args.ramp / args.sessions)
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        database_report = check_database(work_dir, results)
+
+    turn_latencies = [
+        latency for result in results for latency in result['turn_latencies']
+    ]
+    menu_latencies = [
+        latency for result in results for latency in result['menu_latencies']
+    ]
+    counts = dict()
+    for result in results:
+        counts[result['result']] = counts.get(result['result'], 0) + 1
+    cpu = [result['cpu'] for result in results]
+    rss = [result['rss'] / 2 ** 20 for result in results]
+
+    print(f"{args.sessions} sessions in {elapsed:.1f} s, "
+          f"{len(turn_latencies) / elapsed:.1f} turns/s")
+    print('results: ' + ', '.join(
+        f"{key}: {value}" for key, value in sorted(counts.items())
+    ))
+    print(f"turn latency: {percentiles(turn_latencies)}")
+    print(f"menu latency: {percentiles(menu_latencies)}")
+    print(f"cpu per session: mean {sum(cpu) / len(cpu):.2f} s, "
+          f"max {max(cpu):.2f} s, {sum(cpu) / elapsed:.2f} cores busy")
+    print(f"peak rss per session: mean {sum(rss) / len(rss):.1f} MiB, "
+          f"max {max(rss):.1f} MiB")
+    print('\nplayer store:')
+    for line in database_report:
+        print(f"  {line}")
+
+    errors = [result for result in results if 'error' in result]
+    if errors:
+        print(f"\nfirst of {len(errors)} errors, {errors[0]['user_name']}:")
+        print(errors[0]['error'])
+
+    if args.budget_ms is not None and len(turn_latencies) > 1:
+        p99 = quantiles(turn_latencies, n=100, method='inclusive')[98] * 1000
+        if p99 > args.budget_ms:
+            print(f"\nover budget: p99 {p99:.1f} ms > {args.budget_ms} ms")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,221 @@
+"""Measures how long a new session takes to reach the first menu
+
+Runs the game in fresh interpreters and waits for the register/login page
+to be printed. One extra run with `-X importtime` shows which imports the
+time goes to. With --zygote the sessions are forked by `serve` instead,
+and are timed from connecting to its socket. Exits with status 1 if the
+median is over --budget-ms.
+
+    python benchmarks/startup.py --runs 20 --budget-ms 150
+    python benchmarks/startup.py --zygote --budget-ms 10
+"""
+import os
+import sys
+import time
+import socket
+import argparse
+import tempfile
+import subprocess
+from statistics import median
+from typing import (
+    List,
+    Tuple
+)
+
+REPO_ROOT: str = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# printed by register_or_login right before it waits for input
+FIRST_MENU: bytes = b"Enter 'Q' to exit the game"
+
+
+def time_to_first_menu(
+    python_flags: List[str],
+    work_dir: str
+) -> Tuple[float, bytes]:
+    """Starts the game once and times it until the first menu is printed
+
+    Parameters
+    ----------
+    python_flags: list : extra interpreter flags, e.g. ['-X', 'importtime']
+
+    work_dir: str : where the game keeps its player store
+
+
+    Returns seconds to the first menu and what the game wrote on stderr
+    -------
+
+    """
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, TERM='dumb')
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, *python_flags, '-m', 'dungeon_and_dragons'],
+        cwd=work_dir,
+        env=env,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    output = b''
+    while FIRST_MENU not in output:
+        chunk = os.read(process.stdout.fileno(), 4096)
+        if not chunk:
+            raise RuntimeError('the game exited before showing the menu')
+        output += chunk
+    elapsed = time.perf_counter() - start
+
+    process.kill()
+    _, errors = process.communicate()
+    return elapsed, errors
+
+
+def time_zygote_session(socket_path: str) -> float:
+    """Connects to a zygote server and times it until the first menu
+
+    Parameters
+    ----------
+    socket_path: str : unix socket of the server
+
+
+    Returns seconds to the first menu
+    -------
+
+    """
+    start = time.perf_counter()
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        # an empty hello, the session plays on the socket
+        client.sendall(b'{}')
+        output = b''
+        while FIRST_MENU not in output:
+            chunk = client.recv(4096)
+            if not chunk:
+                raise RuntimeError('the session ended before the menu')
+            output += chunk
+        elapsed = time.perf_counter() - start
+        client.sendall(b'q\n')
+        while client.recv(4096):
+            pass
+
+    return elapsed
+
+
+def zygote_timings(work_dir: str, runs: int) -> List[float]:
+    """Starts a zygote server and times runs sessions forked by it
+
+    Parameters
+    ----------
+    work_dir: str : where the server keeps its player store
+
+    runs: int : number of timed sessions
+
+
+    Returns list of milliseconds to the first menu
+    -------
+
+    """
+    socket_path = os.path.join(work_dir, 'zygote.sock')
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, TERM='dumb')
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'dungeon_and_dragons', 'serve',
+         '--socket', socket_path],
+        cwd=work_dir,
+        env=env,
+        stderr=subprocess.DEVNULL
+    )
+    try:
+        while not os.path.exists(socket_path):
+            if server.poll() is not None:
+                raise RuntimeError('the server exited before listening')
+            time.sleep(0.01)
+        # the first session warms the disk cache, like in main
+        time_zygote_session(socket_path)
+        return [
+            time_zygote_session(socket_path) * 1000 for _ in range(runs)
+        ]
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def slowest_imports(errors: bytes, count: int) -> List[Tuple[int, str]]:
+    """Finds the imports with the highest cumulative time
+
+    Parameters
+    ----------
+    errors: bytes : stderr of a run with `-X importtime`
+
+    count: int : how many imports to return
+
+
+    Returns list of (microseconds, module name), slowest first
+    -------
+
+    """
+    imports = list()
+    for line in errors.decode(errors='replace').splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, module = line[len('import time:'):].split('|')
+        imports.append((int(cumulative), module.strip()))
+
+    return sorted(imports, reverse=True)[:count]
+
+
+def main() -> None:
+    """Runs the benchmark and prints the report"""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--budget-ms', type=float, default=None)
+    parser.add_argument('--zygote', action='store_true',
+                        help='time sessions forked by the serve command')
+    args = parser.parse_args()
+
+    if args.zygote:
+        with tempfile.TemporaryDirectory() as work_dir:
+            timings = zygote_timings(work_dir, args.runs)
+        print(f"time to first menu over {args.runs} zygote sessions:")
+        print(f"  min {min(timings):.1f} ms, median {median(timings):.1f} "
+              f"ms, max {max(timings):.1f} ms")
+        check_budget(timings, args.budget_ms)
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        # the first run creates the player store and warms the disk cache
+        time_to_first_menu([], work_dir)
+        timings = [
+            time_to_first_menu([], work_dir)[0] * 1000
+            for _ in range(args.runs)
+        ]
+        _, errors = time_to_first_menu(['-X', 'importtime'], work_dir)
+
+    print(f"time to first menu over {args.runs} runs:")
+    print(f"  min {min(timings):.1f} ms, median {median(timings):.1f} ms, "
+          f"max {max(timings):.1f} ms")
+    print("\nslowest imports (cumulative):")
+    for microseconds, module in slowest_imports(errors, args.top):
+        print(f"  {microseconds / 1000:8.2f} ms  {module}")
+
+    check_budget(timings, args.budget_ms)
+
+
+def check_budget(timings: List[float], budget_ms: float) -> None:
+    """Exits with status 1 if the median time is over the budget
+
+    Parameters
+    ----------
+    timings: list : milliseconds of every run
+
+    budget_ms: float : the budget, None for no budget
+
+
+    Returns None
+    -------
+
+    """
+    if budget_ms is not None and median(timings) > budget_ms:
+        print(f"\nover budget: {median(timings):.1f} ms > {budget_ms} ms")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,5 @@
+"""Dungeon & Dragons, a CLI game
+
+Submodules are imported only when they are used, so importing the package
+stays cheap and the first menu shows up as fast as possible.
+"""
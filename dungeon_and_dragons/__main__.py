@@ -0,0 +1,3 @@
+from dungeon_and_dragons.cli import run
+
+run()
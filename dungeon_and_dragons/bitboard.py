@@ -0,0 +1,175 @@
+"""Bitboards, one Python int per map row
+
+Bit x of rows[y] is set when cell (x, y) is taken, by a wall in the
+terrain board or by a dragon placed on a new level. Checking a cell is a
+shift and a mask, and the free cells of a region are found a whole row at
+a time with bitwise operations instead of comparing emoji strings.
+"""
+from random import (
+    Random,
+    randrange
+)
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List
+)
+from dungeon_and_dragons.helper.types import (
+    GameMap,
+    Coordinate
+)
+
+
+def make_bitboard(width: int, height: int) -> Dict:
+    """Creates an empty bitboard
+
+    Parameters
+    ----------
+    width: int : width of the map
+
+    height: int : height of the map
+
+
+    Returns the bitboard dict
+    -------
+
+    """
+    return {'width': width, 'height': height, 'rows': [0] * height}
+
+
+def bitboard_from_map(game_map: GameMap, glyph: str) -> Dict:
+    """Creates a bitboard of the cells of a map that show glyph
+
+    Parameters
+    ----------
+    game_map: list : map of the game
+
+    glyph: str : e.g. how walls of the map are shown
+
+
+    Returns the bitboard dict
+    -------
+
+    """
+    board = make_bitboard(len(game_map[0]), len(game_map))
+    for y, row in enumerate(game_map):
+        bits = 0
+        for x, cell in enumerate(row):
+            if cell == glyph:
+                bits |= 1 << x
+        board['rows'][y] = bits
+
+    return board
+
+
+def bitboard_from_cells(
+    cells: Iterable[Coordinate],
+    width: int,
+    height: int
+) -> Dict:
+    """Creates a bitboard with the given cells set
+
+    Parameters
+    ----------
+    cells: iterable : coords to set
+
+    width: int : width of the map
+
+    height: int : height of the map
+
+
+    Returns the bitboard dict
+    -------
+
+    """
+    board = make_bitboard(width, height)
+    for cell in cells:
+        set_cell(board, cell)
+
+    return board
+
+
+def set_cell(board: Dict, cell: Coordinate) -> None:
+    """Sets a cell of the board
+
+    Parameters
+    ----------
+    board: dict : the bitboard
+
+    cell: tuple : coords of the cell
+
+
+    Returns None
+    -------
+
+    """
+    x, y = cell
+    board['rows'][y] |= 1 << x
+
+
+def free_rows(
+    boards: List[Dict],
+    left: int,
+    top: int,
+    right: int,
+    bottom: int
+) -> Iterator[tuple]:
+    """Finds the cells of a region that are set on none of the boards
+
+    Parameters
+    ----------
+    boards: list : bitboards of the same size
+
+    left, top, right, bottom: int : the region, bounds included
+
+
+    Returns generator of (y, bits of the free cells in row y)
+    -------
+
+    """
+    region = ((1 << (right - left + 1)) - 1) << left
+    for y in range(top, bottom + 1):
+        taken = 0
+        for board in boards:
+            taken |= board['rows'][y]
+        yield y, ~taken & region
+
+
+def random_free_cell(
+    boards: List[Dict],
+    left: int,
+    top: int,
+    right: int,
+    bottom: int,
+    rng: Random = None
+) -> Coordinate:
+    """Picks one of the free cells of a region, all equally likely
+
+    Parameters
+    ----------
+    boards: list : bitboards of the same size
+
+    left, top, right, bottom: int : the region, bounds included
+
+    rng: Random : seeded generator to pick with, the random module if None
+
+
+    Returns coords of the cell
+    -------
+
+    """
+    rows = list(free_rows(boards, left, top, right, bottom))
+    total = sum(bits.bit_count() for _, bits in rows)
+    if not total:
+        raise ValueError('no free cell left in the region')
+
+    index = rng.randrange(total) if rng else randrange(total)
+    for y, bits in rows:
+        count = bits.bit_count()
+        if index >= count:
+            index -= count
+            continue
+        for _ in range(index):
+            bits &= bits - 1
+        return (bits & -bits).bit_length() - 1, y
@@ -0,0 +1,475 @@
+"""Streaming export, import and merge of player stats
+
+database.json is read one player at a time and written the same way, so
+memory use doesn't grow with the number of players. Imports and merges
+sort the players by name in bounded runs spilled to temporary files and
+merge the runs, which also keeps memory flat for any number of inputs.
+"""
+import os
+import sys
+import csv
+import json
+import heapq
+import tempfile
+from itertools import (
+    groupby,
+    islice
+)
+from operator import itemgetter
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    TextIO,
+    Tuple
+)
+from dungeon_and_dragons.helper.files import file_mode
+from dungeon_and_dragons.rollups import merge_rollups
+
+# characters read from database.json at a time
+CHUNK_SIZE: int = 64 * 1024
+# players sorted in memory before a run is spilled to disk
+RUN_SIZE: int = 50_000
+# columns of the csv format, other stats are only kept in ndjson
+CSV_FIELDS: List[str] = [
+    'name', 'password', 'games won', 'games lost', 'win ratio'
+]
+JSON_WHITESPACE: str = ' \t\n\r'
+
+
+def iter_players(path: str) -> Iterator[Tuple[str, Dict]]:
+    """Reads the players of a database file one at a time
+
+    Parameters
+    ----------
+    path: str : path of a database.json file
+
+
+    Returns generator of (user name, stats) pairs
+    -------
+
+    """
+    decoder = json.JSONDecoder()
+    with open(path) as data_base:
+        buffer, pos = '', 0
+
+        def next_char() -> str:
+            nonlocal buffer, pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in JSON_WHITESPACE:
+                    pos += 1
+                if pos < len(buffer):
+                    return buffer[pos]
+                buffer, pos = data_base.read(CHUNK_SIZE), 0
+                if not buffer:
+                    raise ValueError(f"{path}: unexpected end of file")
+
+        def expect(char: str) -> None:
+            nonlocal pos
+            if next_char() != char:
+                raise ValueError(f"{path}: expected '{char}'")
+            pos += 1
+
+        def next_value():
+            nonlocal buffer, pos
+            next_char()
+            while True:
+                try:
+                    value, pos = decoder.raw_decode(buffer, pos)
+                    return value
+                except json.JSONDecodeError:
+                    # the value may just be cut off at the end of the buffer
+                    chunk = data_base.read(CHUNK_SIZE)
+                    if not chunk:
+                        raise
+                    buffer, pos = buffer[pos:] + chunk, 0
+
+        def next_key() -> str:
+            key = next_value()
+            expect(':')
+            return key
+
+        def has_next(closing: str) -> bool:
+            nonlocal pos
+            if next_char() == ',':
+                pos += 1
+            if next_char() == closing:
+                pos += 1
+                return False
+            return True
+
+        expect('{')
+        while has_next('}'):
+            if next_key() != 'players':
+                next_value()
+                continue
+            expect('{')
+            while has_next('}'):
+                user_name = next_key()
+                yield user_name, next_value()
+
+
+def write_players(path: str, players: Iterable[Tuple[str, Dict]]) -> int:
+    """Writes players to a database file, one at a time
+
+    The file is written next to path and renamed over it at the end, so a
+    failed write leaves the old database in place
+
+    Parameters
+    ----------
+    path: str : path of the database.json file
+
+    players: iterable : (user name, stats) pairs
+
+
+    Returns number of players written
+    -------
+
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    written = 0
+    with tempfile.NamedTemporaryFile(
+        'w', dir=directory, suffix='.tmp', delete=False
+    ) as data_base:
+        try:
+            data_base.write('{\n    "players": {')
+            separator = '\n'
+            for user_name, stats in players:
+                # the same layout json.dumps(contents, indent=4) gives
+                stats_json = json.dumps(stats, indent=4)
+                data_base.write(
+                    f"{separator}        {json.dumps(user_name)}: "
+                    + stats_json.replace('\n', '\n        ')
+                )
+                separator = ',\n'
+                written += 1
+            data_base.write('\n    }\n}' if written else '}\n}')
+        except BaseException:
+            data_base.close()
+            os.remove(data_base.name)
+            raise
+
+    os.chmod(data_base.name, file_mode(path))
+    os.replace(data_base.name, path)
+    return written
+
+
+def guess_format(path: str) -> str:
+    """Guesses the format of a players file from its extension
+
+    Parameters
+    ----------
+    path: str : path of the file, '-' is stdin or stdout
+
+
+    Returns 'database', 'csv' or 'ndjson'
+    -------
+
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.json':
+        return 'database'
+    if extension == '.csv':
+        return 'csv'
+    return 'ndjson'
+
+
+def read_players(path: str, file_format: str = None) -> Iterator:
+    """Reads players from a database, ndjson or csv file
+
+    Lines and rows that aren't a player with a name and numeric stats are
+    skipped and reported on stderr with their line number
+
+    Parameters
+    ----------
+    path: str : path of the file, '-' reads stdin
+
+    file_format: str : 'database', 'csv' or 'ndjson', guessed if None
+
+
+    Returns generator of (user name, stats) pairs
+    -------
+
+    """
+    file_format = file_format or guess_format(path)
+    if file_format == 'database':
+        yield from iter_players(path)
+        return
+
+    players_file = sys.stdin if path == '-' else open(path, newline='')
+    try:
+        if file_format == 'csv':
+            reader = csv.DictReader(players_file)
+            for row in reader:
+                user_name = row.pop('name', None)
+                if not user_name:
+                    print(
+                        f"{path}:{reader.line_num}: skipped, no 'name'",
+                        file=sys.stderr
+                    )
+                    continue
+                try:
+                    row['games won'] = int(row['games won'])
+                    row['games lost'] = int(row['games lost'])
+                    row['win ratio'] = float(row['win ratio'])
+                # a missing column is None, a short row has no value
+                except (KeyError, TypeError, ValueError):
+                    print(
+                        f"{path}:{reader.line_num}: skipped, games won, "
+                        "games lost and win ratio must be numbers",
+                        file=sys.stderr
+                    )
+                    continue
+                yield user_name, row
+        else:
+            for line_number, line in enumerate(players_file, 1):
+                if not line.strip():
+                    continue
+                stats = json.loads(line)
+                if not isinstance(stats, dict) or 'name' not in stats:
+                    print(
+                        f"{path}:{line_number}: skipped, not a player with "
+                        "a 'name'",
+                        file=sys.stderr
+                    )
+                    continue
+                yield stats.pop('name'), stats
+    finally:
+        if players_file is not sys.stdin:
+            players_file.close()
+
+
+def write_records(
+    players: Iterable[Tuple[str, Dict]],
+    out: TextIO,
+    file_format: str
+) -> int:
+    """Writes players as ndjson lines or csv rows
+
+    Parameters
+    ----------
+    players: iterable : (user name, stats) pairs
+
+    out: file : where the records are written
+
+    file_format: str : 'csv' or 'ndjson'
+
+
+    Returns number of players written
+    -------
+
+    """
+    written = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(out, CSV_FIELDS, extrasaction='ignore')
+        writer.writeheader()
+        for user_name, stats in players:
+            writer.writerow({'name': user_name, **stats})
+            written += 1
+    else:
+        for user_name, stats in players:
+            out.write(json.dumps({'name': user_name, **stats}) + '\n')
+            written += 1
+
+    return written
+
+
+def sort_players(
+    players: Iterable[Tuple[str, int, Dict]]
+) -> Iterator[Tuple[str, int, Dict]]:
+    """Sorts (user name, source, stats) records by name and source
+
+    Records are sorted RUN_SIZE at a time, spilled to temporary files and
+    the runs are merged back lazily
+
+    Parameters
+    ----------
+    players: iterable : (user name, source index, stats) records
+
+
+    Returns generator of the records in sorted order
+    -------
+
+    """
+    players = iter(players)
+    runs = list()
+    try:
+        while True:
+            run = sorted(islice(players, RUN_SIZE), key=itemgetter(0, 1))
+            if not runs and len(run) < RUN_SIZE:
+                # everything fit in memory, no need to touch the disk
+                yield from run
+                return
+            if not run:
+                break
+            run_file = tempfile.TemporaryFile('w+')
+            for record in run:
+                run_file.write(json.dumps(record) + '\n')
+            run_file.seek(0)
+            runs.append(run_file)
+
+        yield from heapq.merge(
+            *((tuple(json.loads(line)) for line in run) for run in runs),
+            key=itemgetter(0, 1)
+        )
+    finally:
+        for run_file in runs:
+            run_file.close()
+
+
+def combine_players(
+    sources: List[Iterable[Tuple[str, Dict]]],
+    combine: Callable[[List[Dict]], Dict]
+) -> Iterator[Tuple[str, Dict]]:
+    """Joins players from several sources by name
+
+    Parameters
+    ----------
+    sources: list : iterables of (user name, stats) pairs
+
+    combine: function : turns the stats of one player from every source
+    they appear in, in source order, into the stats that are kept
+
+
+    Returns generator of (user name, stats) pairs sorted by name
+    -------
+
+    """
+    tagged = (
+        (user_name, index, stats)
+        for index, source in enumerate(sources)
+        for user_name, stats in source
+    )
+    for user_name, records in groupby(sort_players(tagged), itemgetter(0)):
+        yield user_name, combine([stats for _, _, stats in records])
+
+
+def keep_last(all_stats: List[Dict]) -> Dict:
+    """Keeps the stats from the last source, used by import
+
+    Parameters
+    ----------
+    all_stats: list : the stats of one player, in source order
+
+
+    Returns the stats of the player
+    -------
+
+    """
+    return all_stats[-1]
+
+
+def add_stats(all_stats: List[Dict]) -> Dict:
+    """Adds up games won and lost from every source, used by merge
+
+    The rollups of every source are merged, see rollups.merge_rollups, the
+    password and any other field come from the first source
+
+    Parameters
+    ----------
+    all_stats: list : the stats of one player, in source order
+
+
+    Returns the stats of the player
+    -------
+
+    """
+    stats = dict(all_stats[0])
+    stats['games won'] = sum(item['games won'] for item in all_stats)
+    stats['games lost'] = sum(item['games lost'] for item in all_stats)
+    games = stats['games won'] + stats['games lost']
+    stats['win ratio'] = (stats['games won'] / games) * 100 if games else 0
+    # csv sources and players from before rollups were kept have none
+    all_rollups = [
+        item['rollups'] for item in all_stats if item.get('rollups')
+    ]
+    if all_rollups:
+        stats['rollups'] = merge_rollups(all_rollups)
+
+    return stats
+
+
+def export_command(args) -> None:
+    """Streams the players of the database out as ndjson or csv
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    file_format = args.format or guess_format(args.output)
+    if args.database is None:
+        from dungeon_and_dragons.shards import (
+            iter_leaderboard,
+            make_store
+        )
+        make_store()
+        players = iter_leaderboard()
+    else:
+        players = iter_players(args.database)
+    if args.output == '-':
+        write_records(players, sys.stdout, file_format)
+        return
+
+    with open(args.output, 'w', newline='') as out:
+        written = write_records(players, out, file_format)
+    print(f"exported {written} players to {args.output}", file=sys.stderr)
+
+
+def import_command(args) -> None:
+    """Bulk imports players into the database, replacing existing ones
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    sources = [read_players(path, args.format) for path in args.files]
+    if args.database is None:
+        from dungeon_and_dragons.shards import (
+            iter_leaderboard,
+            make_store,
+            shard_count,
+            write_shards
+        )
+        make_store()
+        sources.insert(0, iter_leaderboard())
+        written = write_shards(
+            combine_players(sources, keep_last), shard_count()
+        )
+        print(f"the player store now has {written} players", file=sys.stderr)
+        return
+
+    if os.path.exists(args.database):
+        sources.insert(0, iter_players(args.database))
+    written = write_players(
+        args.database, combine_players(sources, keep_last)
+    )
+    print(f"{args.database} now has {written} players", file=sys.stderr)
+
+
+def merge_command(args) -> None:
+    """Merges the stats of several hosts' databases or exports
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    sources = [read_players(path) for path in args.files]
+    written = write_players(args.output, combine_players(sources, add_stats))
+    print(f"merged {written} players into {args.output}", file=sys.stderr)
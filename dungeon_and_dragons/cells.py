@@ -0,0 +1,207 @@
+"""Flat cell indices, the engine's cells are ints instead of coord tuples
+
+The map is laid out row after row with a ring of walls around it, so
+(x, y) is the cell (y + 1) * stride + x + 1, where stride is the width
+plus 2. A move is one int added to a cell and a step off the map lands on
+the ring, which is a wall, so no move needs a bounds check.
+
+Walls are one byte per cell and the dragons are an array('i') of cells
+changed in place, with the occupancy array telling which dragon stands
+on a cell, so a turn doesn't allocate tuples or lists for every dragon it
+looks at and can find the dragons around a cell without looking at the
+others. Coords are only made from cells where the game meets the rest of
+the program: the frames, the spectators and the saved levels.
+"""
+from array import array
+from typing import (
+    Dict,
+    Iterable,
+    List
+)
+from dungeon_and_dragons.helper.types import Coordinate
+
+# the '0' and '1' characters of a row of bits as wall bytes
+BITS_TO_WALLS: bytes = bytes.maketrans(b'01', b'\0\1')
+
+
+def make_grid(wall_board: Dict, alt_movements: List[Coordinate]) -> Dict:
+    """Creates the flat grid of a map
+
+    Parameters
+    ----------
+    wall_board: dict : bitboard of the walls of the map
+
+    alt_movements: list : a list of tuples containing movements
+
+
+    Returns the grid dict
+    -------
+
+    """
+    width = wall_board['width']
+    stride = width + 2
+    walls = bytearray(b'\1') * (stride * (wall_board['height'] + 2))
+    for y, row in enumerate(wall_board['rows']):
+        start = (y + 1) * stride + 1
+        # bit x is column x, so the binary string is read backwards
+        bits = format(row, f'0{width}b')[::-1][:width]
+        walls[start:start + width] = bits.encode().translate(BITS_TO_WALLS)
+
+    return {
+        'width': width,
+        'height': wall_board['height'],
+        'stride': stride,
+        'walls': walls,
+        # in the order of alt_movements, random moves are chosen from it
+        'offsets': [x_mov + y_mov * stride for x_mov, y_mov in alt_movements],
+        # sorted so the best move breaks ties like min() on (dist, move)
+        'moves': [
+            (x_mov, y_mov, x_mov + y_mov * stride)
+            for x_mov, y_mov in sorted(alt_movements)
+        ],
+    }
+
+
+def cell_of(grid: Dict, coord: Coordinate) -> int:
+    """Finds the cell of coords
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    coord: tuple : (x, y) on the map
+
+
+    Returns the cell
+    -------
+
+    """
+    x, y = coord
+    return (y + 1) * grid['stride'] + x + 1
+
+
+def coord_of(grid: Dict, cell: int) -> Coordinate:
+    """Finds the coords of a cell
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    cell: int : the cell
+
+
+    Returns (x, y) on the map
+    -------
+
+    """
+    y, x = divmod(cell, grid['stride'])
+    return x - 1, y - 1
+
+
+def cells_of(grid: Dict, coords: Iterable[Coordinate]) -> array:
+    """Turns coords into an array of cells
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    coords: iterable : (x, y) tuples
+
+
+    Returns array('i') of cells, in the same order
+    -------
+
+    """
+    stride = grid['stride']
+    return array('i', [(y + 1) * stride + x + 1 for x, y in coords])
+
+
+def coords_of(grid: Dict, cells: Iterable[int]) -> List[Coordinate]:
+    """Turns cells into coords, for the frames and the spectators
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    cells: iterable : cells, e.g. the dragons
+
+
+    Returns list of (x, y) tuples, in the same order
+    -------
+
+    """
+    stride = grid['stride']
+    return [(cell % stride - 1, cell // stride - 1) for cell in cells]
+
+
+def make_occupancy(grid: Dict, cells: Iterable[int]) -> array:
+    """Finds the dragon on every cell of the grid, dragons never share a
+    cell
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    cells: iterable : cells of the dragons
+
+
+    Returns array('i') with the index of the dragon on each cell plus 1, 0
+    where there is none
+    -------
+
+    """
+    occupancy = array('i', bytes(4 * len(grid['walls'])))
+    for dragon, cell in enumerate(cells):
+        occupancy[cell] = dragon + 1
+
+    return occupancy
+
+
+def squared_distance(stride: int, cell: int, other: int) -> int:
+    """Finds the squared distance of two cells, which orders cells like
+    math.dist does and is exact
+
+    Parameters
+    ----------
+    stride: int : stride of the grid
+
+    cell: int : a cell
+
+    other: int : another cell
+
+
+    Returns the squared distance
+    -------
+
+    """
+    y, x = divmod(cell, stride)
+    other_y, other_x = divmod(other, stride)
+    return (x - other_x) ** 2 + (y - other_y) ** 2
+
+
+def best_move(grid: Dict, cell: int, target: int) -> int:
+    """Finds the move that takes a cell closest to a target
+
+    Parameters
+    ----------
+    grid: dict : see make_grid
+
+    cell: int : where the move starts
+
+    target: int : the cell to get close to
+
+
+    Returns the offset of the move
+    -------
+
+    """
+    y, x = divmod(cell, grid['stride'])
+    target_y, target_x = divmod(target, grid['stride'])
+    shortest = best_offset = None
+    for x_mov, y_mov, offset in grid['moves']:
+        distance = (x + x_mov - target_x) ** 2 + (y + y_mov - target_y) ** 2
+        # strictly shorter, the first of equal moves is kept
+        if shortest is None or distance < shortest:
+            shortest, best_offset = distance, offset
+
+    return best_offset
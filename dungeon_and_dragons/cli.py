@@ -0,0 +1,276 @@
+"""Command line interface of the game
+
+Every subcommand imports the modules it needs when it runs, so starting a
+game doesn't pay for the others.
+"""
+import sys
+from typing import List
+
+# shared memory block of play --broadcast and spectate if none is named
+BROADCAST_NAME: str = 'dungeon-and-dragons'
+# unix socket of serve and connect, see zygote.py
+SOCKET_PATH: str = 'dungeon-and-dragons.sock'
+
+
+def run(argv: List[str] = None) -> None:
+    """Parses the command line and runs the chosen subcommand
+
+    Parameters
+    ----------
+    argv: list : command line arguments, sys.argv[1:] if not given
+
+
+    Returns None
+    -------
+
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    # the common case skips building the parser altogether
+    if not argv:
+        play()
+        return
+
+    args = make_parser().parse_args(argv)
+    args.handler(args)
+
+
+def make_parser():
+    """Builds the argument parser with all subcommands
+
+    Returns the parser
+    -------
+
+    """
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        prog='dungeon-and-dragons',
+        description='Escape the dungeon without getting caught by dragons.'
+    )
+    parser.set_defaults(handler=play)
+    subparsers = parser.add_subparsers(title='commands')
+
+    play_parser = subparsers.add_parser(
+        'play', help='play the game, the default command'
+    )
+    # dragons on their own clock and players taking turns don't mix
+    play_mode = play_parser.add_mutually_exclusive_group()
+    play_mode.add_argument(
+        '--tick-rate',
+        type=positive_float,
+        metavar='TICKS',
+        help='real-time mode, dragons move TICKS times a second'
+    )
+    play_mode.add_argument(
+        '--players',
+        type=int,
+        default=1,
+        # one for each glyph of multiplayer.PLAYER_GLYPHS
+        choices=range(1, 7),
+        metavar='N',
+        help='N players, 1 to 6, take turns on the same map'
+    )
+    play_parser.add_argument(
+        '--memory-profile',
+        metavar='REPORT',
+        help='trace allocations of every turn by subsystem and write a '
+        'report to REPORT when the game ends, slows the game down'
+    )
+    play_parser.add_argument(
+        '--memory-diff',
+        type=int,
+        nargs=2,
+        metavar=('N', 'M'),
+        help='compare the allocations of turns N and M in the memory '
+        'profile, the first and the last turn by default'
+    )
+    play_parser.add_argument(
+        '--seed',
+        type=int,
+        help='play the level with this seed, levels are cached in map_cache'
+    )
+    play_parser.add_argument(
+        '--broadcast',
+        nargs='?',
+        const=BROADCAST_NAME,
+        metavar='NAME',
+        help='publish the game in shared memory for the spectate command'
+    )
+    play_parser.set_defaults(handler=play)
+
+    spectate_parser = subparsers.add_parser(
+        'spectate', help='watch a game started with play --broadcast'
+    )
+    spectate_parser.add_argument(
+        'name', nargs='?', default=BROADCAST_NAME
+    )
+    spectate_parser.add_argument(
+        '--reveal',
+        action='store_true',
+        help="show the dragons the player can't see"
+    )
+    spectate_parser.add_argument(
+        '--fps',
+        type=positive_float,
+        default=20,
+        help='frames checked per second'
+    )
+    spectate_parser.set_defaults(
+        handler=lazy_handler('spectate', 'spectate_command')
+    )
+
+    serve_parser = subparsers.add_parser(
+        'serve', help='preload the game and fork a session per connection'
+    )
+    serve_parser.add_argument('--socket', default=SOCKET_PATH)
+    serve_parser.set_defaults(handler=lazy_handler('zygote', 'serve_command'))
+
+    connect_parser = subparsers.add_parser(
+        'connect', help='play on this terminal in a session of serve'
+    )
+    connect_parser.add_argument('--socket', default=SOCKET_PATH)
+    connect_parser.add_argument(
+        'play_args',
+        nargs=argparse.REMAINDER,
+        help="'play' and its options, e.g. play --tick-rate 4"
+    )
+    connect_parser.set_defaults(
+        handler=lazy_handler('zygote', 'connect_command')
+    )
+
+    export_parser = subparsers.add_parser(
+        'export', help='stream player stats out as ndjson or csv'
+    )
+    export_parser.add_argument(
+        '--database', help='a database.json file instead of the player store'
+    )
+    export_parser.add_argument(
+        '--format',
+        choices=['ndjson', 'csv'],
+        help='guessed from the output file name, ndjson for stdout'
+    )
+    export_parser.add_argument(
+        '-o', '--output', default='-', help='output file, stdout by default'
+    )
+    export_parser.set_defaults(handler=lazy_handler('bulk', 'export_command'))
+
+    import_parser = subparsers.add_parser(
+        'import', help='bulk import player stats, replacing existing players'
+    )
+    import_parser.add_argument('files', nargs='+', help="'-' reads stdin")
+    import_parser.add_argument(
+        '--database', help='a database.json file instead of the player store'
+    )
+    import_parser.add_argument(
+        '--format',
+        choices=['ndjson', 'csv', 'database'],
+        help='guessed from the file names'
+    )
+    import_parser.set_defaults(handler=lazy_handler('bulk', 'import_command'))
+
+    merge_parser = subparsers.add_parser(
+        'merge', help="add up the stats of several hosts' databases"
+    )
+    merge_parser.add_argument(
+        'files', nargs='+', help='database.json files or exports'
+    )
+    merge_parser.add_argument('-o', '--output', required=True)
+    merge_parser.set_defaults(handler=lazy_handler('bulk', 'merge_command'))
+
+    reshard_parser = subparsers.add_parser(
+        'reshard', help='split the player store into a new number of shards'
+    )
+    reshard_parser.add_argument('shards', type=int)
+    reshard_parser.set_defaults(
+        handler=lazy_handler('shards', 'reshard_command')
+    )
+
+    telemetry_parser = subparsers.add_parser(
+        'telemetry-stats', help='distributions over the per-game telemetry'
+    )
+    telemetry_parser.add_argument(
+        'files',
+        nargs='*',
+        help='telemetry files, telemetry.ndjson and its rotations by default'
+    )
+    telemetry_parser.add_argument(
+        '--json', action='store_true', help='print the summary as json'
+    )
+    telemetry_parser.set_defaults(
+        handler=lazy_handler('telemetry', 'stats_command')
+    )
+
+    return parser
+
+
+def positive_float(value: str) -> float:
+    """Argument type of rates, which are divided by and must be above 0
+
+    Parameters
+    ----------
+    value: str : the argument
+
+
+    Returns the rate
+    -------
+
+    """
+    import argparse
+    import math
+
+    try:
+        rate = float(value)
+    except ValueError:
+        rate = math.nan
+    if not (math.isfinite(rate) and rate > 0):
+        raise argparse.ArgumentTypeError(f'{value!r} is not a number above 0')
+
+    return rate
+
+
+def lazy_handler(module: str, function: str):
+    """Makes a subcommand handler that imports its module when it runs
+
+    Parameters
+    ----------
+    module: str : module name inside dungeon_and_dragons
+
+    function: str : name of the handler in that module
+
+
+    Returns the handler
+    -------
+
+    """
+    def handler(args) -> None:
+        from importlib import import_module
+
+        module_path = f'dungeon_and_dragons.{module}'
+        getattr(import_module(module_path), function)(args)
+
+    return handler
+
+
+def play(args=None) -> None:
+    """Starts an interactive game
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    from dungeon_and_dragons.game import main
+
+    main(
+        tick_rate=getattr(args, 'tick_rate', None),
+        memory_report=getattr(args, 'memory_profile', None),
+        memory_diff=getattr(args, 'memory_diff', None),
+        broadcast_name=getattr(args, 'broadcast', None),
+        players=getattr(args, 'players', 1),
+        seed=getattr(args, 'seed', None)
+    )
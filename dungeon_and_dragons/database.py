@@ -0,0 +1,170 @@
+"""Players and their stats, stored in the shards of shards.py"""
+import time
+from typing import Dict
+from dungeon_and_dragons.rollups import (
+    add_game,
+    append_history,
+    make_rollups,
+    today
+)
+from dungeon_and_dragons.render import (
+    clear_terminal,
+    print_logo
+)
+from dungeon_and_dragons.shards import (
+    get_player,
+    make_store,
+    update_players
+)
+
+
+def make_initial_database() -> None:
+    """Creates the player store if it isn't created yet"""
+    make_store()
+
+
+def register() -> str:
+    """Registers the username and password of the game to the database"""
+    while True:
+        print_logo()
+        user_name = input("Username: ").strip().lower()
+        if get_player(user_name) is not None:
+            print(f"{user_name} already exists, choose another one.")
+            time.sleep(1)
+            clear_terminal()
+            continue
+        clear_terminal()
+        print_logo()
+        password = input("Password: ")
+        repeat_pass = input("Repeat password: ")
+
+        clear_terminal()
+        if not repeat_pass == password:
+            print('Passwords do not match, try again!')
+            time.sleep(1)
+            clear_terminal()
+            continue
+        break
+
+    update_players({
+        user_name: {
+            'password': password,
+            'games won': 0,
+            'games lost': 0,
+            'win ratio': 0,
+            'rollups': make_rollups(),
+        }
+    })
+
+    print_logo()
+    print(f'{user_name} registered successfully!')
+    time.sleep(1)
+    clear_terminal()
+    return user_name
+
+
+def login() -> str:
+    """Logs in the user to the game"""
+    while True:
+        print_logo()
+        user_name = input("Username: ")
+        clear_terminal()
+        player = get_player(user_name)
+        if player is None:
+            print_logo()
+            print(f"'{user_name}' not found, press RETURN try again!")
+            print("Or enter any key to go back to the first page")
+            usr_inp = input()
+            clear_terminal()
+            if not usr_inp:
+                continue
+            user_name = None
+            break
+        print_logo()
+        password = input("Password: ")
+        clear_terminal()
+        if not player['password'] == password:
+            user_name = None
+            print("Wrong password")
+            print('~~~~~~~~~~~~~~~')
+            print('Press RETURN to try again')
+            print("Enter any key to go back")
+            user_input = input().strip().lower()
+            clear_terminal()
+
+            if not user_input:
+                continue
+        break
+
+    return user_name
+
+
+def update_database(user_name: str, result: str, turns: int = 0) -> None:
+    """Updating the games's database based on the result of the game
+
+    Parameters
+    ----------
+    user_name:str : the player's username
+
+    result: str : result of the game
+
+    turns: int : turns the game took
+
+
+    Returns None
+    -------
+
+    """
+    update_results({user_name: result}, {user_name: turns})
+
+
+def update_results(
+    results: Dict[str, str],
+    turns: Dict[str, int] = None
+) -> None:
+    """Updates the stats of several players, every shard they are in is
+    rewritten once, see shards.update_players
+
+    The game is added to each player's rollups and history, see rollups.py
+
+    Parameters
+    ----------
+    results: dict : username to 'win' or 'loss'
+
+    turns: dict : username to the turns their game took
+
+
+    Returns None
+    -------
+
+    """
+    if turns is None:
+        turns = dict()
+
+    day = today()
+    players = dict()
+    for user_name, result in results.items():
+        player = players[user_name] = get_player(user_name)
+        if result == 'win':
+            player['games won'] += 1
+        else:
+            player['games lost'] += 1
+
+        games_won = player['games won']
+        games_lost = player['games lost']
+
+        win_ratio = (games_won / (games_won + games_lost)) * 100
+        player['win ratio'] = win_ratio
+        # players registered before rollups were kept start without them
+        rollups = player.setdefault('rollups', make_rollups())
+        add_game(rollups, result, turns.get(user_name, 0), day)
+
+    update_players(players)
+    append_history([
+        {
+            'name': user_name,
+            'result': result,
+            'turns': turns.get(user_name, 0),
+        }
+        for user_name, result in results.items()
+    ])
@@ -0,0 +1,337 @@
+"""Rules of a game turn: moving the player and the dragons, win and loss
+
+The rules work on the flat cells of cells.py, the dragons are an array of
+cells and only the player's position is passed around as coords.
+"""
+from typing import (
+    List,
+    Dict,
+    FrozenSet,
+    Tuple
+)
+from array import array
+from random import choice
+from math import dist
+from functools import cache
+from dungeon_and_dragons.helper.types import Coordinate
+from dungeon_and_dragons.cells import (
+    best_move,
+    cell_of,
+    coord_of,
+    squared_distance
+)
+from dungeon_and_dragons.database import update_database
+from dungeon_and_dragons.parallel_ai import (
+    MIN_PARALLEL_SIZE,
+    parallel_enabled,
+    region_dragon_moves
+)
+from dungeon_and_dragons.telemetry import finish_game_telemetry
+from dungeon_and_dragons.render import (
+    lose_game,
+    win_game
+)
+
+# below this many alerted dragons the plain loop in dragon_moves is faster
+MIN_BATCH_SIZE: int = 32
+
+
+@cache
+def get_dragon_kernel():
+    """Imports the optional NumPy engine the first time it is needed
+
+    Returns the dragon_kernel module or None if NumPy isn't installed
+    -------
+
+    """
+    try:
+        from dungeon_and_dragons.helper import dragon_kernel
+    except ImportError:
+        return None
+
+    return dragon_kernel
+
+
+def calculate_new_position(
+    grid: Dict,
+    player_input: str,
+    movements: Dict[str, Coordinate],
+    player_info: Coordinate
+) -> Coordinate:
+    """Calculates the new player position on the map based on user's input
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    player_input: str : player's input
+
+    movements: dict : a set of movement actions
+
+    player_info: tuple : player's coords
+
+
+    Returns new player coords
+    -------
+
+    """
+    # movements[player_input] shows how much needs to be added or deducted
+    # for example movements['up'] = (0, -1), deducting 1 from y
+    x_movement, y_movement = movements[player_input]
+    new_cell = cell_of(grid, player_info) + x_movement + (
+        y_movement * grid['stride']
+    )
+    # if hits the sides, the ceiling or the floor doesn't move
+    if grid['walls'][new_cell]:
+        return player_info
+    return coord_of(grid, new_cell)
+
+
+def is_dragonsmellrange(
+    grid: Dict,
+    occupancy: array,
+    player_pos: Coordinate,
+    smell_zone: int,
+    visible_cells: FrozenSet = None,
+) -> array:
+    """Calculates whether player is in smell range of the dragon
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    occupancy: array : dragon on every cell, see cells.make_occupancy
+
+    player_pos: tuple : player's position on the map
+
+    smell_zone: int : the distance which dargon can smell player
+
+    visible_cells: frozenset : field of view of the player, walls block
+    the smell of dragons outside of it, see fov.field_of_view
+
+
+    Returns array('i') of the indices of the dragons that are alerted by
+    the player, in order
+    -------
+
+    """
+    if visible_cells is None:
+        player_x, player_y = player_pos
+        visible_cells = [
+            (player_x + x, player_y + y)
+            for x in range(-smell_zone, smell_zone + 1)
+            for y in range(-smell_zone, smell_zone + 1)
+        ]
+    # only the few cells that can smell the player are looked at, however
+    # many dragons there are. Cells off the map would wrap onto other rows
+    dragons = [
+        occupancy[cell_of(grid, (x, y))] - 1 for x, y in visible_cells
+        if 0 <= x < grid['width'] and 0 <= y < grid['height'] and (
+            dist(player_pos, (x, y)) <= smell_zone
+        )
+    ]
+
+    return array('i', sorted(dragon for dragon in dragons if dragon >= 0))
+
+
+def dragon_moves(
+    grid: Dict,
+    alerted_dragons: array,
+    dragon_cells: array,
+    occupancy: array,
+    player_cell: int,
+    wall_mask=None,
+    targets: array = None,
+) -> None:
+    """Calculates dragon's next move, dragon_cells and occupancy are
+    changed in place
+
+    With many alerted dragons and a wall_mask the NumPy engine moves them
+    all at once, see get_dragon_kernel. Without it, on free-threaded
+    builds, they are moved region by region on a thread pool, see
+    parallel_ai.py
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    alerted_dragons: array : indices in dragon_cells of the dragons that
+    have been alerted, see is_dragonsmellrange
+
+    dragon_cells: array : cells of the dragons
+
+    occupancy: array : dragon on every cell, see cells.make_occupancy
+
+    player_cell: int : player's cell on the map
+
+    wall_mask: array : walls of the map for the NumPy engine, optional
+
+    targets: array : cells each alerted dragon heads for, in the same
+    order, e.g. along a scent trail, see scent.py, player_cell is used if
+    not given
+
+
+    Returns None
+    -------
+
+    """
+    if targets is None:
+        targets = player_cell
+    new_cells = None
+    if wall_mask is not None and len(alerted_dragons) >= MIN_BATCH_SIZE:
+        new_cells = get_dragon_kernel().batched_dragon_moves(
+            wall_mask,
+            grid,
+            alerted_dragons,
+            dragon_cells,
+            occupancy,
+            targets
+        )
+    elif len(alerted_dragons) >= MIN_PARALLEL_SIZE and parallel_enabled():
+        new_cells = region_dragon_moves(
+            grid,
+            alerted_dragons,
+            dragon_cells,
+            targets
+        )
+    if new_cells is not None:
+        # a dragon can move onto a cell another one leaves later in the
+        # list, so every old cell is cleared before the new ones are set
+        for dragon in alerted_dragons:
+            occupancy[dragon_cells[dragon]] = 0
+        for dragon, new_cell in zip(alerted_dragons, new_cells):
+            occupancy[new_cell] = dragon + 1
+            dragon_cells[dragon] = new_cell
+        return
+
+    walls = grid['walls']
+    stride = grid['stride']
+    offsets = grid['offsets']
+    target = player_cell
+    thirty_chance = [1, 0, 0]
+    sixty_chance = [1, 1, 0]
+    for number, dragon in enumerate(alerted_dragons):
+        cell = dragon_cells[dragon]
+        if player_cell is None:
+            target = targets[number]
+
+        # if dist is more than 2, ~30% chance to choose the best move
+        if squared_distance(stride, cell, target) > 4:
+            chance = choice(thirty_chance)
+        # else ~60%
+        else:
+            chance = choice(sixty_chance)
+        # if best move is chosen, calculate the best move by distance
+        if chance:
+            new_cell = cell + best_move(grid, cell, target)
+        # else choose a random movement
+        else:
+            new_cell = cell + choice(offsets)
+        # walls, other dragons and the outside of the map block the move
+        if walls[new_cell] or occupancy[new_cell]:
+            continue
+        occupancy[cell] = 0
+        occupancy[new_cell] = dragon + 1
+        dragon_cells[dragon] = new_cell
+
+
+def game_result(
+    grid: Dict,
+    player_info: Coordinate,
+    occupancy: array,
+    dungeon_door_pos: Coordinate,
+    hearts: List[str]
+) -> Tuple[str, str]:
+    """Takes a heart for every dragon next to the player and finds out if
+    the player has won or lost
+
+    Only the player's cell and its neighbours are looked at, however many
+    dragons there are
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    player_info: tuple : player's coords on the map
+
+    occupancy: array : dragon on every cell, see cells.make_occupancy
+
+    dungeon_door_pos: tuple : the coords on the dungeon door
+
+    hearts: list :  the health bar of the player
+
+
+    Returns ('loss', 'caught' or 'hearts'), ('win', 'door') or
+    ('ongoing', None)
+    -------
+
+    """
+    player_cell = cell_of(grid, player_info)
+    stride = grid['stride']
+    # dragons within a dist of 1
+    touching = 5 - [
+        occupancy[player_cell + offset]
+        for offset in (0, -1, 1, -stride, stride)
+    ].count(0)
+    del hearts[max(len(hearts) - touching, 0):]
+
+    if occupancy[player_cell]:
+        return 'loss', 'caught'
+    if touching and not hearts:
+        return 'loss', 'hearts'
+
+    if player_info == dungeon_door_pos:
+        return 'win', 'door'
+
+    return 'ongoing', None
+
+
+def check_win_lose(
+    grid: Dict,
+    player_info: Coordinate,
+    occupancy: array,
+    dungeon_door_pos: Coordinate,
+    hearts: List[str],
+    user_name: str,
+    telemetry: Dict = None
+) -> None:
+    """Check if the player wins or loses the game
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    player_info: tuple : player's coords on the map
+
+    occupancy: array : dragon on every cell, see cells.make_occupancy
+
+    dungeon_door_pos: tuple : the coords on the dungeon door
+
+    hearts: list :  the health bar of the player
+
+    user_name: str : the username of the player
+
+    telemetry: dict : telemetry of the game, written when it ends
+
+
+    Returns None
+    -------
+
+    """
+    game_state, cause = game_result(
+        grid, player_info, occupancy, dungeon_door_pos, hearts
+    )
+    if game_state == 'ongoing':
+        return
+
+    if telemetry is not None:
+        finish_game_telemetry(telemetry, game_state, cause)
+    update_database(
+        user_name,
+        game_state,
+        telemetry['turns'] if telemetry is not None else 0
+    )
+    if game_state == 'loss':
+        lose_game(user_name)
+    else:
+        win_game(user_name)
@@ -0,0 +1,152 @@
+"""Field of view with recursive shadowcasting
+
+Walls block sight and smell. The field of view of a player position only
+depends on the walls around it, and walls don't change during a game, so
+it is computed once per position and cached. The cost of a turn is one
+dict lookup, however many dragons there are.
+"""
+from typing import (
+    Dict,
+    FrozenSet,
+    List,
+    Set
+)
+from dungeon_and_dragons.helper.types import Coordinate
+
+# fields of view kept in a cache before the oldest is dropped
+MAX_FIELDS: int = 4096
+# multipliers that turn the first octant into each of the eight octants
+OCTANTS: List[tuple] = [
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+]
+
+
+def make_fov_cache(wall_board: Dict, radius: int) -> Dict:
+    """Creates the field of view cache of a map
+
+    Parameters
+    ----------
+    wall_board: dict : bitboard of the walls of the map
+
+    radius: int : how far the player can be seen or smelled
+
+
+    Returns the cache dict
+    -------
+
+    """
+    return {
+        'walls': wall_board,
+        'radius': radius,
+        'fields': dict(),
+    }
+
+
+def field_of_view(fov_cache: Dict, origin: Coordinate) -> FrozenSet:
+    """Finds the cells that can be seen from origin, using the cache
+
+    Parameters
+    ----------
+    fov_cache: dict : see make_fov_cache
+
+    origin: tuple : coords the cells are seen from
+
+
+    Returns frozenset of visible coords within the radius of the cache
+    -------
+
+    """
+    fields = fov_cache['fields']
+    if origin in fields:
+        return fields[origin]
+
+    visible = {origin}
+    origin_x, origin_y = origin
+    for xx, xy, yx, yy in OCTANTS:
+        cast_light(
+            fov_cache, origin_x, origin_y, 1, 1.0, 0.0,
+            xx, xy, yx, yy, visible
+        )
+    if len(fields) >= MAX_FIELDS:
+        # dicts keep insertion order, the first key is the oldest
+        del fields[next(iter(fields))]
+    fields[origin] = frozenset(visible)
+
+    return fields[origin]
+
+
+def cast_light(
+    fov_cache: Dict,
+    origin_x: int,
+    origin_y: int,
+    row: int,
+    start: float,
+    end: float,
+    xx: int,
+    xy: int,
+    yx: int,
+    yy: int,
+    visible: Set[Coordinate]
+) -> None:
+    """Lights one octant row by row, recursing around walls
+
+    Parameters
+    ----------
+    fov_cache: dict : see make_fov_cache
+
+    origin_x, origin_y: int : coords the cells are seen from
+
+    row: int : distance of the first row to scan
+
+    start, end: float : slopes of the part of the octant still lit
+
+    xx, xy, yx, yy: int : multipliers of the octant, see OCTANTS
+
+    visible: set : visible coords are added to it
+
+
+    Returns None
+    -------
+
+    """
+    if start < end:
+        return
+    walls = fov_cache['walls']['rows']
+    width, height = fov_cache['walls']['width'], fov_cache['walls']['height']
+    radius = fov_cache['radius']
+    new_start = start
+    for distance in range(row, radius + 1):
+        blocked = False
+        delta_y = -distance
+        for delta_x in range(-distance, 1):
+            left_slope = (delta_x - 0.5) / (delta_y + 0.5)
+            right_slope = (delta_x + 0.5) / (delta_y - 0.5)
+            if start < right_slope:
+                continue
+            if end > left_slope:
+                break
+
+            cell_x = origin_x + delta_x * xx + delta_y * xy
+            cell_y = origin_y + delta_x * yx + delta_y * yy
+            inside = 0 <= cell_x < width and 0 <= cell_y < height
+            # outside the map counts as a wall
+            is_wall = not inside or bool(walls[cell_y] >> cell_x & 1)
+            if inside and delta_x ** 2 + delta_y ** 2 <= radius ** 2:
+                visible.add((cell_x, cell_y))
+
+            if blocked:
+                if is_wall:
+                    new_start = right_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif is_wall and distance < radius:
+                blocked = True
+                cast_light(
+                    fov_cache, origin_x, origin_y, distance + 1,
+                    start, left_slope, xx, xy, yx, yy, visible
+                )
+                new_start = right_slope
+        if blocked:
+            break
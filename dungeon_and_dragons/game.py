@@ -0,0 +1,433 @@
+"""Sets up a game and runs its main loop"""
+import sys
+import time
+from array import array
+from typing import (
+    List,
+    Dict
+)
+from dungeon_and_dragons.helper.types import (
+    GameMap,
+    Coordinate,
+    Terrain
+)
+from dungeon_and_dragons.cells import (
+    cell_of,
+    cells_of,
+    coords_of,
+    make_grid,
+    make_occupancy
+)
+from dungeon_and_dragons.database import make_initial_database
+from dungeon_and_dragons.engine import (
+    MIN_BATCH_SIZE,
+    calculate_new_position,
+    check_win_lose,
+    dragon_moves,
+    get_dragon_kernel,
+    is_dragonsmellrange
+)
+from dungeon_and_dragons.fov import (
+    field_of_view,
+    make_fov_cache
+)
+from dungeon_and_dragons.history import (
+    make_history,
+    player_positions,
+    push_turn,
+    rewind
+)
+from dungeon_and_dragons.maps import (
+    dragon_room,
+    make_terrain,
+    place_dungeon_door
+)
+from dungeon_and_dragons.scent import (
+    TRAIL_LENGTH,
+    follow_trail,
+    leave_scent,
+    make_trail,
+    split_targets,
+    trail_from
+)
+from dungeon_and_dragons.pregen import (
+    start_pregeneration,
+    take_pregenerated
+)
+from dungeon_and_dragons.menus import (
+    calculate_dragonnum,
+    choose_mode,
+    get_col,
+    get_door,
+    get_dragon,
+    get_healthnum,
+    get_input,
+    get_row,
+    make_game_menu,
+    register_or_login
+)
+from dungeon_and_dragons.telemetry import (
+    finish_game_telemetry,
+    record_turn,
+    start_game_telemetry
+)
+from dungeon_and_dragons.render import (
+    clear_terminal,
+    compose_frame,
+    draw_canvas,
+    entity_overlay,
+    print_info
+)
+
+
+def main(
+    tick_rate: float = None,
+    memory_report: str = None,
+    memory_diff: tuple = None,
+    broadcast_name: str = None,
+    players: int = 1,
+    seed: int = None
+) -> None:
+    """The main function of the game that prepares and runs the game
+
+    Parameters
+    ----------
+    tick_rate: float : dragon moves per second in real-time mode, None
+    plays turn based
+
+    memory_report: str : file to write a per-turn memory profile to, None
+    doesn't profile
+
+    memory_diff: tuple : (N, M) turns whose allocations are compared in
+    the memory profile
+
+    broadcast_name: str : shared memory block the game is published to
+    for spectators, None doesn't publish
+
+    players: int : players taking turns on the same map, see
+    multiplayer.py
+
+    seed: int : seed of the level, see mapcache.py
+
+
+    Returns None
+    -------
+
+    """
+    memory_profile: Dict = None
+    if memory_report:
+        # traces every allocation from here on, see memprofile.py
+        from dungeon_and_dragons.memprofile import (
+            next_memory_turn,
+            start_memory_profile
+        )
+        memory_profile = start_memory_profile(memory_report, memory_diff)
+
+# =====================Game Settings=======================
+
+    # is used in menu and game to quit
+    QUIT_BUTTON: str = 'q'
+    # to back from instructions page to menu page
+    BACK_BUTTON: str = 'b'
+    # to show instructions page
+    HELP: str = 'help'
+    # how you will be shown on the map
+    PLAYER: str = '😎'
+    # How cells of the map are shown
+    MAP_TILES: str = '⬜'
+    # how walls of the map are shown
+    MAP_WALLS: str = '⬛'
+    # width and height of the map, except in test mode
+    MAP_SIZE: int = 17
+    # clears terminal before menu shows up
+    clear_terminal()
+    # if needed the first time the game runs
+    make_initial_database()
+    # enough dragons for any of the preset difficulties
+    next_level: Dict = start_pregeneration(
+        MAP_SIZE,
+        MAP_SIZE,
+        max(calculate_dragonnum(diff) for diff in ('1', '2', '3')),
+        MAP_TILES,
+        MAP_WALLS
+    )
+    # on this page user decides to register or login
+    user_name: str = register_or_login()
+    # the other players of a shared map log in one after the other
+    user_names: List[str] = [user_name]
+    while len(user_names) < players:
+        other_name: str = register_or_login()
+        if other_name not in user_names:
+            user_names.append(other_name)
+    # menu before starting the game
+    make_game_menu(PLAYER, HELP, QUIT_BUTTON, BACK_BUTTON, user_name)
+    difficulty: str = choose_mode()
+    # width of the map
+    ROW_LEN: int = get_row() if difficulty == '4' else MAP_SIZE
+    # height of the map
+    COLUMN_LEN: int = get_col() if difficulty == '4' else MAP_SIZE
+    # how dragon🐉 is shown on the map
+    DRAGON: str = get_dragon() if difficulty == '4' else '⬜'
+    # how dungeon door`🟥` is shown on the map
+    DUNGEON_DOOR: str = get_door() if difficulty == '4' else '⬜'
+    # number of dragons
+    DRAGON_NUM: int = calculate_dragonnum(
+        difficulty,
+        dragon_room(ROW_LEN, COLUMN_LEN, MAP_TILES, MAP_WALLS)
+        if difficulty == '4' else None
+    )
+    # the range which you get smelled by dragon
+    DRAGON_SMELLZONE: int = 5
+    # number of healths the player has
+    HEALTH_NUM: int = get_healthnum(difficulty)
+    # is dragon alerted by the player
+    VISIBLE_DRAGON: str = '🐉'
+    # the likely map was made while the menus were shown
+    level: Dict = None if seed is not None else take_pregenerated(
+        next_level, ROW_LEN, COLUMN_LEN, DRAGON_NUM, MAP_TILES, MAP_WALLS
+    )
+    if level is None:
+        # other sizes and seeded games go through the cache of levels
+        from dungeon_and_dragons.mapcache import load_level
+        level = load_level(
+            ROW_LEN,
+            COLUMN_LEN,
+            difficulty,
+            DRAGON_NUM,
+            MAP_TILES,
+            MAP_WALLS,
+            seed
+        )
+    # walls and tiles of the game, the door is added below
+    game_map: GameMap = level['game_map']
+    # walls as one int per row, used to check moves
+    WALL_BOARD: Dict = level['wall_board']
+    # what the player can see and be smelled from, walls block both
+    fov_cache: Dict = make_fov_cache(WALL_BOARD, max(DRAGON_SMELLZONE, 3))
+    player_info: Coordinate = level['player_info']
+    # (x , y) coordinate of the dungeon door
+    DUNGEON_DOOR_POS: Coordinate = level['dungeon_door_pos']
+    # place the dungeon door on map
+    place_dungeon_door(game_map, DUNGEON_DOOR, DUNGEON_DOOR_POS)
+    # the map never changes from here on, the player and the dragons are
+    # put over it when a frame is drawn
+    TERRAIN: Terrain = make_terrain(game_map)
+    UP: str = 'up'
+    DOWN: str = 'down'
+    LEFT: str = 'left'
+    RIGHT: str = 'right'
+    VALID_INPUTS: tuple[str] = (UP, DOWN, RIGHT, LEFT, QUIT_BUTTON)
+    # takes back the last move, only in the turn based mode
+    UNDO: str = 'undo'
+    # is used to move the player based on inputs
+    MOVEMENTS: Dict[str, Coordinate] = {
+        UP: (0, -1),
+        DOWN: (0, 1),
+        RIGHT: (1, 0),
+        LEFT: (-1, 0)
+    }
+    hearts: List[str] = ['💜' for _ in range(HEALTH_NUM)]
+    alt_movements: List[Coordinate] = list(MOVEMENTS.values())[:]
+    # the walls as one byte per cell, the engine works on its flat cells
+    GRID: Dict = make_grid(WALL_BOARD, alt_movements)
+    # NumPy is only loaded if enough dragons can be alerted at once
+    kernel = get_dragon_kernel() if DRAGON_NUM >= MIN_BATCH_SIZE else None
+    # walls as an array for the NumPy engine
+    WALL_MASK = kernel.make_wall_mask(GRID) if kernel else None
+    # cell of every dragon, changed in place by dragon_moves
+    dragon_cells: array = cells_of(GRID, level['dragons_pos'])
+    # dragon on every cell, kept up to date by dragon_moves
+    occupancy: array = make_occupancy(GRID, dragon_cells)
+    # the cells the player walked through, dragons on it follow it
+    trail: Dict = make_trail()
+    leave_scent(trail, cell_of(GRID, player_info))
+    # indices in dragon_cells of the dragons that smell the player
+    alerted_dragons: array = array('i')
+    # what changed every turn, to undo moves
+    history: Dict = make_history(player_info, dragon_cells, HEALTH_NUM)
+    # recorded with the telemetry of the game
+    settings: Dict = {
+        'difficulty': difficulty,
+        'width': ROW_LEN,
+        'height': COLUMN_LEN,
+        'dragons': DRAGON_NUM,
+        'health': HEALTH_NUM,
+        'tick_rate': tick_rate,
+    }
+
+    # read by the spectate command from other processes
+    broadcast: Dict = None
+    if broadcast_name:
+        from dungeon_and_dragons.spectate import (
+            publish,
+            start_broadcast
+        )
+        broadcast = start_broadcast(
+            broadcast_name, ROW_LEN, COLUMN_LEN, user_name
+        )
+
+    if players > 1:
+        # every player gets their own telemetry, see multiplayer.py
+        from dungeon_and_dragons.multiplayer import (
+            make_players,
+            play_multiplayer
+        )
+        play_multiplayer({
+            'terrain': TERRAIN,
+            'dragon': DRAGON,
+            'visible_dragon': VISIBLE_DRAGON,
+            'grid': GRID,
+            'occupancy': occupancy,
+            'wall_mask': WALL_MASK,
+            'quit_button': QUIT_BUTTON,
+            'valid_inputs': VALID_INPUTS,
+            'movements': MOVEMENTS,
+            'smell_zone': DRAGON_SMELLZONE,
+            'fov_cache': fov_cache,
+            'dungeon_door_pos': DUNGEON_DOOR_POS,
+            'dragon_cells': dragon_cells,
+            'players': make_players(
+                user_names, player_info, HEALTH_NUM, settings
+            ),
+            'broadcast': broadcast,
+        })
+        clear_terminal()
+        return
+
+    # written to telemetry.ndjson when the game ends
+    telemetry: Dict = start_game_telemetry(settings)
+
+    if tick_rate:
+        # dragons move on their own clock, see realtime.py
+        from dungeon_and_dragons.realtime import play_realtime
+        play_realtime(tick_rate, {
+            'terrain': TERRAIN,
+            'player': PLAYER,
+            'dragon': DRAGON,
+            'visible_dragon': VISIBLE_DRAGON,
+            'grid': GRID,
+            'occupancy': occupancy,
+            'wall_mask': WALL_MASK,
+            'quit_button': QUIT_BUTTON,
+            'valid_inputs': VALID_INPUTS,
+            'movements': MOVEMENTS,
+            'smell_zone': DRAGON_SMELLZONE,
+            'fov_cache': fov_cache,
+            'trail': trail,
+            'dungeon_door_pos': DUNGEON_DOOR_POS,
+            'user_name': user_name,
+            'player_info': player_info,
+            'dragon_cells': dragon_cells,
+            'alerted_dragons': alerted_dragons,
+            'hearts': hearts,
+            'telemetry': telemetry,
+            'broadcast': broadcast,
+        })
+        return
+
+# ==================Main loop of the game====================
+
+    # main loop of the game
+    while True:
+        # coords are only made for drawing, the engine uses the cells
+        dragons_pos: List[Coordinate] = coords_of(GRID, dragon_cells)
+        frame: GameMap = compose_frame(TERRAIN, entity_overlay(
+            player_info,
+            PLAYER,
+            dragons_pos,
+            DRAGON,
+            VISIBLE_DRAGON,
+            field_of_view(fov_cache, player_info)
+        ))
+        if broadcast is not None:
+            publish(broadcast, frame, player_info, dragons_pos, hearts)
+        draw_canvas(frame)
+        print_info(QUIT_BUTTON, MOVEMENTS, hearts, alerted_dragons, UNDO)
+        try:
+            player_moves: List[str] = get_input((*VALID_INPUTS, UNDO))
+        except EOFError:
+            # stdin is closed, e.g. the piped move script has ended
+            player_moves = [QUIT_BUTTON]
+        clear_terminal()
+
+        # every step is played but only the last frame is rendered
+        for player_input in player_moves:
+            if player_input == QUIT_BUTTON:
+                finish_game_telemetry(telemetry, 'quit', 'quit')
+                clear_terminal()
+                sys.exit()
+
+            if player_input == UNDO:
+                if not history['turn']:
+                    continue
+                player_info, dragon_cells, health = rewind(
+                    history, history['turn'] - 1
+                )
+                occupancy: array = make_occupancy(GRID, dragon_cells)
+                trail: Dict = trail_from(
+                    cell_of(GRID, position)
+                    for position in player_positions(history, TRAIL_LENGTH)
+                )
+                hearts: List[str] = ['💜' for _ in range(health)]
+                alerted_dragons: array = array('i')
+                continue
+
+            if memory_profile is not None:
+                next_memory_turn(memory_profile)
+            turn_start: float = time.perf_counter()
+            player_info: Coordinate = calculate_new_position(
+                GRID,
+                player_input,
+                MOVEMENTS,
+                player_info
+            )
+
+            player_cell: int = cell_of(GRID, player_info)
+            leave_scent(trail, player_cell)
+
+            visible_cells = field_of_view(fov_cache, player_info)
+            # dragons that smell the player head straight for them
+            targets: Dict[int, int] = dict.fromkeys(is_dragonsmellrange(
+                GRID,
+                occupancy,
+                player_info,
+                DRAGON_SMELLZONE,
+                visible_cells
+            ), player_cell)
+            # the others that came across the trail follow it
+            follow_trail(GRID, trail, occupancy, player_cell, targets)
+            alerted_dragons, dragon_targets = split_targets(targets)
+
+            if alerted_dragons:
+                dragon_moves(
+                    GRID,
+                    alerted_dragons,
+                    dragon_cells,
+                    occupancy,
+                    None,
+                    WALL_MASK,
+                    dragon_targets
+                )
+
+            record_turn(
+                telemetry,
+                time.perf_counter() - turn_start,
+                bool(alerted_dragons)
+            )
+            # exits the game on a win or loss, so the rest is skipped
+            check_win_lose(
+                GRID,
+                player_info,
+                occupancy,
+                DUNGEON_DOOR_POS,
+                hearts,
+                user_name,
+                telemetry
+            )
+            # the dragons keep their index, only the alerted ones can move
+            moved_dragons = [
+                (dragon, dragon_cells[dragon]) for dragon in alerted_dragons
+            ]
+            push_turn(
+                history, player_info, moved_dragons, dragon_cells, len(hearts)
+            )
@@ -0,0 +1,46 @@
+"""Helpers for the files the game rewrites, shared by the stores"""
+import os
+from contextlib import contextmanager
+from typing import Iterator
+
+
+def file_mode(path: str) -> int:
+    """Finds the permissions a rewritten file should keep
+
+    Parameters
+    ----------
+    path: str : path of the file
+
+
+    Returns the mode of the file, or the default one if it doesn't exist
+    -------
+
+    """
+    try:
+        return os.stat(path).st_mode & 0o777
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+@contextmanager
+def locked(path: str) -> Iterator[None]:
+    """Holds an exclusive lock while the block runs, so processes that
+    share a file take turns to change it
+
+    Parameters
+    ----------
+    path: str : the lock file, created if it doesn't exist and left in
+    place, closing it releases the lock
+
+
+    Returns context manager
+    -------
+
+    """
+    import fcntl
+
+    with open(path, 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
@@ -0,0 +1,10 @@
+from typing import (
+    List,
+    NewType,
+    Tuple
+)
+
+GameMap = NewType('GameMap', List[List[str]])
+# the map without entities, it never changes during a game
+Terrain = NewType('Terrain', Tuple[Tuple[str, ...], ...])
+Coordinate = NewType("Coordinate", tuple[int, int])
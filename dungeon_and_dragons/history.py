@@ -0,0 +1,143 @@
+"""Turn history for undoing moves
+
+Only what changed is stored for each turn: the player's new position, the
+dragons that were alerted with the cells they went to, and the number of
+hearts. Every KEYFRAME_EVERY turns the positions of all entities are
+stored as a keyframe, so rewinding replays at most KEYFRAME_EVERY turns.
+The map is never copied, the dragons of a keyframe are a compact copy of
+their array of cells and memory grows with the number of moves rather
+than with the map size.
+"""
+from array import array
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+from dungeon_and_dragons.helper.types import Coordinate
+
+# turns between two keyframes
+KEYFRAME_EVERY: int = 32
+
+
+def make_history(
+    player_info: Coordinate,
+    dragon_cells: array,
+    health: int
+) -> Dict:
+    """Creates the history of a game, starting with its first turn
+
+    Parameters
+    ----------
+    player_info: tuple : player's coords on the map
+
+    dragon_cells: array : cells of the dragons, see cells.py
+
+    health: int : number of hearts the player has
+
+
+    Returns the history dict
+    -------
+
+    """
+    return {
+        'turn': 0,
+        'deltas': list(),
+        'keyframes': {0: (player_info, array('i', dragon_cells), health)},
+    }
+
+
+def push_turn(
+    history: Dict,
+    player_info: Coordinate,
+    moved_dragons: List[Tuple[int, int]],
+    dragon_cells: array,
+    health: int
+) -> None:
+    """Stores the changes of a turn that has been played
+
+    Parameters
+    ----------
+    history: dict : see make_history
+
+    player_info: tuple : player's coords after the turn
+
+    moved_dragons: list : (index in dragon_cells, new cell) of the alerted
+    dragons
+
+    dragon_cells: array : cells of the dragons after the turn, for
+    keyframes
+
+    health: int : number of hearts after the turn
+
+
+    Returns None
+    -------
+
+    """
+    history['deltas'].append((player_info, tuple(moved_dragons), health))
+    history['turn'] += 1
+    if not history['turn'] % KEYFRAME_EVERY:
+        history['keyframes'][history['turn']] = (
+            player_info, array('i', dragon_cells), health
+        )
+
+
+def rewind(
+    history: Dict,
+    turn: int
+) -> Tuple[Coordinate, array, int]:
+    """Goes back to an earlier turn and forgets the turns after it
+
+    Parameters
+    ----------
+    history: dict : see make_history
+
+    turn: int : the turn to go back to, 0 is the start of the game
+
+
+    Returns player's coords, dragon cells and number of hearts at turn
+    -------
+
+    """
+    if not 0 <= turn <= history['turn']:
+        raise ValueError(f"turn {turn} is not in the history")
+
+    keyframe = turn - turn % KEYFRAME_EVERY
+    player_info, dragons, health = history['keyframes'][keyframe]
+    dragon_cells = array('i', dragons)
+    for player_info, moved_dragons, health in (
+        history['deltas'][keyframe:turn]
+    ):
+        for dragon, new_cell in moved_dragons:
+            dragon_cells[dragon] = new_cell
+
+    del history['deltas'][turn:]
+    for later in [key for key in history['keyframes'] if key > turn]:
+        del history['keyframes'][later]
+    history['turn'] = turn
+
+    return player_info, dragon_cells, health
+
+
+def player_positions(history: Dict, count: int) -> List[Coordinate]:
+    """Finds where the player was in the last turns, e.g. to lay the scent
+    trail again after a rewind
+
+    Parameters
+    ----------
+    history: dict : see make_history
+
+    count: int : number of turns
+
+
+    Returns list of the player's coords, oldest first
+    -------
+
+    """
+    positions = [delta[0] for delta in history['deltas'][-count:]]
+    if len(positions) < count:
+        # the start of the game is in the first keyframe only
+        positions.insert(0, history['keyframes'][0][0])
+
+    return positions
@@ -0,0 +1,107 @@
+"""The leaderboard and profile pages, tabulate is only imported when shown
+
+Both pages show the rollups kept with the players, see rollups.py, the
+game history is never read to build them.
+"""
+from tabulate import tabulate
+from dungeon_and_dragons.rollups import (
+    RECENT_GAMES,
+    make_rollups,
+    today
+)
+from dungeon_and_dragons.shards import (
+    get_player,
+    iter_leaderboard
+)
+
+
+def show_leaderboard() -> None:
+    """Prints a table in the terminal containing the game's leaderboard"""
+    day = today()
+    recent = f"Last {RECENT_GAMES}"
+    players_stats = list()
+    # the shards come merged in leaderboard order, lowest win ratio first
+    for name, stats in iter_leaderboard():
+        rollups = stats.get('rollups') or make_rollups()
+        today_stats = rollups['daily'].get(day, dict())
+        players_stats.append({
+            'Name': name,
+            'Games won': stats['games won'],
+            'Games lost': stats['games lost'],
+            'Win ratio': stats['win ratio'],
+            'Streak': rollups['streak'],
+            'Avg turns': rollups['average turns'],
+            recent: rollups['recent win rate'],
+            'Won today': today_stats.get('games won', 0),
+        })
+
+    sorted_players = [
+        {
+            stat: (
+                f"{value:.2f} %" if stat in ('Win ratio', recent)
+                else f"{value:.1f}" if stat == 'Avg turns' else value
+            ) for stat, value in player.items()
+        } for player in players_stats
+    ]
+
+    if not len(sorted_players):
+        print("No registered users yet")
+    else:
+        headers = list(sorted_players[0].keys())
+        rows = [player.values() for player in sorted_players]
+        print(tabulate(rows, headers, tablefmt='grid'))
+    print('\n\nPress RETURN to go back.')
+    input()
+
+    return None
+
+
+def show_profile(user_name: str) -> None:
+    """Prints the stats of a player and their games of the last days
+
+    Parameters
+    ----------
+    user_name: str : username of the player
+
+
+    Returns None
+    -------
+
+    """
+    stats = get_player(user_name)
+    rollups = stats.get('rollups') or make_rollups()
+    streak = rollups['streak']
+    print(f"Stats of {user_name}\n")
+    print(tabulate(
+        [
+            ('Games won', stats['games won']),
+            ('Games lost', stats['games lost']),
+            ('Win ratio', f"{stats['win ratio']:.2f} %"),
+            (
+                'Current streak',
+                f"{abs(streak)} {'won' if streak >= 0 else 'lost'}"
+            ),
+            ('Best win streak', rollups['best streak']),
+            ('Average turns', f"{rollups['average turns']:.1f}"),
+            (
+                f"Win rate of the last {RECENT_GAMES}",
+                f"{rollups['recent win rate']:.2f} %"
+            ),
+            ('Last games', rollups['recent'] or '-'),
+        ],
+        tablefmt='grid'
+    ))
+    if rollups['daily']:
+        print()
+        print(tabulate(
+            [
+                (day, games['games won'], games['games lost'])
+                for day, games in reversed(rollups['daily'].items())
+            ],
+            ('Day', 'Games won', 'Games lost'),
+            tablefmt='grid'
+        ))
+    print('\n\nPress RETURN to go back.')
+    input()
+
+    return None
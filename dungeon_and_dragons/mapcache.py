@@ -0,0 +1,247 @@
+"""On-disk cache of generated levels
+
+A level is stored under the sha256 of (width, height, difficulty,
+generator, seed), so the same configuration always finds the same file
+and nothing else has to be looked up. Files are compact binary: a small
+header, the walls as packed bits and the coords of the player, the door
+and the dragons. Reading a level touches its file, and when the cache
+grows past MAX_BYTES the files that were used longest ago are removed.
+
+Games without a seed get a new random level every time, so they skip the
+cache.
+"""
+import os
+import struct
+import hashlib
+import tempfile
+from typing import Dict
+from dungeon_and_dragons.bitboard import make_bitboard
+from dungeon_and_dragons.helper.files import file_mode
+from dungeon_and_dragons.maps import generate_level
+
+CACHE_DIR: str = 'map_cache'
+# size of all cached levels at which the least recently used are removed
+MAX_BYTES: int = 8 * 1024 * 1024
+# name and version of create_map and the placement rules, change it when
+# they change so old levels aren't used
+GENERATOR: str = 'plus-v2'
+# changed with the header, so levels of the old format aren't read
+MAGIC: bytes = b'DND2'
+# magic, width, height, dragons, player x and y, door x and y, 32 bits
+# each, so test mode maps wider or taller than 65535 are stored too
+HEADER = struct.Struct('<4sIIIIIII')
+CELL = struct.Struct('<II')
+
+
+def level_path(
+    width: int,
+    height: int,
+    difficulty: str,
+    seed: int
+) -> str:
+    """Finds the file of a level in the cache
+
+    Parameters
+    ----------
+    width: int : width of the map
+
+    height: int : height of the map
+
+    difficulty: str : the mode the level is played in
+
+    seed: int : seed of the level
+
+
+    Returns path of the file, which may not exist
+    -------
+
+    """
+    key = repr((width, height, difficulty, GENERATOR, seed)).encode()
+    return os.path.join(CACHE_DIR, hashlib.sha256(key).hexdigest())
+
+
+def pack_level(level: Dict) -> bytes:
+    """Encodes a level in the binary format of the cache
+
+    Parameters
+    ----------
+    level: dict : see maps.generate_level
+
+
+    Returns the encoded level
+    -------
+
+    """
+    walls = level['wall_board']
+    width, height = walls['width'], walls['height']
+    row_bytes = (width + 7) // 8
+    parts = [HEADER.pack(
+        MAGIC, width, height, len(level['dragons_pos']),
+        *level['player_info'], *level['dungeon_door_pos']
+    )]
+    parts += [row.to_bytes(row_bytes, 'little') for row in walls['rows']]
+    parts += [CELL.pack(*dragon_pos) for dragon_pos in level['dragons_pos']]
+
+    return b''.join(parts)
+
+
+def unpack_level(data: bytes, map_tiles: str, map_walls: str) -> Dict:
+    """Decodes a level from the binary format of the cache
+
+    Parameters
+    ----------
+    data: bytes : the encoded level
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+
+    Returns the level dict, like maps.generate_level
+    -------
+
+    """
+    magic, width, height, dragon_num, *cells = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError('not a cached level')
+    row_bytes = (width + 7) // 8
+    if len(data) != HEADER.size + height * row_bytes + dragon_num * CELL.size:
+        raise ValueError('cached level is cut off or too long')
+    wall_board = make_bitboard(width, height)
+    offset = HEADER.size
+    for y in range(height):
+        wall_board['rows'][y] = int.from_bytes(
+            data[offset:offset + row_bytes], 'little'
+        )
+        offset += row_bytes
+    dragons_pos = [
+        CELL.unpack_from(data, offset + number * CELL.size)
+        for number in range(dragon_num)
+    ]
+    game_map = [
+        [map_walls if row >> x & 1 else map_tiles for x in range(width)]
+        for row in wall_board['rows']
+    ]
+
+    return {
+        'game_map': game_map,
+        'wall_board': wall_board,
+        'player_info': tuple(cells[:2]),
+        'dungeon_door_pos': tuple(cells[2:]),
+        'dragons_pos': dragons_pos,
+    }
+
+
+def load_level(
+    width: int,
+    height: int,
+    difficulty: str,
+    dragon_num: int,
+    map_tiles: str,
+    map_walls: str,
+    seed: int = None
+) -> Dict:
+    """Reads a seeded level from the cache, generating and storing it on a
+    miss
+
+    Parameters
+    ----------
+    width: int : width of the map
+
+    height: int : height of the map
+
+    difficulty: str : the mode the level is played in
+
+    dragon_num: int : the number of dragons on the map
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+    seed: int : seed of the level, a random level that isn't cached if
+    None
+
+
+    Returns the level dict, like maps.generate_level
+    -------
+
+    """
+    if seed is None:
+        return generate_level(
+            width, height, dragon_num, map_tiles, map_walls
+        )
+    path = level_path(width, height, difficulty, seed)
+    try:
+        with open(path, 'rb') as level_file:
+            level = unpack_level(level_file.read(), map_tiles, map_walls)
+        # test mode can ask for more dragons with the same difficulty
+        if len(level['dragons_pos']) >= dragon_num:
+            # the mtime is what eviction goes by
+            os.utime(path)
+            # the first dragons are the ones fewer dragons would have
+            del level['dragons_pos'][dragon_num:]
+            return level
+    except (OSError, ValueError, struct.error):
+        pass
+
+    level = generate_level(
+        width, height, dragon_num, map_tiles, map_walls, seed
+    )
+    store_level(path, level)
+
+    return level
+
+
+def store_level(path: str, level: Dict) -> None:
+    """Writes a level to the cache and evicts the oldest levels if full
+
+    Parameters
+    ----------
+    path: str : file of the level, see level_path
+
+    level: dict : see maps.generate_level
+
+
+    Returns None
+    -------
+
+    """
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # written next to its final name, so readers never see half a level
+    with tempfile.NamedTemporaryFile(
+        'wb', dir=CACHE_DIR, suffix='.tmp', delete=False
+    ) as level_file:
+        level_file.write(pack_level(level))
+    os.chmod(level_file.name, file_mode(path))
+    os.replace(level_file.name, path)
+    evict(MAX_BYTES)
+
+
+def evict(max_bytes: int) -> None:
+    """Removes the least recently used levels until the cache fits
+
+    Parameters
+    ----------
+    max_bytes: int : size the cache may take
+
+
+    Returns None
+    -------
+
+    """
+    entries = list()
+    with os.scandir(CACHE_DIR) as files:
+        for entry in files:
+            if entry.is_file() and not entry.name.endswith('.tmp'):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            # another game evicted it first
+            pass
+        total -= size
@@ -0,0 +1,311 @@
+"""Creating the map and placing the dungeon door and the dragons on it"""
+from random import Random
+from typing import (
+    List,
+    Dict,
+    Tuple
+)
+from dungeon_and_dragons.bitboard import (
+    bitboard_from_cells,
+    bitboard_from_map,
+    free_rows,
+    random_free_cell,
+    set_cell
+)
+from dungeon_and_dragons.regions import (
+    make_region_index,
+    nearest_open_cell,
+    unreachable_board
+)
+from dungeon_and_dragons.helper.types import (
+    GameMap,
+    Coordinate,
+    Terrain
+)
+
+
+def create_map(
+    row_len: int,
+    column_len: int,
+    map_tiles: str,
+    map_walls: str
+) -> GameMap:
+    """Create the initial map of the game
+
+    Parameters
+    ----------
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+
+    Returns game_map
+    -------
+
+    """
+    # Game map, every row is a list so walls can be drawn over it
+    game_map = [[map_walls] * row_len if y == 0 or y == (column_len - 1)
+                else [map_walls if x == 0 or x == (row_len - 1)
+                else map_tiles for x in range(row_len)]
+                for y in range(column_len)]
+
+    # The plus like in middle of the map, made with walls
+    for x in range(3, row_len - 3):
+        game_map[column_len // 2][x] = map_walls
+
+    for y in range(3, column_len - 3):
+        game_map[y][(row_len - 1) // 2] = map_walls
+
+    return game_map
+
+
+def dragon_area(row_len: int, column_len: int) -> Tuple[int, int, int, int]:
+    """The part of the map dragons are placed in, away from the start
+
+    Parameters
+    ----------
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+
+    Returns left, top, right and bottom of the part, bounds included
+    -------
+
+    """
+    return 2, 2, row_len - 2, column_len - (column_len // 3)
+
+
+def dragon_room(
+    row_len: int,
+    column_len: int,
+    map_tiles: str,
+    map_walls: str
+) -> int:
+    """Counts how many dragons always fit on a map of this size
+
+    The plus never cuts a part of the map off, so every open cell of the
+    dragon area can take a dragon, except for the one the door may be on
+
+    Parameters
+    ----------
+    row_len: int : width of the map, at least 3
+
+    column_len: int : height of the map, at least 3
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+
+    Returns the largest number of dragons
+    -------
+
+    """
+    wall_board = bitboard_from_map(
+        create_map(row_len, column_len, map_tiles, map_walls), map_walls
+    )
+    free = sum(
+        bits.bit_count() for _, bits in free_rows(
+            [wall_board], *dragon_area(row_len, column_len)
+        )
+    )
+    return max(free - 1, 0)
+
+
+def generate_level(
+    row_len: int,
+    column_len: int,
+    dragon_num: int,
+    map_tiles: str,
+    map_walls: str,
+    seed: int = None
+) -> Dict:
+    """Creates a map and chooses where the player, door and dragons start
+
+    Only walls and tiles are drawn on the map, so a level can be made
+    before the door and dragon emojis are known. The same seed always
+    gives the same level, and the first dragons of a level with more
+    dragons are the ones a level with fewer would have
+
+    Parameters
+    ----------
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    dragon_num: int : the number of dragons on the map
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+    seed: int : seed of the placement, random if None
+
+
+    Returns dict with the game_map, its wall_board, player_info,
+    dungeon_door_pos and dragons_pos
+    -------
+
+    """
+    game_map = create_map(row_len, column_len, map_tiles, map_walls)
+    # walls as one int per row, used to check moves and to place things
+    wall_board = bitboard_from_map(game_map, map_walls)
+    # connected parts of the map, to only place things the player can reach
+    regions = make_region_index(wall_board)
+    # the start is moved off the walls some custom map sizes put there
+    player_info = nearest_open_cell(regions, (row_len // 2, column_len - 2))
+    # walls and the cells that can't be walked to from the start
+    blocked_board = unreachable_board(regions, player_info)
+    rng = Random(seed) if seed is not None else None
+    dungeon_door_pos = get_dungeon_door_pos(
+        blocked_board, row_len, column_len, rng
+    )
+    dragons_pos = get_dragon_pos(
+        blocked_board, row_len, column_len, dungeon_door_pos, dragon_num, rng
+    )
+
+    return {
+        'game_map': game_map,
+        'wall_board': wall_board,
+        'player_info': player_info,
+        'dungeon_door_pos': dungeon_door_pos,
+        'dragons_pos': dragons_pos,
+    }
+
+
+def get_dungeon_door_pos(
+    blocked_board: Dict,
+    row_len: int,
+    column_len: int,
+    rng: Random = None
+) -> Coordinate:
+    """Chooses where dungeon door position will be in map randomly
+
+    Parameters
+    ----------
+    blocked_board: dict : bitboard of the cells the door can't be on, the
+    walls and whatever the player can't reach, see regions.py
+
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    rng: Random : seeded generator, the random module if None
+
+
+    Returns dungeon's door coordinates
+    -------
+
+    """
+    try:
+        # any free cell that isn't in the bottom third of the map
+        return random_free_cell(
+            [blocked_board],
+            1,
+            1,
+            row_len - 2,
+            column_len - (column_len // 3 + 2),
+            rng
+        )
+    except ValueError:
+        # the player can't reach the top of the map, put the door
+        # anywhere they can reach instead of making a new map
+        return random_free_cell(
+            [blocked_board], 1, 1, row_len - 2, column_len - 2, rng
+        )
+
+
+def place_dungeon_door(
+    game_map: GameMap,
+    dungeon_door: str,
+    dungeon_door_pos: Coordinate,
+) -> GameMap:
+    """Place the Dungeon Door on the map
+
+    Parameters
+    ----------
+    game_map: list : map of the game
+
+    dungeon_door: str : how dungeon's exit door is displayed
+
+    dungeon_door_pos: tuple : coords of the dungeon door on the map
+
+
+    Returns game_map
+    -------
+
+    """
+    dungeon_door_x, dungeon_door_y = dungeon_door_pos
+    game_map[dungeon_door_y][dungeon_door_x] = dungeon_door
+
+    return game_map
+
+
+def get_dragon_pos(
+    blocked_board: Dict,
+    row_len: int,
+    column_len: int,
+    dungeon_door_pos: Coordinate,
+    dragon_num: int,
+    rng: Random = None
+) -> List[Coordinate]:
+    """Chooses where dragons position will be in map randomly
+
+    Parameters
+    ----------
+    blocked_board: dict : bitboard of the cells dragons can't be on, the
+    walls and whatever the player can't reach, see regions.py
+
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    dungeon_door_pos: tuple : the coords of the dungeon door
+
+    dragon_num: int : the number of dragons on the map
+
+    rng: Random : seeded generator, the random module if None
+
+
+    Returns list of dragon coords on the map
+    -------
+
+    """
+    # the door and the dragons already placed are taken too
+    taken_board = bitboard_from_cells(
+        [dungeon_door_pos], row_len, column_len
+    )
+    dragonpos_list = list()
+    for _ in range(dragon_num):
+        dragon_pos = random_free_cell(
+            [blocked_board, taken_board],
+            *dragon_area(row_len, column_len),
+            rng
+        )
+        set_cell(taken_board, dragon_pos)
+        dragonpos_list.append(dragon_pos)
+
+    return dragonpos_list
+
+
+def make_terrain(game_map: GameMap) -> Terrain:
+    """Freezes a map of walls, tiles and the door into the terrain layer
+
+    The terrain never changes during a game, the player and the dragons
+    are only put over it when a frame is drawn, see render.compose_frame
+
+    Parameters
+    ----------
+    game_map: list : map of the game without the player and dragons
+
+
+    Returns the terrain, a tuple of rows of glyphs
+    -------
+
+    """
+    return tuple(tuple(row) for row in game_map)
@@ -0,0 +1,254 @@
+"""Opt-in memory profiling of the game loop with tracemalloc
+
+Every allocation is tagged with the subsystem of the innermost frame of
+the package that made it, so json.load called from database.py counts as
+storage. The game is split into periods: period 0 is the setup and the
+menus, period N runs from the start of turn N to the start of the next
+one, so it includes rendering the frame and reading the next input. For
+every period the peak and the retained bytes are reported. Snapshots are
+slow with deep tracebacks, so the retained bytes of each subsystem are
+only found every SNAPSHOT_EVERY turns, on the compared turns and at the
+end, and count from the previous snapshot. The snapshots of two turns are
+compared line by line to find what keeps growing in long sessions.
+
+Tracing slows the game down a lot, it is only turned on by
+play --memory-profile.
+"""
+import os
+import atexit
+import tracemalloc
+from typing import (
+    Dict,
+    List
+)
+
+# frames kept for each allocation, enough to get from json or re back to
+# the module of the package that called it
+FRAMES: int = 25
+# turns between the snapshots that split the retained bytes by subsystem
+SNAPSHOT_EVERY: int = 10
+# subsystems of the package by module, any other module counts as 'game'
+SUBSYSTEMS: Dict[str, str] = {
+    'maps.py': 'map',
+    'bitboard.py': 'map',
+    'regions.py': 'map',
+    'pregen.py': 'map',
+    'mapcache.py': 'map',
+    'engine.py': 'AI',
+    'fov.py': 'AI',
+    'cells.py': 'AI',
+    'scent.py': 'AI',
+    'nearest.py': 'AI',
+    'parallel_ai.py': 'AI',
+    'dragon_kernel.py': 'AI',
+    'render.py': 'render',
+    'menus.py': 'render',
+    'database.py': 'storage',
+    'leaderboard.py': 'storage',
+    'telemetry.py': 'storage',
+    'bulk.py': 'storage',
+    'shards.py': 'storage',
+    'rollups.py': 'storage',
+}
+COLUMNS: List[str] = ['map', 'AI', 'render', 'storage', 'game', 'other']
+# lines shown in the comparison of two snapshots
+TOP_LINES: int = 15
+
+PACKAGE_DIR: str = os.path.dirname(os.path.abspath(__file__))
+
+
+def start_memory_profile(report_path: str, diff_turns: tuple = None) -> Dict:
+    """Starts tracing allocations, the report is written when the game exits
+
+    Parameters
+    ----------
+    report_path: str : file the report is written to
+
+    diff_turns: tuple : (N, M) turns whose snapshots are compared, the
+    first and the last turn by default
+
+
+    Returns the profile dict
+    -------
+
+    """
+    tracemalloc.start(FRAMES)
+    profile = {
+        'report_path': report_path,
+        'diff_turns': diff_turns,
+        'turn': 0,
+        'start': 0,
+        'periods': list(),
+        'subsystems': dict.fromkeys(COLUMNS, 0),
+        'snapshots': dict(),
+    }
+    atexit.register(write_memory_report, profile)
+
+    return profile
+
+
+def next_memory_turn(profile: Dict) -> None:
+    """Closes the current period and starts the one of the next turn
+
+    Parameters
+    ----------
+    profile: dict : see start_memory_profile
+
+
+    Returns None
+    -------
+
+    """
+    close_period(profile)
+    profile['turn'] += 1
+    # the snapshot itself is allocated here, before the new period starts
+    tracemalloc.reset_peak()
+    profile['start'] = tracemalloc.get_traced_memory()[0]
+
+
+def close_period(profile: Dict, last: bool = False) -> None:
+    """Records the peak and retained bytes of the current period, split
+    by subsystem if a snapshot is taken
+
+    Parameters
+    ----------
+    profile: dict : see start_memory_profile
+
+    last: bool : whether the game is over
+
+
+    Returns None
+    -------
+
+    """
+    current, peak = tracemalloc.get_traced_memory()
+    period = {
+        'turn': profile['turn'],
+        'peak': peak - profile['start'],
+        'retained': current - profile['start'],
+        'subsystems': None,
+    }
+    profile['periods'].append(period)
+
+    turn = profile['turn']
+    wanted = profile['diff_turns'] or (1,)
+    if not (last or turn in wanted or turn % SNAPSHOT_EVERY == 0):
+        return
+    snapshot = tracemalloc.take_snapshot().filter_traces([
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, __file__),
+    ])
+    subsystems = subsystem_sizes(snapshot)
+    period['subsystems'] = {
+        name: size - profile['subsystems'][name]
+        for name, size in subsystems.items()
+    }
+    profile['subsystems'] = subsystems
+
+    # only the snapshots that may be compared are kept
+    snapshots = profile['snapshots']
+    if turn in wanted:
+        snapshots[turn] = snapshot
+    elif last and not profile['diff_turns'] and turn > 1:
+        snapshots['last'] = snapshot
+
+
+def subsystem_sizes(snapshot: tracemalloc.Snapshot) -> Dict[str, int]:
+    """Adds up the traced bytes of each subsystem
+
+    Parameters
+    ----------
+    snapshot: Snapshot : the traced allocations
+
+
+    Returns dict of subsystem to bytes, see COLUMNS
+    -------
+
+    """
+    sizes = dict.fromkeys(COLUMNS, 0)
+    for statistic in snapshot.statistics('traceback'):
+        sizes[subsystem_of(statistic.traceback)] += statistic.size
+
+    return sizes
+
+
+def subsystem_of(traceback: tracemalloc.Traceback) -> str:
+    """Finds the subsystem of the innermost frame of the package
+
+    Parameters
+    ----------
+    traceback: Traceback : frames of an allocation, oldest first
+
+
+    Returns name of the subsystem, 'other' if no frame is in the package
+    -------
+
+    """
+    for frame in reversed(traceback):
+        directory, module = os.path.split(frame.filename)
+        if directory.startswith(PACKAGE_DIR):
+            return SUBSYSTEMS.get(module, 'game')
+
+    return 'other'
+
+
+def write_memory_report(profile: Dict) -> None:
+    """Closes the last period and writes the report
+
+    Parameters
+    ----------
+    profile: dict : see start_memory_profile
+
+
+    Returns None
+    -------
+
+    """
+    # the last turn is cut short by sys.exit when the game ends
+    close_period(profile, last=True)
+    tracemalloc.stop()
+    with open(profile['report_path'], 'w') as report:
+        report.write('\n'.join(format_report(profile)) + '\n')
+
+
+def format_report(profile: Dict) -> List[str]:
+    """Formats the periods and the snapshot comparison of a profile
+
+    Parameters
+    ----------
+    profile: dict : see start_memory_profile
+
+
+    Returns the lines of the report
+    -------
+
+    """
+    lines = [
+        'bytes allocated per turn, turn 0 is the setup and the menus',
+        f'subsystems every {SNAPSHOT_EVERY} turns, since the row before',
+        '',
+        f"{'turn':>6}{'peak':>12}{'retained':>12}"
+        + ''.join(f"{name:>10}" for name in COLUMNS),
+    ]
+    for period in profile['periods']:
+        subsystems = period['subsystems'] or dict.fromkeys(COLUMNS, '')
+        lines.append(
+            f"{period['turn']:>6}{period['peak']:>12}{period['retained']:>12}"
+            + ''.join(f"{subsystems[name]:>10}" for name in COLUMNS)
+        )
+
+    snapshots = profile['snapshots']
+    first, last = profile['diff_turns'] or (1, 'last')
+    lines.append('')
+    if first not in snapshots or last not in snapshots:
+        lines.append(f"turns {first} and {last} weren't both played")
+        return lines
+
+    last_turn = profile['turn'] if last == 'last' else last
+    lines.append(f"top growth from turn {first} to turn {last_turn}")
+    lines.append('')
+    statistics = snapshots[last].compare_to(snapshots[first], 'lineno')
+    for statistic in statistics[:TOP_LINES]:
+        lines.append(str(statistic))
+
+    return lines
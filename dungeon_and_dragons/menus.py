@@ -0,0 +1,411 @@
+"""Menu pages and prompts shown before and during the game"""
+import os
+import sys
+import stat
+import time
+from typing import List
+from dungeon_and_dragons.database import (
+    login,
+    register
+)
+from dungeon_and_dragons.render import (
+    clear_terminal,
+    print_logo,
+    print_separator
+)
+
+# the valid string for the profile page
+PROFILE: str = 'stats'
+# the smallest width and height of a map in the test mode
+MIN_MAP_SIZE: int = 3
+# the most times one command of a chain like 'up*5' can be repeated
+MAX_REPEAT: int = 1000
+
+
+def register_or_login() -> str:
+    """A menu page which user decides to login or register in"""
+    clear_terminal()
+    while True:
+        user_name = None
+        print_logo()
+        print("Enter 'R' to register")
+        print_separator()
+        print("Press RETURN to login")
+        print_separator()
+        print("Enter 'L' to see the leaderboards")
+        print_separator()
+        print("Enter 'Q' to exit the game\n")
+        user_input = input().strip().lower()
+        clear_terminal()
+        if not user_input:
+            user_name = login()
+
+        if user_input == 'r':
+            user_name = register()
+
+        if user_input == 'l':
+            from dungeon_and_dragons.leaderboard import show_leaderboard
+            show_leaderboard()
+            clear_terminal()
+
+        if user_input == 'q':
+            clear_terminal()
+            sys.exit()
+
+        if not user_name:
+            continue
+
+        else:
+            break
+
+    return user_name
+
+
+def make_game_menu(
+    player: str,
+    help: str,
+    quit_button: str,
+    back_button: str,
+    user_name: str
+) -> None:
+    """Prepares the game before the main game loop
+
+    Parameters
+    ----------
+    player: str : how player is displayed
+
+    help: str : the valid string for help
+
+    quit_button: str : the valid string for quitting
+
+    back_button: str : the valid string for back
+
+    user_name: str : username of the player
+
+
+    Returns None
+    -------
+
+    """
+    while True:
+        print_logo()
+        print(f"Welcome {user_name}\n")
+        print('Press RETURN to start the game')
+        print(f"Enter '{help}' to see game instructions")
+        print(f"Enter '{PROFILE}' to see your stats")
+        print(f"Enter {quit_button} to quit the game.")
+        user_input = input().strip().lower()
+        clear_terminal()
+        # to quit the game
+        if user_input == quit_button:
+            sys.exit()
+        # to start the game
+        elif not user_input:
+            pass
+        # to show instructions page
+        elif user_input == help:
+            show_instructions(
+                player, help, quit_button, back_button, user_name
+            )
+        # to show the player's stats
+        elif user_input == PROFILE:
+            from dungeon_and_dragons.leaderboard import show_profile
+            show_profile(user_name)
+            clear_terminal()
+            continue
+        # invalid inputs
+        else:
+            continue
+
+        break
+
+
+def show_instructions(
+    player: str,
+    help: str,
+    quit_button: str,
+    back_button: str,
+    user_name: str
+) -> None:
+    """Shows the instructions of the game
+
+    Parameters
+    ----------
+    player: str : how player is displayed
+
+    help: str : valid input for help
+
+    quit_button: str : valid input for quit
+
+    back_button: str : valid input for back
+
+    user_name: str : player's username
+
+    Returns None
+    -------
+
+    """
+    while True:
+        print(
+            """
+*******************************************************
+Welcome to Dungeon & Dragons
+-------------------------------------------------------
+You  are   shown  on   the   map   with  the  sign  '{}'
+You can move by typing 'up', 'down', 'left' and 'right'
+The only escape route out of the dungeon is through the
+dungeon door which is not displayed on the map.
+But there are hidden dragons on the map & you will die
+if you collide with it.
+Dragons  smell  you  when you get close,  and a dragon
+that crosses your trail follows it until it fades.
+------------------------------------------------------
+Enter '{}' to go back to the menu ...
+*******************************************************
+            """.format(player, back_button)
+        )
+        # back to menu
+        if input() == back_button:
+            clear_terminal()
+            make_game_menu(player, help, quit_button, back_button, user_name)
+            break
+        # invalid input
+        else:
+            clear_terminal()
+            continue
+
+
+def choose_mode() -> str:
+    """Difficulty mode of the game is chosen"""
+    valid_inputs = ['1', '2', '3', '4']
+    while True:
+        print_logo()
+        print("Choose one of the following modes:")
+        print("1. Easy, 2. Normal, 3. Hard, 4. Test mode")
+        print('~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~')
+        user_input = input("Enter 1, 2, 3 or 4: ")
+        clear_terminal()
+
+        if user_input not in valid_inputs:
+            print('Not a valid input')
+            continue
+        break
+
+    return user_input
+
+
+def get_row() -> int:
+    """Asks the user for the width of the map"""
+    msg = "Width of the map: "
+    print_logo()
+    return get_intput(msg, MIN_MAP_SIZE)
+
+
+def get_col() -> int:
+    """Asks the user for the height of the map"""
+    msg = "Height of the map: "
+    return get_intput(msg, MIN_MAP_SIZE)
+
+
+def get_dragon() -> str:
+    """Asks the user for how dragons will be displayer"""
+    dragon = input("Enter how dragon will be displayed (only emoji 🐉): ")
+    return dragon
+
+
+def get_door() -> str:
+    """Asks the user for how dungeon door will be displayed"""
+    door = input("Enter how dungeon door will be displayed (only emoji 🟥): ")
+    return door
+
+
+def calculate_smellzone(diff: str) -> int:
+    """Calculates the size of the smellzone based on the difficulty
+
+    Parameters
+    ----------
+    diff: str : game's difficulty
+
+
+    Returns size of the smellzone
+    -------
+
+    """
+    msg = "Enter the distance that dragon smells the player: "
+    if diff == '1':
+        smellzone = 3
+    elif diff == '2':
+        smellzone = 5
+    elif diff == '3':
+        smellzone = 7
+    else:
+        smellzone = get_input(msg)
+
+    return smellzone
+
+
+def calculate_dragonnum(diff: str, max_dragons: int = None) -> int:
+    """Calculates the number of dragons based on difficulty
+
+    Parameters
+    ----------
+    diff: str : difficulty of the game
+
+    max_dragons: int : most dragons the map of the test mode has room
+    for, see maps.dragon_room
+
+
+    Returns number of dragons
+    -------
+
+    """
+    msg = "Enter the number of dragons on the map: "
+    if diff == '1':
+        dragon_num = 2
+    elif diff == '2':
+        dragon_num = 3
+    elif diff == '3':
+        dragon_num = 4
+    else:
+        dragon_num = get_intput(msg, 0, max_dragons)
+
+    return dragon_num
+
+
+def get_intput(msg: str, minimum: int = None, maximum: int = None) -> int:
+    """Asks for a integer input from the player
+
+    Parameters
+    ----------
+    msg: str : message printed on the terminal while asking for input
+
+    minimum: int : smallest valid input, no limit if None
+
+    maximum: int : largest valid input, no limit if None
+
+
+    Returns player's input
+    -------
+
+    """
+    while True:
+        try:
+            user_input = int(input(msg))
+        except ValueError:
+            print("Input must be integer!")
+            time.sleep(1)
+            continue
+        if minimum is not None and user_input < minimum:
+            print(f"Input must be at least {minimum}!")
+            time.sleep(1)
+            continue
+        if maximum is not None and user_input > maximum:
+            print(f"Input must be at most {maximum}!")
+            time.sleep(1)
+            continue
+        break
+    return user_input
+
+
+def get_healthnum(diff: str) -> int:
+    """Calculates the number of healths based on the difficulty
+
+    Parameters
+    ----------
+    diff:str : difficulty of the game
+
+
+    Returns health bar
+    -------
+
+    """
+    msg = "Enter number of healths the player has: "
+    if diff == '1':
+        health = 4
+    elif diff == '2':
+        health = 3
+    elif diff == '3':
+        health = 4
+    else:
+        health = get_intput(msg)
+
+    clear_terminal()
+    return health
+
+
+def get_input(valid_inputs: tuple[str]) -> List[str]:
+    """Get input from user and check if it is valid
+
+    A move script piped or redirected to stdin is read to its end and its
+    lines are chained like 'up*5 left*2', so the game only renders the
+    last frame, or the one it ends on. Other input that isn't a terminal,
+    e.g. the socket of a session, is read a line at a time, because it
+    only ends when the player leaves
+
+    Parameters
+    ----------
+    valid_inputs: tuple : a set of valid inputs
+
+
+    Returns the player's moves, empty if the input is not valid
+    -------
+
+    """
+    if sys.stdin.isatty():
+        return parse_moves(input('Move: '), valid_inputs)
+
+    player_input = sys.stdin.read() if is_move_script() else (
+        sys.stdin.readline()
+    )
+    if not player_input:
+        raise EOFError
+    # an invalid line of a script is skipped, not the whole script
+    return [
+        move
+        for line in player_input.splitlines()
+        for move in parse_moves(line, valid_inputs)
+    ]
+
+
+def is_move_script() -> bool:
+    """Checks if stdin is a pipe or a file, which end on their own
+
+    Returns whether stdin can be read to its end
+    -------
+
+    """
+    try:
+        mode = os.fstat(sys.stdin.fileno()).st_mode
+    except (OSError, ValueError):
+        return False
+    return stat.S_ISFIFO(mode) or stat.S_ISREG(mode)
+
+
+def parse_moves(player_input: str, valid_inputs: tuple[str]) -> List[str]:
+    """Expands a command sequence like 'up*5 left*2' into single moves
+
+    Parameters
+    ----------
+    player_input: str : moves separated by whitespace, each one may be
+    followed by '*' and the number of times it is repeated, up to
+    MAX_REPEAT
+
+    valid_inputs: tuple : a set of valid inputs
+
+
+    Returns list of moves, empty if any of the commands is not valid
+    -------
+
+    """
+    player_moves = list()
+    for command in player_input.strip().lower().split():
+        move, _, repeat = command.partition('*')
+        if move not in valid_inputs:
+            return list()
+        if not repeat:
+            repeat = '1'
+        if not repeat.isdecimal() or int(repeat) > MAX_REPEAT:
+            return list()
+        player_moves.extend([move] * int(repeat))
+
+    return player_moves
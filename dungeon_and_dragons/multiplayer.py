@@ -0,0 +1,335 @@
+"""Shared-map mode, several players take turns on the same map
+
+Every round each player still in the game makes one move, then the
+dragons move once. A chain like 'up*3' is played one move a round, over
+the next turns of the player who entered it. A dragon is alerted by the
+players that can smell it and see it, and chases the nearest of them; the
+players are found with the bucket index of dungeon_and_dragons.nearest,
+which is updated as they move. Every player also leaves their own scent
+trail, see scent.py, and the dragons that aren't chasing anyone follow
+the trails they come across. Each player wins or loses on their own, and
+the results of all of them are written to the database in one go when
+the last one is out.
+"""
+import sys
+import time
+from typing import (
+    Dict,
+    List
+)
+from dungeon_and_dragons.cells import (
+    cell_of,
+    coords_of
+)
+from dungeon_and_dragons.database import update_results
+from dungeon_and_dragons.engine import (
+    calculate_new_position,
+    dragon_moves,
+    game_result,
+    is_dragonsmellrange
+)
+from dungeon_and_dragons.fov import field_of_view
+from dungeon_and_dragons.scent import (
+    follow_trail,
+    leave_scent,
+    split_targets,
+    trail_from
+)
+from dungeon_and_dragons.menus import get_input
+from dungeon_and_dragons.nearest import (
+    make_player_index,
+    place_player,
+    players_near,
+    remove_player
+)
+from dungeon_and_dragons.telemetry import (
+    finish_game_telemetry,
+    record_turn,
+    start_game_telemetry
+)
+from dungeon_and_dragons.render import (
+    clear_terminal,
+    compose_frame,
+    draw_canvas,
+    entity_overlay,
+    print_info,
+    print_logo
+)
+
+# how the players are shown, in the order they logged in
+PLAYER_GLYPHS: tuple = ('😎', '🤠', '🤖', '👽', '🎃', '😺')
+
+
+def make_players(
+    user_names: List[str],
+    player_info: tuple,
+    health_num: int,
+    settings: Dict
+) -> List[Dict]:
+    """Creates the state of every player, all starting on the same cell
+
+    Parameters
+    ----------
+    user_names: list : usernames in the order they play
+
+    player_info: tuple : the start of the map
+
+    health_num: int : hearts every player starts with
+
+    settings: dict : settings of the game, for telemetry
+
+
+    Returns list of player dicts
+    -------
+
+    """
+    return [
+        {
+            'name': user_name,
+            'glyph': glyph,
+            'pos': player_info,
+            'hearts': ['💜' for _ in range(health_num)],
+            'state': 'ongoing',
+            # the rest of a chain typed on a terminal, see player_turn
+            'queued_moves': list(),
+            'telemetry': start_game_telemetry(
+                {**settings, 'players': len(user_names)}
+            ),
+        }
+        for user_name, glyph in zip(user_names, PLAYER_GLYPHS)
+    ]
+
+
+def play_multiplayer(game: Dict) -> None:
+    """Runs rounds until every player has won, lost or quit
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game, see game.main, with
+    'players' from make_players instead of a single player
+
+
+    Returns None
+    -------
+
+    """
+    player_index = make_player_index(game['smell_zone'])
+    game['queued_moves'] = list()
+    for player in game['players']:
+        place_player(player_index, player['name'], player['pos'])
+        player['trail'] = trail_from([cell_of(game['grid'], player['pos'])])
+
+    while any(player['state'] == 'ongoing' for player in game['players']):
+        for player in game['players']:
+            if player['state'] == 'ongoing':
+                player_turn(game, player, player_index)
+        dragons_turn(game, player_index)
+        for player in game['players']:
+            if player['state'] != 'ongoing':
+                continue
+            state, cause = game_result(
+                game['grid'],
+                player['pos'],
+                game['occupancy'],
+                game['dungeon_door_pos'],
+                player['hearts']
+            )
+            if state != 'ongoing':
+                end_player(game, player, player_index, state, cause)
+
+    # players who quit aren't counted, like in a single player game
+    finished = [
+        player for player in game['players']
+        if player['state'] in ('win', 'loss')
+    ]
+    update_results(
+        {player['name']: player['state'] for player in finished},
+        {player['name']: player['telemetry']['turns'] for player in finished}
+    )
+    show_results(game['players'])
+
+
+def player_turn(game: Dict, player: Dict, player_index: Dict) -> None:
+    """Shows the map to a player and plays their move
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+    player: dict : the player whose turn it is
+
+    player_index: dict : positions of the players, see nearest.py
+
+
+    Returns None
+    -------
+
+    """
+    visible_cells = field_of_view(game['fov_cache'], player['pos'])
+    dragons_pos = coords_of(game['grid'], game['dragon_cells'])
+    # dragons as the player whose turn it is sees them
+    overlay = entity_overlay(
+        player['pos'],
+        player['glyph'],
+        dragons_pos,
+        game['dragon'],
+        game['visible_dragon'],
+        visible_cells
+    )
+    for other in game['players']:
+        if other['state'] == 'ongoing' and other is not player:
+            overlay[other['pos']] = other['glyph']
+    # the player whose turn it is is drawn on top of the others
+    overlay[player['pos']] = player['glyph']
+    frame = compose_frame(game['terrain'], overlay)
+    if game['broadcast'] is not None:
+        from dungeon_and_dragons.spectate import publish
+        publish(
+            game['broadcast'],
+            frame,
+            player['pos'],
+            dragons_pos,
+            player['hearts']
+        )
+    draw_canvas(frame)
+    print(f"{player['glyph']} {player['name']}'s move")
+    alerted = is_dragonsmellrange(
+        game['grid'],
+        game['occupancy'],
+        player['pos'],
+        game['smell_zone'],
+        visible_cells
+    )
+    print_info(
+        game['quit_button'], game['movements'], player['hearts'], alerted
+    )
+    # a piped script lists the moves of all players in turn order, on a
+    # terminal every player plays the chain they typed on their own turns
+    if sys.stdin.isatty():
+        queued_moves = player['queued_moves']
+    else:
+        queued_moves = game['queued_moves']
+    try:
+        # invalid input has no moves and is asked for again
+        while not queued_moves:
+            queued_moves.extend(get_input(game['valid_inputs']))
+        player_input = queued_moves.pop(0)
+    except EOFError:
+        player_input = game['quit_button']
+    clear_terminal()
+
+    if player_input == game['quit_button']:
+        end_player(game, player, player_index, 'quit', 'quit')
+        return
+
+    turn_start = time.perf_counter()
+    player['pos'] = calculate_new_position(
+        game['grid'], player_input, game['movements'], player['pos']
+    )
+    place_player(player_index, player['name'], player['pos'])
+    leave_scent(player['trail'], cell_of(game['grid'], player['pos']))
+    record_turn(
+        player['telemetry'], time.perf_counter() - turn_start, bool(alerted)
+    )
+
+
+def dragons_turn(game: Dict, player_index: Dict) -> None:
+    """Moves every alerted dragon towards the nearest player it noticed
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+    player_index: dict : positions of the players, see nearest.py
+
+
+    Returns None
+    -------
+
+    """
+    grid = game['grid']
+    positions = player_index['positions']
+    # index of each alerted dragon to the cell it heads for
+    targets = dict()
+    # the index of the players is searched by coords
+    dragons_pos = coords_of(grid, game['dragon_cells'])
+    for dragon, dragon_pos in enumerate(dragons_pos):
+        for _, name in players_near(
+            player_index, dragon_pos, game['smell_zone']
+        ):
+            # walls block smell, like in a single player game
+            if dragon_pos in field_of_view(game['fov_cache'], positions[name]):
+                targets[dragon] = cell_of(grid, positions[name])
+                break
+    for player in game['players']:
+        if player['state'] == 'ongoing':
+            follow_trail(
+                grid,
+                player['trail'],
+                game['occupancy'],
+                cell_of(grid, player['pos']),
+                targets
+            )
+
+    alerted_dragons, dragon_targets = split_targets(targets)
+    if alerted_dragons:
+        dragon_moves(
+            grid,
+            alerted_dragons,
+            game['dragon_cells'],
+            game['occupancy'],
+            None,
+            game['wall_mask'],
+            dragon_targets
+        )
+
+
+def end_player(
+    game: Dict,
+    player: Dict,
+    player_index: Dict,
+    state: str,
+    cause: str
+) -> None:
+    """Takes a player who won, lost or quit off the map
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+    player: dict : the player
+
+    player_index: dict : positions of the players, see nearest.py
+
+    state: str : 'win', 'loss' or 'quit'
+
+    cause: str : what ended the game for the player
+
+
+    Returns None
+    -------
+
+    """
+    player['state'] = state
+    finish_game_telemetry(player['telemetry'], state, cause)
+    remove_player(player_index, player['name'])
+
+
+def show_results(players: List[Dict]) -> None:
+    """Prints how the game ended for every player
+
+    Parameters
+    ----------
+    players: list : the player dicts
+
+
+    Returns None
+    -------
+
+    """
+    messages = {'win': 'WON :)', 'loss': 'LOST :(', 'quit': 'quit'}
+    print_logo()
+    for player in players:
+        print(f"    {player['glyph']} {player['name']}: "
+              f"{messages[player['state']]}")
+    time.sleep(1)
@@ -0,0 +1,141 @@
+"""Finding the players near a cell, for dragons on a shared map
+
+Players are kept in a grid of square buckets as wide as the smell zone,
+so the players a dragon can smell are all in the 3x3 buckets around it.
+Moving a player touches at most two buckets and a query only looks at
+the players in those nine buckets, so a turn stays linear in the number
+of dragons and players.
+"""
+from math import (
+    ceil,
+    dist
+)
+from typing import (
+    Dict,
+    List,
+    Tuple
+)
+from dungeon_and_dragons.helper.types import Coordinate
+
+
+def make_player_index(bucket_size: int) -> Dict:
+    """Creates an empty index of player positions
+
+    Parameters
+    ----------
+    bucket_size: int : width of a bucket, the usual query distance
+
+
+    Returns the index dict
+    -------
+
+    """
+    return {
+        'bucket_size': max(bucket_size, 1),
+        'buckets': dict(),
+        'positions': dict(),
+    }
+
+
+def bucket_of(player_index: Dict, cell: Coordinate) -> Coordinate:
+    """Finds the bucket a cell is in
+
+    Parameters
+    ----------
+    player_index: dict : see make_player_index
+
+    cell: tuple : coords of the cell
+
+
+    Returns coords of the bucket
+    -------
+
+    """
+    x, y = cell
+    size = player_index['bucket_size']
+    return x // size, y // size
+
+
+def place_player(player_index: Dict, name: str, cell: Coordinate) -> None:
+    """Adds a player to the index or moves it to a new cell
+
+    Parameters
+    ----------
+    player_index: dict : see make_player_index
+
+    name: str : username of the player
+
+    cell: tuple : player's coords
+
+
+    Returns None
+    -------
+
+    """
+    buckets = player_index['buckets']
+    old_cell = player_index['positions'].get(name)
+    bucket = bucket_of(player_index, cell)
+    if old_cell is not None:
+        old_bucket = bucket_of(player_index, old_cell)
+        if old_bucket != bucket:
+            buckets[old_bucket].discard(name)
+            if not buckets[old_bucket]:
+                del buckets[old_bucket]
+    buckets.setdefault(bucket, set()).add(name)
+    player_index['positions'][name] = cell
+
+
+def remove_player(player_index: Dict, name: str) -> None:
+    """Takes a player out of the index
+
+    Parameters
+    ----------
+    player_index: dict : see make_player_index
+
+    name: str : username of the player
+
+
+    Returns None
+    -------
+
+    """
+    cell = player_index['positions'].pop(name)
+    bucket = bucket_of(player_index, cell)
+    player_index['buckets'][bucket].discard(name)
+    if not player_index['buckets'][bucket]:
+        del player_index['buckets'][bucket]
+
+
+def players_near(
+    player_index: Dict,
+    cell: Coordinate,
+    max_distance: float
+) -> List[Tuple[float, str]]:
+    """Lists the players within max_distance of a cell, nearest first
+
+    Parameters
+    ----------
+    player_index: dict : see make_player_index
+
+    cell: tuple : coords of the cell, e.g. a dragon
+
+    max_distance: float : players further than this are left out
+
+
+    Returns list of (distance, username), ties broken by username
+    -------
+
+    """
+    buckets = player_index['buckets']
+    positions = player_index['positions']
+    reach = ceil(max_distance / player_index['bucket_size'])
+    bucket_x, bucket_y = bucket_of(player_index, cell)
+    near = list()
+    for y in range(bucket_y - reach, bucket_y + reach + 1):
+        for x in range(bucket_x - reach, bucket_x + reach + 1):
+            for name in buckets.get((x, y), ()):
+                distance = dist(cell, positions[name])
+                if distance <= max_distance:
+                    near.append((distance, name))
+
+    return sorted(near)
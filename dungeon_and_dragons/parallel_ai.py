@@ -0,0 +1,219 @@
+"""Moving alerted dragons region by region on a thread pool
+
+The map is cut into square regions of REGION_SIZE cells and the alerted
+dragons are grouped by the region they are in. Every region is one task
+that moves its dragons in the order they were alerted, against its own
+set of taken cells, so no two tasks write to the same thing. A dragon
+whose move would take it into another region is held back and moved
+after all tasks are done, again in alerted order. The random draws are
+made up front, in alerted order too, so the moves only depend on the
+random seed and never on how the threads were scheduled.
+
+Threads only run at the same time on free-threaded CPython builds, with
+the GIL dragon_moves keeps using its serial loop, see parallel_enabled.
+"""
+import os
+import sys
+import random
+from array import array
+from functools import cache
+from typing import (
+    Dict,
+    List,
+    Set,
+    Tuple
+)
+from dungeon_and_dragons.cells import (
+    best_move,
+    squared_distance
+)
+
+# width and height of a region in cells
+REGION_SIZE: int = 64
+# below this many alerted dragons the serial loop is faster
+MIN_PARALLEL_SIZE: int = 256
+WORKERS: int = os.cpu_count() or 1
+
+
+def gil_disabled() -> bool:
+    """Checks if this is a free-threaded build running without the GIL"""
+    # only free-threaded builds, 3.13 and later, have it
+    is_gil_enabled = getattr(sys, '_is_gil_enabled', None)
+    return is_gil_enabled is not None and not is_gil_enabled()
+
+
+def parallel_enabled() -> bool:
+    """Checks if moving dragons on several threads can be faster"""
+    return WORKERS > 1 and gil_disabled()
+
+
+@cache
+def get_pool(workers: int):
+    """Starts the thread pool the first time it is needed
+
+    Parameters
+    ----------
+    workers: int : number of threads
+
+
+    Returns the ThreadPoolExecutor
+    -------
+
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    return ThreadPoolExecutor(workers, thread_name_prefix='dragons')
+
+
+def region_of(stride: int, cell: int) -> int:
+    """Finds the region a cell is in
+
+    Parameters
+    ----------
+    stride: int : stride of the grid, see cells.make_grid
+
+    cell: int : the cell
+
+
+    Returns number of the region
+    -------
+
+    """
+    y, x = divmod(cell, stride)
+    # cut at the coords of the map, the ring of walls is left of and
+    # above them
+    return (y - 1) // REGION_SIZE * stride + (x - 1) // REGION_SIZE
+
+
+def move_region(
+    grid: Dict,
+    region: int,
+    dragons: List[Tuple],
+    taken: Set[int]
+) -> Tuple[List[Tuple[int, int]], List[Tuple[int, int]]]:
+    """Moves the alerted dragons of one region, one task of the pool
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, only read
+
+    region: int : number of the region
+
+    dragons: list : (number, cell, target, draw, random move) of each
+    alerted dragon of the region, in alerted order
+
+    taken: set : cells of the region taken by dragons, kept up to date
+
+
+    Returns (number, new cell) of the dragons moved and (number, wanted
+    cell) of the dragons held back for another region
+    -------
+
+    """
+    walls = grid['walls']
+    stride = grid['stride']
+    offsets = grid['offsets']
+    moved = list()
+    held_back = list()
+    for number, cell, target, draw, random_move in dragons:
+        # ~30% chance to choose the best move if dist is more than 2, ~60%
+        # else, like the serial loop of dragon_moves
+        if draw < (1 / 3 if squared_distance(stride, cell, target) > 4
+                   else 2 / 3):
+            new_cell = cell + best_move(grid, cell, target)
+        else:
+            new_cell = cell + offsets[random_move]
+
+        if region_of(stride, new_cell) != region:
+            held_back.append((number, new_cell))
+            continue
+        if walls[new_cell] or new_cell in taken:
+            new_cell = cell
+        else:
+            taken.discard(cell)
+            taken.add(new_cell)
+        moved.append((number, new_cell))
+
+    return moved, held_back
+
+
+def region_dragon_moves(
+    grid: Dict,
+    alerted_dragons: array,
+    dragon_cells: array,
+    targets,
+    workers: int = WORKERS
+) -> List[int]:
+    """Calculates the next move of all alerted dragons, region by region
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    alerted_dragons: array : indices in dragon_cells of the alerted dragons
+
+    dragon_cells: array : cells of the dragons, not changed
+
+    targets: int or array : the player's cell, or the cell each alerted
+    dragon chases
+
+    workers: int : number of threads, the regions are moved one after the
+    other on this thread if 1
+
+
+    Returns new cells of the alerted dragons, in the same order
+    -------
+
+    """
+    stride = grid['stride']
+    if isinstance(targets, int):
+        targets = [targets] * len(alerted_dragons)
+    alerted_cells = [dragon_cells[dragon] for dragon in alerted_dragons]
+    regions = dict()
+    for number, cell in enumerate(alerted_cells):
+        regions.setdefault(region_of(stride, cell), list()).append((
+            number,
+            cell,
+            targets[number],
+            random.random(),
+            random.randrange(len(grid['offsets']))
+        ))
+    taken = {region: set() for region in regions}
+    for cell in dragon_cells:
+        region = region_of(stride, cell)
+        if region in taken:
+            taken[region].add(cell)
+
+    arguments = (
+        [grid] * len(regions),
+        list(regions),
+        list(regions.values()),
+        [taken[region] for region in regions]
+    )
+    if workers > 1 and len(regions) > 1:
+        results = get_pool(workers).map(move_region, *arguments)
+    else:
+        results = map(move_region, *arguments)
+
+    new_cells = list(alerted_cells)
+    held_back = list()
+    for moved, region_held_back in results:
+        for number, new_cell in moved:
+            new_cells[number] = new_cell
+        held_back.extend(region_held_back)
+
+    # dragons crossing into another region go last, in alerted order,
+    # against every cell taken after the regions have moved
+    all_taken = set().union(*taken.values())
+    all_taken.update(
+        cell for cell in dragon_cells
+        if region_of(stride, cell) not in taken
+    )
+    walls = grid['walls']
+    for number, new_cell in sorted(held_back):
+        if walls[new_cell] or new_cell in all_taken:
+            continue
+        all_taken.discard(alerted_cells[number])
+        all_taken.add(new_cell)
+        new_cells[number] = new_cell
+
+    return new_cells
@@ -0,0 +1,106 @@
+"""Generating the next map in the background while the menus are shown
+
+The player spends a while on the login and menu pages, so the map of the
+likely settings is made in a worker thread meanwhile. The thread mostly
+runs while the main thread waits on input(), which releases the GIL.
+When the game starts the map is handed over if the settings match, or
+thrown away if they don't.
+"""
+import threading
+from typing import Dict
+from dungeon_and_dragons.maps import generate_level
+
+
+def start_pregeneration(
+    row_len: int,
+    column_len: int,
+    dragon_num: int,
+    map_tiles: str,
+    map_walls: str
+) -> Dict:
+    """Starts generating a level in a worker thread
+
+    Parameters
+    ----------
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    dragon_num: int : the most dragons the level may be used with
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+
+    Returns the job dict, to pass to take_pregenerated
+    -------
+
+    """
+    job = {
+        'settings': (row_len, column_len, map_tiles, map_walls),
+        'dragon_num': dragon_num,
+        'level': None,
+        'error': None,
+    }
+
+    def generate() -> None:
+        try:
+            job['level'] = generate_level(
+                row_len, column_len, dragon_num, map_tiles, map_walls
+            )
+        except Exception as error:
+            job['error'] = error
+
+    # a daemon thread doesn't keep the game open if the player quits
+    job['thread'] = threading.Thread(
+        target=generate, name='pregenerate-map', daemon=True
+    )
+    job['thread'].start()
+    return job
+
+
+def take_pregenerated(
+    job: Dict,
+    row_len: int,
+    column_len: int,
+    dragon_num: int,
+    map_tiles: str,
+    map_walls: str
+) -> Dict:
+    """Hands over the pregenerated level if it fits the chosen settings
+
+    Dragons are placed one after the other on random free cells, so the
+    first dragon_num of them are placed just like dragon_num dragons would
+    be and a level made for more dragons can be used with fewer
+
+    Parameters
+    ----------
+    job: dict : see start_pregeneration
+
+    row_len: int : width of the map
+
+    column_len: int : height of the map
+
+    dragon_num: int : the number of dragons on the map
+
+    map_tiles: str : free cells on the map
+
+    map_walls: str : walls of the map
+
+
+    Returns the level, None if it doesn't fit or couldn't be generated
+    -------
+
+    """
+    settings = (row_len, column_len, map_tiles, map_walls)
+    if settings != job['settings'] or dragon_num > job['dragon_num']:
+        return None
+
+    job['thread'].join()
+    level = job['level']
+    if level is None:
+        return None
+    level['dragons_pos'] = level['dragons_pos'][:dragon_num]
+
+    return level
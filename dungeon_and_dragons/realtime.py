@@ -0,0 +1,331 @@
+"""Real-time mode, dragons move on a fixed tick instead of after every move
+
+An asyncio loop runs the dragons' turn tick_rate times a second while the
+player's moves are read from stdin as they arrive. The turn rules are the
+same ones the turn based loop uses, from dungeon_and_dragons.engine.
+"""
+import sys
+import time
+import asyncio
+from typing import Dict
+from dungeon_and_dragons.cells import (
+    cell_of,
+    coords_of
+)
+from dungeon_and_dragons.engine import (
+    calculate_new_position,
+    check_win_lose,
+    dragon_moves,
+    is_dragonsmellrange
+)
+from dungeon_and_dragons.fov import field_of_view
+from dungeon_and_dragons.scent import (
+    follow_trail,
+    leave_scent,
+    split_targets
+)
+from dungeon_and_dragons.menus import parse_moves
+from dungeon_and_dragons.telemetry import (
+    finish_game_telemetry,
+    record_turn
+)
+from dungeon_and_dragons.render import (
+    clear_terminal,
+    compose_frame,
+    draw_canvas,
+    entity_overlay,
+    print_info
+)
+
+# a tick that starts later than this part of the interval is late
+LATE_TICK: float = 0.1
+
+
+def make_tick_stats() -> Dict[str, float]:
+    """Creates the timing stats of the tick scheduler
+
+    ticks: number of dragon turns played
+
+    late_ticks: ticks that started more than LATE_TICK of an interval late
+
+    dropped_ticks: whole ticks that were skipped to catch up
+
+    skipped_frames: late ticks that were played without rendering
+
+    worst_lateness, total_lateness: in seconds
+
+
+    Returns the stats dict with all counters at zero
+    -------
+
+    """
+    return {
+        'ticks': 0,
+        'late_ticks': 0,
+        'dropped_ticks': 0,
+        'skipped_frames': 0,
+        'worst_lateness': 0.0,
+        'total_lateness': 0.0,
+    }
+
+
+def play_realtime(tick_rate: float, game: Dict) -> None:
+    """Runs the game in real-time mode until it is won, lost or quit
+
+    Parameters
+    ----------
+    tick_rate: float : dragon turns per second
+
+    game: dict : settings and state of the game, see game.main
+
+
+    Returns None
+    -------
+
+    """
+    stats = make_tick_stats()
+    try:
+        asyncio.run(run_game(tick_rate, game, stats))
+    finally:
+        print_tick_stats(stats)
+
+
+async def run_game(tick_rate: float, game: Dict, stats: Dict) -> None:
+    """Plays the player's moves as they come in and ticks the dragons
+
+    Parameters
+    ----------
+    tick_rate: float : dragon turns per second
+
+    game: dict : settings and state of the game
+
+    stats: dict : timing stats of the ticks, see make_tick_stats
+
+
+    Returns None
+    -------
+
+    """
+    loop = asyncio.get_running_loop()
+    quit_game = loop.create_future()
+
+    def on_input() -> None:
+        if quit_game.done():
+            return
+        line = sys.stdin.readline()
+        # an empty string means stdin was closed
+        if not line:
+            quit_game.set_result(None)
+            return
+        for player_input in parse_moves(line, game['valid_inputs']):
+            if player_input == game['quit_button']:
+                quit_game.set_result(None)
+                return
+            player_step(game, player_input)
+        render_frame(game, stats)
+
+    render_frame(game, stats)
+    loop.add_reader(sys.stdin.fileno(), on_input)
+    ticks = asyncio.create_task(run_ticks(tick_rate, game, stats))
+    try:
+        await quit_game
+    finally:
+        loop.remove_reader(sys.stdin.fileno())
+        ticks.cancel()
+    finish_game_telemetry(game['telemetry'], 'quit', 'quit')
+    clear_terminal()
+
+
+async def run_ticks(tick_rate: float, game: Dict, stats: Dict) -> None:
+    """Plays a dragon turn every 1 / tick_rate seconds until cancelled
+
+    A late tick still moves the dragons but skips rendering, and ticks
+    that were missed completely are dropped instead of played in a burst,
+    so a slow frame never makes the following ones late too
+
+    Parameters
+    ----------
+    tick_rate: float : dragon turns per second
+
+    game: dict : settings and state of the game
+
+    stats: dict : timing stats of the ticks
+
+
+    Returns None
+    -------
+
+    """
+    loop = asyncio.get_running_loop()
+    interval = 1 / tick_rate
+    deadline = loop.time() + interval
+    while True:
+        await asyncio.sleep(max(deadline - loop.time(), 0))
+        lateness = loop.time() - deadline
+        stats['ticks'] += 1
+        stats['total_lateness'] += lateness
+        stats['worst_lateness'] = max(stats['worst_lateness'], lateness)
+        is_late = lateness > interval * LATE_TICK
+        if is_late:
+            stats['late_ticks'] += 1
+            dropped = int(lateness // interval)
+            stats['dropped_ticks'] += dropped
+            deadline += dropped * interval
+
+        dragon_step(game)
+        if is_late:
+            stats['skipped_frames'] += 1
+        else:
+            render_frame(game, stats)
+        deadline += interval
+
+
+def player_step(game: Dict, player_input: str) -> None:
+    """Moves the player and checks if the move won or lost the game
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+    player_input: str : one of the movements
+
+
+    Returns None
+    -------
+
+    """
+    turn_start = time.perf_counter()
+    game['player_info'] = calculate_new_position(
+        game['grid'],
+        player_input,
+        game['movements'],
+        game['player_info']
+    )
+    leave_scent(game['trail'], cell_of(game['grid'], game['player_info']))
+    record_turn(
+        game['telemetry'],
+        time.perf_counter() - turn_start,
+        bool(game['alerted_dragons'])
+    )
+    check_win_lose(
+        game['grid'],
+        game['player_info'],
+        game['occupancy'],
+        game['dungeon_door_pos'],
+        game['hearts'],
+        game['user_name'],
+        game['telemetry']
+    )
+
+
+def dragon_step(game: Dict) -> None:
+    """Moves the alerted dragons and checks if they caught the player
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+
+    Returns None
+    -------
+
+    """
+    player_cell = cell_of(game['grid'], game['player_info'])
+    visible_cells = field_of_view(game['fov_cache'], game['player_info'])
+    # like the turn based loop, the dragons that smell the player head
+    # straight for them and the ones on the trail follow it
+    targets = dict.fromkeys(is_dragonsmellrange(
+        game['grid'],
+        game['occupancy'],
+        game['player_info'],
+        game['smell_zone'],
+        visible_cells
+    ), player_cell)
+    follow_trail(
+        game['grid'], game['trail'], game['occupancy'], player_cell, targets
+    )
+    game['alerted_dragons'], dragon_targets = split_targets(targets)
+    if game['alerted_dragons']:
+        dragon_moves(
+            game['grid'],
+            game['alerted_dragons'],
+            game['dragon_cells'],
+            game['occupancy'],
+            None,
+            game['wall_mask'],
+            dragon_targets
+        )
+    check_win_lose(
+        game['grid'],
+        game['player_info'],
+        game['occupancy'],
+        game['dungeon_door_pos'],
+        game['hearts'],
+        game['user_name'],
+        game['telemetry']
+    )
+
+
+def render_frame(game: Dict, stats: Dict) -> None:
+    """Clears the terminal and draws the current frame
+
+    Parameters
+    ----------
+    game: dict : settings and state of the game
+
+    stats: dict : timing stats of the ticks
+
+
+    Returns None
+    -------
+
+    """
+    clear_terminal()
+    dragons_pos = coords_of(game['grid'], game['dragon_cells'])
+    frame = compose_frame(game['terrain'], entity_overlay(
+        game['player_info'],
+        game['player'],
+        dragons_pos,
+        game['dragon'],
+        game['visible_dragon'],
+        field_of_view(game['fov_cache'], game['player_info'])
+    ))
+    if game['broadcast'] is not None:
+        from dungeon_and_dragons.spectate import publish
+        publish(
+            game['broadcast'],
+            frame,
+            game['player_info'],
+            dragons_pos,
+            game['hearts']
+        )
+    draw_canvas(frame)
+    print_info(
+        game['quit_button'],
+        game['movements'],
+        game['hearts'],
+        game['alerted_dragons']
+    )
+    print_tick_stats(stats)
+
+
+def print_tick_stats(stats: Dict) -> None:
+    """Prints the timing stats of the ticks
+
+    Parameters
+    ----------
+    stats: dict : timing stats of the ticks
+
+
+    Returns None
+    -------
+
+    """
+    average = stats['total_lateness'] / stats['ticks'] if stats['ticks'] else 0
+    print(
+        f"Ticks: {stats['ticks']}, late: {stats['late_ticks']}, "
+        f"dropped: {stats['dropped_ticks']}, "
+        f"skipped frames: {stats['skipped_frames']}, "
+        f"lateness avg {average * 1000:.1f} ms, "
+        f"worst {stats['worst_lateness'] * 1000:.1f} ms"
+    )
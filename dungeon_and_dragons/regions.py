@@ -0,0 +1,144 @@
+"""Connected regions of a map, to keep every map solvable
+
+The open cells of a map are labelled by region with one flood fill when
+the map is created. After that the region of a cell is one array lookup,
+and the door and the dragons are only placed where the player can
+actually walk to.
+"""
+from array import array
+from collections import deque
+from typing import Dict
+from dungeon_and_dragons.bitboard import make_bitboard
+from dungeon_and_dragons.helper.types import Coordinate
+
+
+def make_region_index(wall_board: Dict) -> Dict:
+    """Labels every open cell of the map with its region
+
+    Parameters
+    ----------
+    wall_board: dict : bitboard of the walls of the map
+
+
+    Returns dict with the flat 'labels' array, -1 on walls, and the 'sizes'
+    of the regions
+    -------
+
+    """
+    width, height = wall_board['width'], wall_board['height']
+    walls = wall_board['rows']
+    labels = array('i', [-1]) * (width * height)
+    sizes = list()
+    for start in range(width * height):
+        start_y, start_x = divmod(start, width)
+        if labels[start] != -1 or walls[start_y] >> start_x & 1:
+            continue
+
+        # flood fill a new region from the first cell nobody has reached
+        label = len(sizes)
+        labels[start] = label
+        size = 0
+        queue = deque([start])
+        while queue:
+            cell = queue.popleft()
+            size += 1
+            y, x = divmod(cell, width)
+            for next_x, next_y in (
+                (x, y - 1), (x, y + 1), (x - 1, y), (x + 1, y)
+            ):
+                if not (0 <= next_x < width and 0 <= next_y < height):
+                    continue
+                next_cell = next_y * width + next_x
+                if labels[next_cell] != -1 or walls[next_y] >> next_x & 1:
+                    continue
+                labels[next_cell] = label
+                queue.append(next_cell)
+        sizes.append(size)
+
+    return {
+        'width': width, 'height': height, 'labels': labels, 'sizes': sizes
+    }
+
+
+def region_of(region_index: Dict, cell: Coordinate) -> int:
+    """Finds the region of a cell
+
+    Parameters
+    ----------
+    region_index: dict : see make_region_index
+
+    cell: tuple : coords of the cell
+
+
+    Returns label of the region, -1 for walls
+    -------
+
+    """
+    x, y = cell
+    return region_index['labels'][y * region_index['width'] + x]
+
+
+def nearest_open_cell(region_index: Dict, cell: Coordinate) -> Coordinate:
+    """Finds the closest cell that isn't a wall, preferring big regions
+
+    Parameters
+    ----------
+    region_index: dict : see make_region_index
+
+    cell: tuple : coords of the wanted cell
+
+
+    Returns cell itself if it is open, or the closest open cell
+    -------
+
+    """
+    if region_of(region_index, cell) != -1:
+        return cell
+
+    width = region_index['width']
+    sizes = region_index['sizes']
+    cell_x, cell_y = cell
+    best_cell, best_key = None, None
+    for index, label in enumerate(region_index['labels']):
+        if label == -1:
+            continue
+        y, x = divmod(index, width)
+        key = (abs(x - cell_x) + abs(y - cell_y), -sizes[label])
+        if best_key is None or key < best_key:
+            best_cell, best_key = (x, y), key
+    if best_cell is None:
+        raise ValueError('the map has no open cell')
+
+    return best_cell
+
+
+def unreachable_board(region_index: Dict, cell: Coordinate) -> Dict:
+    """Makes a bitboard of the cells that can't be walked to from cell
+
+    Walls are included, so it can be used in place of the wall bitboard
+    to place things the player has to be able to reach
+
+    Parameters
+    ----------
+    region_index: dict : see make_region_index
+
+    cell: tuple : coords the cells are walked to from
+
+
+    Returns the bitboard dict
+    -------
+
+    """
+    width, height = region_index['width'], region_index['height']
+    labels = region_index['labels']
+    region = region_of(region_index, cell)
+    board = make_bitboard(width, height)
+    for y in range(height):
+        bits = 0
+        row_start = y * width
+        for x in range(width):
+            if labels[row_start + x] != region:
+                bits |= 1 << x
+        board['rows'][y] = bits
+
+    return board
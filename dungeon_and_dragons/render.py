@@ -0,0 +1,229 @@
+"""Drawing the map and the screens of the game on the terminal"""
+import os
+import time
+import sys
+from typing import (
+    List,
+    Dict,
+    FrozenSet
+)
+from math import dist
+from functools import cache
+from dungeon_and_dragons.helper.types import (
+    GameMap,
+    Coordinate,
+    Terrain
+)
+
+
+def entity_overlay(
+    player_info: Coordinate,
+    player: str,
+    dragons_pos: List[Coordinate],
+    dragon: str,
+    visible_dragon: str,
+    visible_cells: FrozenSet = None
+) -> Dict[Coordinate, str]:
+    """Finds how each entity is shown, for the cells that have one
+
+    Parameters
+    ----------
+    player_info: tuple : player's coords
+
+    player: str : how player is displayed
+
+    dragons_pos: list : coords of the dragons
+
+    dragon: str : how dragon is displayed on the map normally
+
+    visible_dragon: str : how dragon is displayed when it is visible
+
+    visible_cells: frozenset : field of view of the player, dragons behind
+    walls stay hidden, see fov.field_of_view
+
+
+    Returns dict of coords to glyph
+    -------
+
+    """
+    overlay = dict()
+    for dragon_pos in dragons_pos:
+        in_sight = visible_cells is None or dragon_pos in visible_cells
+        # dragon will become visible when it is close
+        if in_sight and dist(dragon_pos, player_info) <= 3:
+            overlay[dragon_pos] = visible_dragon
+        else:
+            overlay[dragon_pos] = dragon
+    # the player is drawn over a dragon on the same cell
+    overlay[player_info] = player
+
+    return overlay
+
+
+def compose_frame(terrain: Terrain, overlay: Dict[Coordinate, str]) -> GameMap:
+    """Puts the entities over the terrain
+
+    Parameters
+    ----------
+    terrain: tuple : see make_terrain
+
+    overlay: dict : coords to glyph, see entity_overlay
+
+
+    Returns the frame, a new map the terrain isn't changed by
+    -------
+
+    """
+    frame = [list(row) for row in terrain]
+    for (x, y), glyph in overlay.items():
+        frame[y][x] = glyph
+
+    return frame
+
+
+def draw_canvas(game_map: GameMap) -> GameMap:
+    """draws the canvas which the game happens in
+
+    Parameters
+    ----------
+    game_map: list : map of the game
+
+
+    Returns game_map
+    -------
+
+    """
+    for row in game_map:
+        print("".join(row))
+
+    return game_map
+
+
+def print_info(
+    quit_button: str,
+    movements: Dict[str, Coordinate],
+    hearts: str,
+    alert: List[Coordinate],
+    undo_button: str = None
+) -> None:
+    """Show the commands to user
+
+    Parameters
+    ----------
+    quit_button: str : the key that quits the game
+
+    movements: dict : the dict of movement actions
+
+    hearts: str : how health is displayed
+
+    alert: list : list of coords of the alerted dragons
+
+    undo_button: str : the key that takes back a move, if there is one
+
+    Returns None
+    -------
+
+    """
+    print(f"Health: {' '.join(hearts)}")
+    if alert:
+        print("ALERT: Dragon is suspicious and might move towards you!")
+    print(f"Enter {', '.join(list(movements.keys()))} to move")
+    print("Chain moves like 'up*5 left*2' to play them at once")
+    if undo_button:
+        print(f"Enter '{undo_button}' to take back a move")
+    print(f"Enter '{quit_button}' to quit the game.")
+
+
+@cache
+def clear_sequence(term: str) -> str:
+    """Runs clear once for a terminal type and keeps what it prints
+
+    Parameters
+    ----------
+    term: str : the TERM clear is run with
+
+
+    Returns the escape sequence that clears that terminal
+    -------
+
+    """
+    import subprocess
+
+    try:
+        return subprocess.run(
+            ['clear'], stdout=subprocess.PIPE
+        ).stdout.decode(errors='replace')
+    except OSError:
+        return ''
+
+
+def clear_terminal() -> None:
+    """Clears the terminal"""
+    if os.name == 'nt':
+        os.system('cls')
+    elif os.name == 'posix':
+        # running clear every time would fork and exec on every frame
+        sys.stdout.write(clear_sequence(os.environ.get('TERM', '')))
+        sys.stdout.flush()
+
+
+def lose_game(user_name: str) -> None:
+    """Show lose message
+
+    Parameters
+    ----------
+    user_name: str : player's user name
+
+
+    Returns None
+    -------
+
+    """
+    msg = """
+    SORRY {}, YOU LOST :(
+          """.format(user_name)
+    print(msg)
+    after_game()
+
+
+def win_game(user_name: str) -> None:
+    """Show win message
+
+    Parameters
+    ----------
+    user_name: str : player's username
+
+
+    Returns None
+    -------
+
+    """
+    msg = """
+    YAY {}! YOU WON :)
+          """.format(user_name)
+    print(msg)
+    after_game()
+
+
+def after_game() -> None:
+    """After win or lose waits 1 second and exits after clearing terminal"""
+    time.sleep(1)
+    clear_terminal()
+    sys.exit()
+
+
+def print_separator() -> None:
+    """Prints line separator"""
+    print('~~~' * 11)
+
+
+def print_logo() -> None:
+    """Prints game's logo"""
+    print(
+            """
+*********************************
+*********** Dungeon *************
+************** & ****************
+*********** Dragons *************
+*********************************
+            """)
@@ -0,0 +1,170 @@
+"""Per-player game history and the rollups kept up to date with it
+
+Every finished game of a player is appended to history.ndjson. The stats
+the leaderboard and profile pages show are rollups that live next to each
+player in the player store and are updated in constant time when a game
+ends, so the history is never read back to compute them.
+"""
+import json
+import time
+from typing import (
+    Dict,
+    List
+)
+
+HISTORY_FILE: str = 'history.ndjson'
+# games the recent win rate is taken over
+RECENT_GAMES: int = 10
+# days that are kept in the daily rollup
+DAYS_KEPT: int = 30
+
+
+def make_rollups() -> Dict:
+    """Creates the rollups of a player who hasn't played since they were kept
+
+    Returns the rollups dict
+    -------
+
+    """
+    return {
+        'games': 0,
+        'total turns': 0,
+        'average turns': 0,
+        # wins in a row if positive, losses in a row if negative
+        'streak': 0,
+        'best streak': 0,
+        # 'W' or 'L' for each of the last RECENT_GAMES games, oldest first
+        'recent': '',
+        'recent wins': 0,
+        'recent win rate': 0,
+        # day to games won and lost that day, oldest day first
+        'daily': dict(),
+    }
+
+
+def add_game(rollups: Dict, result: str, turns: int, day: str) -> None:
+    """Adds a finished game to the rollups of a player
+
+    Parameters
+    ----------
+    rollups: dict : see make_rollups
+
+    result: str : 'win' or 'loss'
+
+    turns: int : turns the game took
+
+    day: str : the day the game ended, as YYYY-MM-DD
+
+
+    Returns None
+    -------
+
+    """
+    won = result == 'win'
+    rollups['games'] += 1
+    rollups['total turns'] += turns
+    rollups['average turns'] = rollups['total turns'] / rollups['games']
+
+    if won:
+        rollups['streak'] = max(rollups['streak'], 0) + 1
+    else:
+        rollups['streak'] = min(rollups['streak'], 0) - 1
+    rollups['best streak'] = max(rollups['best streak'], rollups['streak'])
+
+    recent = rollups['recent'] + ('W' if won else 'L')
+    rollups['recent wins'] += won
+    if len(recent) > RECENT_GAMES:
+        rollups['recent wins'] -= recent[0] == 'W'
+        recent = recent[1:]
+    rollups['recent'] = recent
+    rollups['recent win rate'] = rollups['recent wins'] / len(recent) * 100
+
+    daily = rollups['daily']
+    if day not in daily:
+        daily[day] = {'games won': 0, 'games lost': 0}
+        # days are added in order, so the first one is the oldest
+        if len(daily) > DAYS_KEPT:
+            del daily[next(iter(daily))]
+    daily[day]['games won' if won else 'games lost'] += 1
+
+
+def merge_rollups(all_rollups: List[Dict]) -> Dict:
+    """Merges the rollups one player has on several hosts
+
+    The games of every host are taken to come after the games of the
+    hosts before it, so recent games and streaks carry on from one host to
+    the next. The best streak only joins streaks that span all the games
+    of a host, the order of the games within a host is not kept.
+
+    Parameters
+    ----------
+    all_rollups: list : the rollups of the player, see make_rollups, in
+    the order of the hosts
+
+
+    Returns the merged rollups dict
+    -------
+
+    """
+    merged = make_rollups()
+    for rollups in all_rollups:
+        games = rollups['games']
+        if not games:
+            continue
+        merged['games'] += games
+        merged['total turns'] += rollups['total turns']
+
+        streak = rollups['streak']
+        if abs(streak) == games and streak * merged['streak'] > 0:
+            streak += merged['streak']
+        merged['streak'] = streak
+        merged['best streak'] = max(
+            merged['best streak'], rollups['best streak'], streak
+        )
+        merged['recent'] = (merged['recent'] + rollups['recent'])[
+            -RECENT_GAMES:
+        ]
+
+        for day, day_games in rollups['daily'].items():
+            totals = merged['daily'].setdefault(
+                day, {'games won': 0, 'games lost': 0}
+            )
+            totals['games won'] += day_games['games won']
+            totals['games lost'] += day_games['games lost']
+
+    if merged['games']:
+        merged['average turns'] = merged['total turns'] / merged['games']
+    recent = merged['recent']
+    merged['recent wins'] = recent.count('W')
+    if recent:
+        merged['recent win rate'] = merged['recent wins'] / len(recent) * 100
+    # YYYY-MM-DD days sort in order
+    merged['daily'] = dict(sorted(merged['daily'].items())[-DAYS_KEPT:])
+
+    return merged
+
+
+def today() -> str:
+    """The current day in local time, as YYYY-MM-DD"""
+    return time.strftime('%Y-%m-%d')
+
+
+def append_history(records: List[Dict]) -> None:
+    """Appends finished games to the history file
+
+    Parameters
+    ----------
+    records: list : dicts with the name, result and turns of each game
+
+
+    Returns None
+    -------
+
+    """
+    ended = round(time.time(), 3)
+    with open(HISTORY_FILE, 'a') as history:
+        history.writelines(
+            json.dumps({'ended': ended, **record}, separators=(',', ':'))
+            + '\n'
+            for record in records
+        )
@@ -0,0 +1,205 @@
+"""Scent trails, dragons track the cells the player walked through
+
+Every turn the player leaves scent on their cell. The trail is a ring
+buffer of the last TRAIL_LENGTH cells with a dict from cell to the turn
+it was last walked through, so scent fades as the player walks on and a
+cell walked through again smells fresh. A dragon on the trail or next to
+it is alerted and heads for the neighbouring cell with the freshest
+scent, which leads it along the trail to the player.
+
+Finding those dragons only reads the cells of the trail and the cells
+around them in the occupancy array, see cells.py, so the cost of a turn
+depends on the length of the trail and on the dragons that follow it,
+not on how many dragons the map has.
+"""
+from array import array
+from typing import (
+    Dict,
+    Iterable,
+    Tuple
+)
+
+# turns the scent of a cell lasts
+TRAIL_LENGTH: int = 24
+
+
+def make_trail(length: int = TRAIL_LENGTH) -> Dict:
+    """Creates an empty trail
+
+    Parameters
+    ----------
+    length: int : turns the scent of a cell lasts
+
+
+    Returns the trail dict
+    -------
+
+    """
+    return {
+        'length': length,
+        # cell the player was on, by turn modulo length
+        'cells': array('i', bytes(4 * length)),
+        'turn': 0,
+        # the turn every cell of the trail was last walked through
+        'scent': dict(),
+    }
+
+
+def leave_scent(trail: Dict, cell: int) -> None:
+    """Adds the player's cell to the trail, the oldest cell of a full
+    trail loses its scent unless it was walked through again
+
+    Parameters
+    ----------
+    trail: dict : see make_trail
+
+    cell: int : the player's cell
+
+
+    Returns None
+    -------
+
+    """
+    turn = trail['turn']
+    slot = turn % trail['length']
+    if turn >= trail['length']:
+        oldest = trail['cells'][slot]
+        if trail['scent'][oldest] == turn - trail['length']:
+            del trail['scent'][oldest]
+    trail['cells'][slot] = cell
+    trail['scent'][cell] = turn
+    trail['turn'] = turn + 1
+
+
+def trail_from(cells: Iterable[int], length: int = TRAIL_LENGTH) -> Dict:
+    """Creates the trail of cells walked through one after the other, e.g.
+    to go back to it when a move is undone
+
+    Parameters
+    ----------
+    cells: iterable : the player's cells, oldest first
+
+    length: int : turns the scent of a cell lasts
+
+
+    Returns the trail dict
+    -------
+
+    """
+    trail = make_trail(length)
+    for cell in cells:
+        leave_scent(trail, cell)
+
+    return trail
+
+
+def scent_at(trail: Dict, cell: int) -> int:
+    """Finds how strong the scent of a cell is
+
+    Parameters
+    ----------
+    trail: dict : see make_trail
+
+    cell: int : the cell
+
+
+    Returns the scent, length on the player's cell down to 1 on the oldest
+    cell of the trail, 0 off the trail
+    -------
+
+    """
+    turn = trail['scent'].get(cell)
+    if turn is None:
+        return 0
+    return trail['length'] - (trail['turn'] - 1 - turn)
+
+
+def freshest_neighbour(
+    trail: Dict,
+    offsets: Iterable[int],
+    cell: int,
+    player_cell: int
+) -> int:
+    """Finds where a dragon following the trail heads
+
+    Parameters
+    ----------
+    trail: dict : see make_trail
+
+    offsets: iterable : the moves of the grid, see cells.make_grid
+
+    cell: int : the dragon's cell
+
+    player_cell: int : where the trail ends
+
+
+    Returns the neighbouring cell with the freshest scent, player_cell if
+    none is fresher than the dragon's own cell
+    -------
+
+    """
+    best_cell = player_cell
+    best_scent = scent_at(trail, cell)
+    for offset in offsets:
+        scent = scent_at(trail, cell + offset)
+        if scent > best_scent:
+            best_cell, best_scent = cell + offset, scent
+
+    return best_cell
+
+
+def follow_trail(
+    grid: Dict,
+    trail: Dict,
+    occupancy: array,
+    player_cell: int,
+    targets: Dict[int, int]
+) -> None:
+    """Alerts the dragons on or next to the trail and finds where each
+    heads
+
+    Parameters
+    ----------
+    grid: dict : flat grid of the map, see cells.make_grid
+
+    trail: dict : see make_trail
+
+    occupancy: array : dragon on every cell, see cells.make_occupancy
+
+    player_cell: int : where the trail ends
+
+    targets: dict : index of each alerted dragon to the cell it heads
+    for, dragons already in it are left as they are
+
+
+    Returns None
+    -------
+
+    """
+    offsets = grid['offsets']
+    near = (0, *offsets)
+    for cell in trail['scent']:
+        for offset in near:
+            dragon = occupancy[cell + offset] - 1
+            if dragon >= 0 and dragon not in targets:
+                targets[dragon] = freshest_neighbour(
+                    trail, offsets, cell + offset, player_cell
+                )
+
+
+def split_targets(targets: Dict[int, int]) -> Tuple[array, array]:
+    """Turns the targets of the alerted dragons into arrays for
+    engine.dragon_moves
+
+    Parameters
+    ----------
+    targets: dict : index of each alerted dragon to the cell it heads for
+
+
+    Returns array('i') of the alerted dragons in order and array('i') of
+    their targets
+    -------
+
+    """
+    alerted = array('i', sorted(targets))
+    return alerted, array('i', [targets[dragon] for dragon in alerted])
@@ -0,0 +1,345 @@
+"""The player store, players split across shard files by username hash
+
+Every shard is a small file in the same layout as the old database.json,
+{"players": {...}}, so it can still be read and edited by hand. A player
+always lives in the shard the hash of their name picks, so registering
+or updating a player rewrites that one shard and never the others.
+
+Each shard keeps its players in leaderboard order, lowest win ratio
+first, so the leaderboard is a streaming k-way merge of the shards. The
+number of shards is in players/shards.json and can be changed with the
+reshard command.
+
+The store is opened before the first menu is shown, so bulk.py and
+tempfile are only imported by the functions that write or stream shards.
+"""
+import os
+import sys
+import json
+import zlib
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Tuple
+)
+
+STORE_DIR: str = 'players'
+MANIFEST: str = os.path.join(STORE_DIR, 'shards.json')
+# held while shards are read and rewritten, sessions share the store
+STORE_LOCK: str = os.path.join(STORE_DIR, 'store.lock')
+# shards of a new store
+SHARDS: int = 16
+# the single file players were kept in before there were shards
+OLD_DATABASE: str = 'database.json'
+
+
+def shard_of(user_name: str, shard_num: int) -> int:
+    """Finds the shard a player lives in
+
+    Parameters
+    ----------
+    user_name: str : username of the player
+
+    shard_num: int : number of shards of the store
+
+
+    Returns index of the shard
+    -------
+
+    """
+    # hash() changes between processes, the shard must not
+    return zlib.crc32(user_name.encode()) % shard_num
+
+
+def shard_path(index: int, shard_num: int) -> str:
+    """Finds the file of a shard
+
+    Parameters
+    ----------
+    index: int : index of the shard
+
+    shard_num: int : number of shards of the store
+
+
+    Returns path of the shard file
+    -------
+
+    """
+    return os.path.join(STORE_DIR, f"{shard_num}-{index:04}.json")
+
+
+def shard_count() -> int:
+    """Reads the number of shards from the manifest"""
+    with open(MANIFEST) as manifest:
+        return json.load(manifest)['shards']
+
+
+def write_manifest(shard_num: int) -> None:
+    """Switches the store to shard_num shards, in one rename
+
+    Parameters
+    ----------
+    shard_num: int : number of shards of the store
+
+
+    Returns None
+    -------
+
+    """
+    import tempfile
+    from dungeon_and_dragons.helper.files import file_mode
+
+    with tempfile.NamedTemporaryFile(
+        'w', dir=STORE_DIR, suffix='.tmp', delete=False
+    ) as manifest:
+        json.dump({'shards': shard_num}, manifest)
+    os.chmod(manifest.name, file_mode(MANIFEST))
+    os.replace(manifest.name, MANIFEST)
+
+
+def leaderboard_key(player: Tuple[str, Dict]) -> Tuple[float, str]:
+    """The order players are kept in inside a shard
+
+    Parameters
+    ----------
+    player: tuple : (user name, stats)
+
+
+    Returns the sort key, win ratio then name
+    -------
+
+    """
+    user_name, stats = player
+    return stats['win ratio'], user_name
+
+
+def make_store() -> None:
+    """Creates the store if it isn't created yet
+
+    The players of an old database.json are moved into the new shards,
+    the file itself is left as it is and isn't used after that
+
+    Returns None
+    -------
+
+    """
+    if os.path.exists(MANIFEST):
+        return
+
+    from dungeon_and_dragons.bulk import iter_players
+
+    os.makedirs(STORE_DIR, exist_ok=True)
+    players = list()
+    if os.path.exists(OLD_DATABASE):
+        players = iter_players(OLD_DATABASE)
+    write_shards(players, SHARDS)
+    write_manifest(SHARDS)
+
+
+def read_shard(index: int, shard_num: int) -> Dict[str, Dict]:
+    """Loads the players of one shard
+
+    Parameters
+    ----------
+    index: int : index of the shard
+
+    shard_num: int : number of shards of the store
+
+
+    Returns dict of user name to stats
+    -------
+
+    """
+    with open(shard_path(index, shard_num)) as shard:
+        return json.load(shard)['players']
+
+
+def write_shard(index: int, shard_num: int, players: Dict[str, Dict]) -> None:
+    """Rewrites one shard, in leaderboard order
+
+    Parameters
+    ----------
+    index: int : index of the shard
+
+    shard_num: int : number of shards of the store
+
+    players: dict : all players of the shard
+
+
+    Returns None
+    -------
+
+    """
+    from dungeon_and_dragons.bulk import write_players
+
+    write_players(
+        shard_path(index, shard_num),
+        sorted(players.items(), key=leaderboard_key)
+    )
+
+
+def get_player(user_name: str) -> Dict:
+    """Reads the stats of a player from their shard
+
+    Parameters
+    ----------
+    user_name: str : username of the player
+
+
+    Returns stats of the player, None if they aren't registered
+    -------
+
+    """
+    shard_num = shard_count()
+    return read_shard(shard_of(user_name, shard_num), shard_num).get(
+        user_name
+    )
+
+
+def update_players(changes: Dict[str, Dict]) -> None:
+    """Writes the stats of players, rewriting only the shards they are in
+
+    Parameters
+    ----------
+    changes: dict : user name to their new stats
+
+
+    Returns None
+    -------
+
+    """
+    from dungeon_and_dragons.helper.files import locked
+
+    # another session rewriting the same shard in between would lose the
+    # players it wrote, or these
+    with locked(STORE_LOCK):
+        shard_num = shard_count()
+        by_shard = dict()
+        for user_name, stats in changes.items():
+            by_shard.setdefault(shard_of(user_name, shard_num), dict())[
+                user_name
+            ] = stats
+        for index, shard_changes in by_shard.items():
+            players = read_shard(index, shard_num)
+            players.update(shard_changes)
+            write_shard(index, shard_num, players)
+
+
+def iter_leaderboard() -> Iterator[Tuple[str, Dict]]:
+    """Reads the players of every shard, lowest win ratio first
+
+    The shards are streamed and merged, one player of each is in memory
+    at a time
+
+    Returns generator of (user name, stats) pairs
+    -------
+
+    """
+    import heapq
+    from dungeon_and_dragons.bulk import iter_players
+
+    shard_num = shard_count()
+    yield from heapq.merge(
+        *(
+            iter_players(shard_path(index, shard_num))
+            for index in range(shard_num)
+        ),
+        key=leaderboard_key
+    )
+
+
+def write_shards(players: Iterable[Tuple[str, Dict]], shard_num: int) -> int:
+    """Writes all players into shard_num new shard files
+
+    Players are spilled to one temporary file per shard first, then each
+    shard is sorted and written on its own, so only one shard is in
+    memory at a time. Every player is spilled before the first shard is
+    written, so players may come from the shards being rewritten
+
+    Parameters
+    ----------
+    players: iterable : (user name, stats) pairs
+
+    shard_num: int : number of shards to write
+
+
+    Returns number of players written
+    -------
+
+    """
+    import tempfile
+
+    spills = [tempfile.TemporaryFile('w+') for _ in range(shard_num)]
+    written = 0
+    try:
+        for user_name, stats in players:
+            spills[shard_of(user_name, shard_num)].write(
+                json.dumps([user_name, stats]) + '\n'
+            )
+            written += 1
+        for index, spill in enumerate(spills):
+            spill.seek(0)
+            write_shard(
+                index,
+                shard_num,
+                dict(json.loads(line) for line in spill)
+            )
+    finally:
+        for spill in spills:
+            spill.close()
+
+    return written
+
+
+def shard_files(shard_num: int) -> List[str]:
+    """Lists the files of a store of shard_num shards
+
+    Parameters
+    ----------
+    shard_num: int : number of shards of the store
+
+
+    Returns list of paths
+    -------
+
+    """
+    return [shard_path(index, shard_num) for index in range(shard_num)]
+
+
+def reshard_command(args) -> None:
+    """Moves every player into a new number of shards
+
+    The new shards are written next to the old ones and the manifest is
+    switched to them in one rename, then the old shards are removed
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    from dungeon_and_dragons.helper.files import locked
+
+    if args.shards < 1:
+        sys.exit('the store needs at least one shard')
+    make_store()
+    # games finished while the players are moved would be written to the
+    # old shards and lost
+    with locked(STORE_LOCK):
+        old_num = shard_count()
+        if args.shards == old_num:
+            print(f"the store already has {old_num} shards",
+                  file=sys.stderr)
+            return
+
+        written = write_shards(iter_leaderboard(), args.shards)
+        write_manifest(args.shards)
+        for path in shard_files(old_num):
+            os.remove(path)
+    print(f"moved {written} players from {old_num} to {args.shards} shards",
+          file=sys.stderr)
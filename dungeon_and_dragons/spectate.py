@@ -0,0 +1,348 @@
+"""Live game state in shared memory, for spectators in other processes
+
+A broadcasting game keeps its grid, the positions of the player and the
+dragons and its hearts in one multiprocessing.shared_memory block. Every
+cell of the grid is one byte, an index into a small table of glyphs.
+
+Updates follow a sequence-number protocol: the game makes the sequence
+number odd, writes the state and makes it even again. A spectator reads
+the number, builds its frame straight from the block and reads the number
+again; if it was odd or has changed the frame is thrown away and read
+again. The game never waits for or even knows about its spectators, so
+any number of them can watch without slowing it down.
+"""
+import sys
+import time
+import atexit
+import struct
+from multiprocessing import (
+    resource_tracker,
+    shared_memory
+)
+from typing import (
+    Dict,
+    List
+)
+from dungeon_and_dragons.helper.types import (
+    GameMap,
+    Coordinate
+)
+from dungeon_and_dragons.render import clear_terminal
+
+MAGIC: bytes = b'DNDG'
+# changed with the layout of the block, spectators check it
+VERSION: int = 2
+# magic, version, ended, width, height, sequence, hearts, player x and y,
+# number of dragons
+HEADER = struct.Struct('<4sBBII2xQiIII')
+# where the ended flag and the sequence number are in the header
+ENDED_OFFSET: int = 5
+SEQUENCE = struct.Struct('<Q')
+SEQUENCE_OFFSET: int = 16
+NAME_SIZE: int = 32
+# glyphs a grid may use, 0 is shown for any glyph past the table
+GLYPHS: int = 32
+GLYPH_SIZE: int = 16
+UNKNOWN_GLYPH: str = '?'
+DRAGON = struct.Struct('<II')
+# rows of the grid whose glyph bytes are kept before the cache is emptied
+MAX_ROWS: int = 4096
+# how dragons are shown when spectators see all of them
+REVEALED_DRAGON: str = '🐉'
+
+
+def block_layout(width: int, height: int) -> Dict[str, int]:
+    """Computes where each part of the state is in the block
+
+    Parameters
+    ----------
+    width: int : width of the map
+
+    height: int : height of the map
+
+
+    Returns dict of offsets, and the size of the block
+    -------
+
+    """
+    name = HEADER.size
+    glyphs = name + NAME_SIZE
+    grid = glyphs + GLYPHS * GLYPH_SIZE
+    # every cell may hold a dragon
+    dragons = grid + width * height
+    return {
+        'name': name,
+        'glyphs': glyphs,
+        'grid': grid,
+        'dragons': dragons,
+        'size': dragons + width * height * DRAGON.size,
+    }
+
+
+def start_broadcast(
+    name: str,
+    width: int,
+    height: int,
+    user_name: str
+) -> Dict:
+    """Creates the shared memory block of a game, exits if another game
+    is broadcasting with the same name
+
+    Parameters
+    ----------
+    name: str : name spectators attach to
+
+    width: int : width of the map
+
+    height: int : height of the map
+
+    user_name: str : the player, shown to spectators
+
+
+    Returns the broadcast dict
+    -------
+
+    """
+    layout = block_layout(width, height)
+    try:
+        block = shared_memory.SharedMemory(
+            name=name, create=True, size=layout['size']
+        )
+    except FileExistsError:
+        # the resource tracker removes the block of a game that crashed,
+        # so the name is used by a game that is still running
+        sys.exit(
+            f"a game is already broadcasting as '{name}', "
+            "choose another name with play --broadcast NAME"
+        )
+    buffer = block.buf
+    HEADER.pack_into(
+        buffer, 0, MAGIC, VERSION, False, width, height, 0, 0, 0, 0, 0
+    )
+    encoded_name = user_name.encode()[:NAME_SIZE]
+    buffer[layout['name']:layout['name'] + len(encoded_name)] = encoded_name
+    broadcast = {
+        'block': block,
+        'layout': layout,
+        'width': width,
+        'height': height,
+        'sequence': 0,
+        'glyphs': dict(),
+        # the byte of every glyph of a grid row, cached by row
+        'rows': dict(),
+    }
+    write_glyph(broadcast, UNKNOWN_GLYPH)
+    atexit.register(end_broadcast, broadcast)
+
+    return broadcast
+
+
+def write_glyph(broadcast: Dict, glyph: str) -> int:
+    """Adds a glyph to the table of the block
+
+    Parameters
+    ----------
+    broadcast: dict : see start_broadcast
+
+    glyph: str : how a cell is shown
+
+
+    Returns index of the glyph, 0 if the table is full
+    -------
+
+    """
+    glyphs = broadcast['glyphs']
+    if glyph in glyphs:
+        return glyphs[glyph]
+    if len(glyphs) == GLYPHS:
+        return 0
+
+    index = len(glyphs)
+    encoded = glyph.encode()[:GLYPH_SIZE].ljust(GLYPH_SIZE, b'\0')
+    offset = broadcast['layout']['glyphs'] + index * GLYPH_SIZE
+    broadcast['block'].buf[offset:offset + GLYPH_SIZE] = encoded
+    glyphs[glyph] = index
+
+    return index
+
+
+def publish(
+    broadcast: Dict,
+    game_map: GameMap,
+    player_info: Coordinate,
+    dragons_pos: List[Coordinate],
+    hearts: List[str]
+) -> None:
+    """Writes the current state of the game for its spectators
+
+    Parameters
+    ----------
+    broadcast: dict : see start_broadcast
+
+    game_map: list : map of the game
+
+    player_info: tuple : player's coords on the map
+
+    dragons_pos: list : dragons coords on the map
+
+    hearts: list :  the health bar of the player
+
+
+    Returns None
+    -------
+
+    """
+    buffer = broadcast['block'].buf
+    layout = broadcast['layout']
+    width = broadcast['width']
+    # odd while the state is being written
+    broadcast['sequence'] += 1
+    SEQUENCE.pack_into(buffer, SEQUENCE_OFFSET, broadcast['sequence'])
+
+    grid = layout['grid']
+    for y, row in enumerate(game_map):
+        row = ''.join(row)
+        if row not in broadcast['rows']:
+            if len(broadcast['rows']) >= MAX_ROWS:
+                broadcast['rows'].clear()
+            broadcast['rows'][row] = bytes(
+                write_glyph(broadcast, glyph) for glyph in row
+            )
+        buffer[grid + y * width:grid + (y + 1) * width] = (
+            broadcast['rows'][row]
+        )
+    for index, (x, y) in enumerate(dragons_pos):
+        DRAGON.pack_into(buffer, layout['dragons'] + index * DRAGON.size, x, y)
+    HEADER.pack_into(
+        buffer, 0, MAGIC, VERSION, False, width, broadcast['height'],
+        broadcast['sequence'], len(hearts), *player_info, len(dragons_pos)
+    )
+
+    broadcast['sequence'] += 1
+    SEQUENCE.pack_into(buffer, SEQUENCE_OFFSET, broadcast['sequence'])
+
+
+def end_broadcast(broadcast: Dict) -> None:
+    """Tells the spectators the game has ended and removes the block
+
+    Parameters
+    ----------
+    broadcast: dict : see start_broadcast
+
+
+    Returns None
+    -------
+
+    """
+    block = broadcast['block']
+    block.buf[ENDED_OFFSET] = True
+    block.close()
+    block.unlink()
+
+
+def read_frame(block: shared_memory.SharedMemory, reveal: bool) -> Dict:
+    """Builds a frame from the block, without copying the block
+
+    Parameters
+    ----------
+    block: SharedMemory : the block of the game
+
+    reveal: bool : whether dragons the player can't see are shown
+
+
+    Returns dict of the frame, None if the game was writing to the block
+    -------
+
+    """
+    buffer = block.buf
+    header = HEADER.unpack_from(buffer, 0)
+    _, _, ended, width, height, sequence, hearts, x, y, dragon_num = header
+    if sequence % 2:
+        return None
+
+    layout = block_layout(width, height)
+    glyphs = [
+        bytes(buffer[offset:offset + GLYPH_SIZE]).rstrip(b'\0').decode(
+            errors='replace'
+        ) or UNKNOWN_GLYPH
+        for offset in range(
+            layout['glyphs'], layout['grid'], GLYPH_SIZE
+        )
+    ]
+    rows = [
+        [glyphs[cell] for cell in buffer[start:start + width]]
+        for start in range(
+            layout['grid'], layout['grid'] + width * height, width
+        )
+    ]
+    if reveal:
+        for index in range(min(dragon_num, width * height)):
+            dragon_x, dragon_y = DRAGON.unpack_from(
+                buffer, layout['dragons'] + index * DRAGON.size
+            )
+            # a torn read can have any numbers, it's thrown away below
+            if dragon_x < width and dragon_y < height:
+                rows[dragon_y][dragon_x] = REVEALED_DRAGON
+    name = bytes(buffer[layout['name']:layout['glyphs']])
+
+    # the game wrote to the block while it was read
+    if SEQUENCE.unpack_from(buffer, SEQUENCE_OFFSET)[0] != sequence:
+        return None
+
+    return {
+        'sequence': sequence,
+        'ended': ended,
+        'user_name': name.rstrip(b'\0').decode(errors='replace'),
+        'rows': rows,
+        'hearts': hearts,
+        'player_info': (x, y),
+        'dragons': dragon_num,
+    }
+
+
+def spectate_command(args) -> None:
+    """Watches a broadcasting game until it ends
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    try:
+        block = shared_memory.SharedMemory(name=args.name)
+    except FileNotFoundError:
+        sys.exit(f"no game is broadcasting as '{args.name}'")
+    # attaching registers the block too, so the tracker would remove it
+    # from under the game when the spectator exits
+    resource_tracker.unregister(block._name, 'shared_memory')
+    if bytes(block.buf[:len(MAGIC)]) != MAGIC:
+        block.close()
+        sys.exit(f"'{args.name}' isn't a game")
+    if block.buf[len(MAGIC)] != VERSION:
+        block.close()
+        sys.exit(f"'{args.name}' is broadcast by another version of the game")
+
+    last_sequence = None
+    try:
+        while True:
+            frame = read_frame(block, args.reveal)
+            if frame is not None and frame['sequence'] != last_sequence:
+                last_sequence = frame['sequence']
+                clear_terminal()
+                for row in frame['rows']:
+                    print(''.join(row))
+                print(f"Player: {frame['user_name']}")
+                print(f"Health: {' '.join('💜' * frame['hearts'])}")
+                print(f"Dragons: {frame['dragons']}")
+            if frame is not None and frame['ended']:
+                print('The game has ended.')
+                break
+            time.sleep(1 / args.fps)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        block.close()
@@ -0,0 +1,388 @@
+"""Per-game telemetry and the command that aggregates it
+
+Every game appends one compact json line to telemetry.ndjson when it ends.
+Lines are buffered and flushed when the process exits, and the file is
+rotated once it grows past MAX_BYTES, keeping BACKUPS old files as
+telemetry.ndjson.1, .2, ...
+
+Many sessions may write to the same file, so every flush takes a lock,
+opens the file again, appends the lines and rotates the file if the
+flush filled it. A session never keeps writing to a file another one
+has rotated.
+
+Latencies and the aggregated distributions are kept in log-bucketed
+histograms, so summaries take constant memory however many values go in.
+"""
+import os
+import sys
+import json
+import time
+import atexit
+from glob import glob
+from math import (
+    floor,
+    log
+)
+from typing import (
+    Dict,
+    Iterable,
+    Iterator,
+    List
+)
+from dungeon_and_dragons.helper.files import locked
+
+TELEMETRY_FILE: str = 'telemetry.ndjson'
+# held by the session that flushes or rotates, not matched by the
+# telemetry.ndjson* files telemetry-stats reads
+TELEMETRY_LOCK: str = 'telemetry.lock'
+# size at which the telemetry file is rotated
+MAX_BYTES: int = 16 * 1024 * 1024
+# rotated files that are kept
+BACKUPS: int = 5
+# bytes buffered before the lines are flushed to the telemetry file
+BUFFER_SIZE: int = 64 * 1024
+# bucket width of the histograms, quantiles are within ~2.5%
+GROWTH: float = 1.05
+# numbers of the records that telemetry-stats summarises
+NUMERIC_FIELDS: Dict[str, tuple] = {
+    'turns': ('turns',),
+    'duration (s)': ('duration',),
+    'mean turn latency (ms)': ('latency', 'mean'),
+    'p95 turn latency (ms)': ('latency', 'p95'),
+    'alerts': ('alerts',),
+}
+
+# lines not flushed to the telemetry file yet, and their size
+pending: List[str] = list()
+pending_bytes: int = 0
+
+
+def make_histogram() -> Dict:
+    """Creates an empty histogram
+
+    Returns the histogram dict
+    -------
+
+    """
+    return {
+        'count': 0, 'total': 0.0, 'min': None, 'max': None, 'buckets': {}
+    }
+
+
+def add_to_histogram(histogram: Dict, value: float) -> None:
+    """Adds a value to a histogram in O(1)
+
+    Parameters
+    ----------
+    histogram: dict : see make_histogram
+
+    value: float : a value that isn't negative
+
+
+    Returns None
+    -------
+
+    """
+    histogram['count'] += 1
+    histogram['total'] += value
+    if histogram['min'] is None or value < histogram['min']:
+        histogram['min'] = value
+    if histogram['max'] is None or value > histogram['max']:
+        histogram['max'] = value
+    # values under 1e-6 share one bucket
+    bucket = floor(log(value, GROWTH)) if value > 1e-6 else None
+    histogram['buckets'][bucket] = histogram['buckets'].get(bucket, 0) + 1
+
+
+def histogram_quantile(histogram: Dict, quantile: float) -> float:
+    """Estimates a quantile of the values in a histogram
+
+    Parameters
+    ----------
+    histogram: dict : see make_histogram
+
+    quantile: float : between 0 and 1
+
+
+    Returns the estimate, None if the histogram is empty
+    -------
+
+    """
+    if not histogram['count']:
+        return None
+    rank = quantile * (histogram['count'] - 1)
+    seen = histogram['buckets'].get(None, 0)
+    if rank < seen:
+        return histogram['min']
+    for bucket in sorted(b for b in histogram['buckets'] if b is not None):
+        seen += histogram['buckets'][bucket]
+        if rank < seen:
+            # middle of the bucket, clamped to the values really seen
+            estimate = GROWTH ** (bucket + 0.5)
+            return min(max(estimate, histogram['min']), histogram['max'])
+
+    return histogram['max']
+
+
+def summarise_histogram(histogram: Dict, scale: float = 1) -> Dict:
+    """Summarises a histogram as count, mean, quantiles and max
+
+    Parameters
+    ----------
+    histogram: dict : see make_histogram
+
+    scale: float : every number is multiplied by it, e.g. 1000 for ms
+
+
+    Returns dict of the summary, rounded to 3 decimals
+    -------
+
+    """
+    count = histogram['count']
+    summary = {
+        'count': count,
+        'mean': histogram['total'] / count if count else None,
+        'min': histogram['min'],
+        'p50': histogram_quantile(histogram, 0.5),
+        'p95': histogram_quantile(histogram, 0.95),
+        'p99': histogram_quantile(histogram, 0.99),
+        'max': histogram['max'],
+    }
+    return {
+        key: round(value * scale, 3) if value is not None and key != 'count'
+        else value for key, value in summary.items()
+    }
+
+
+def start_game_telemetry(settings: Dict) -> Dict:
+    """Starts recording the telemetry of a game
+
+    Parameters
+    ----------
+    settings: dict : difficulty, map size, dragons, health etc.
+
+
+    Returns the telemetry of the game
+    -------
+
+    """
+    return {
+        'started': time.time(),
+        'clock': time.perf_counter(),
+        'settings': settings,
+        'turns': 0,
+        'alerts': 0,
+        'alerted': False,
+        'latency': make_histogram(),
+    }
+
+
+def record_turn(telemetry: Dict, latency: float, alerted: bool) -> None:
+    """Records one turn of the game
+
+    Parameters
+    ----------
+    telemetry: dict : the telemetry of the game
+
+    latency: float : seconds the turn took to play
+
+    alerted: bool : whether any dragon was alerted after the turn
+
+
+    Returns None
+    -------
+
+    """
+    telemetry['turns'] += 1
+    add_to_histogram(telemetry['latency'], latency)
+    # an alert is counted when it starts, not for every turn it lasts
+    if alerted and not telemetry['alerted']:
+        telemetry['alerts'] += 1
+    telemetry['alerted'] = alerted
+
+
+def finish_game_telemetry(telemetry: Dict, result: str, cause: str) -> None:
+    """Writes the telemetry record of a game that has ended
+
+    Parameters
+    ----------
+    telemetry: dict : the telemetry of the game
+
+    result: str : 'win', 'loss' or 'quit'
+
+    cause: str : what ended the game, 'door', 'caught', 'hearts' or 'quit'
+
+
+    Returns None
+    -------
+
+    """
+    latency = summarise_histogram(telemetry['latency'], scale=1000)
+    write_record({
+        'started': round(telemetry['started'], 3),
+        'settings': telemetry['settings'],
+        'turns': telemetry['turns'],
+        'duration': round(time.perf_counter() - telemetry['clock'], 3),
+        'latency': {
+            key: latency[key] for key in ('mean', 'p50', 'p95', 'max')
+        },
+        'alerts': telemetry['alerts'],
+        'result': result,
+        'cause': cause,
+    })
+
+
+def write_record(record: Dict) -> None:
+    """Buffers a record for the telemetry file, flushing once the buffer
+    is full
+
+    Parameters
+    ----------
+    record: dict : the record
+
+
+    Returns None
+    -------
+
+    """
+    global pending_bytes
+    line = json.dumps(record, separators=(',', ':')) + '\n'
+    if not pending:
+        atexit.register(flush_records)
+    pending.append(line)
+    pending_bytes += len(line.encode())
+    if pending_bytes >= BUFFER_SIZE:
+        flush_records()
+
+
+def flush_records() -> None:
+    """Appends the buffered records to the telemetry file and rotates it
+    if it's full, holding the lock of the file"""
+    global pending_bytes
+    if not pending:
+        return
+    with locked(TELEMETRY_LOCK):
+        # opened again every time, another session may have rotated it
+        with open(TELEMETRY_FILE, 'a') as telemetry_file:
+            telemetry_file.write(''.join(pending))
+        size = os.path.getsize(TELEMETRY_FILE)
+        pending.clear()
+        pending_bytes = 0
+        atexit.unregister(flush_records)
+        if size >= MAX_BYTES:
+            rotate()
+
+
+def rotate() -> None:
+    """Moves the full telemetry file to .1, .1 to .2 and so on, the lock
+    must be held"""
+    for number in range(BACKUPS - 1, 0, -1):
+        if os.path.exists(f"{TELEMETRY_FILE}.{number}"):
+            os.replace(
+                f"{TELEMETRY_FILE}.{number}", f"{TELEMETRY_FILE}.{number + 1}"
+            )
+    os.replace(TELEMETRY_FILE, f"{TELEMETRY_FILE}.1")
+
+
+def read_records(paths: Iterable[str]) -> Iterator[Dict]:
+    """Reads telemetry records one line at a time
+
+    Parameters
+    ----------
+    paths: iterable : telemetry files, '-' reads stdin
+
+
+    Returns generator of records, broken lines are skipped
+    -------
+
+    """
+    for path in paths:
+        telemetry_file = sys.stdin if path == '-' else open(path)
+        try:
+            for line in telemetry_file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
+        finally:
+            if telemetry_file is not sys.stdin:
+                telemetry_file.close()
+
+
+def aggregate(records: Iterable[Dict]) -> Dict:
+    """Computes distributions over telemetry records in one pass
+
+    Parameters
+    ----------
+    records: iterable : telemetry records
+
+
+    Returns dict with the number of games, counts of results, causes and
+    difficulties and a histogram for each of NUMERIC_FIELDS
+    -------
+
+    """
+    summary = {
+        'games': 0,
+        'results': dict(),
+        'causes': dict(),
+        'difficulties': dict(),
+        'numbers': {name: make_histogram() for name in NUMERIC_FIELDS},
+    }
+    for record in records:
+        summary['games'] += 1
+        for counter, value in (
+            ('results', record.get('result')),
+            ('causes', record.get('cause')),
+            ('difficulties', record.get('settings', {}).get('difficulty')),
+        ):
+            summary[counter][value] = summary[counter].get(value, 0) + 1
+        for name, keys in NUMERIC_FIELDS.items():
+            value = record
+            for key in keys:
+                value = value.get(key) if isinstance(value, dict) else None
+            if isinstance(value, (int, float)):
+                add_to_histogram(summary['numbers'][name], value)
+
+    return summary
+
+
+def stats_command(args) -> None:
+    """Prints distributions over the telemetry files
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    paths = args.files or sorted(
+        glob(f"{TELEMETRY_FILE}*"), key=os.path.getmtime
+    )
+    summary = aggregate(read_records(paths))
+    numbers = {
+        name: summarise_histogram(histogram)
+        for name, histogram in summary.pop('numbers').items()
+    }
+    if args.json:
+        print(json.dumps({**summary, 'numbers': numbers}, indent=4))
+        return
+
+    print(f"games: {summary['games']}")
+    for counter in ('results', 'causes', 'difficulties'):
+        counts = ', '.join(
+            f"{key}: {value}" for key, value in sorted(
+                summary[counter].items(), key=lambda item: -item[1]
+            )
+        )
+        print(f"{counter}: {counts}")
+    print()
+    columns = ('count', 'mean', 'min', 'p50', 'p95', 'p99', 'max')
+    print(f"{'':24}" + ''.join(f"{column:>10}" for column in columns))
+    for name, number in numbers.items():
+        cells = ['-' if number[column] is None else number[column]
+                 for column in columns]
+        print(f"{name:24}" + ''.join(f"{cell:>10}" for cell in cells))
@@ -0,0 +1,245 @@
+"""Zygote server, every session is forked from an already warm process
+
+`serve` imports the game and everything its pages use, creates the
+player store if there is none and then waits on a unix socket. Each
+connection is handed to a forked child, which starts the game straight
+away: it shares the parent's loaded modules, so no session pays for
+interpreter startup or imports. Nothing of the store is kept in memory,
+the sessions rewrite its shards, so every session reads them from disk
+like a game started on its own would.
+
+`connect` sends its terminal to the server over the socket (SCM_RIGHTS)
+and the child plays on it as if it had been started there, then tells the
+client its exit status. A client that sends no file descriptors plays on
+the socket itself, and one that sends no hello at all, e.g. `nc -U`, is
+given HELLO_WAIT seconds before it does.
+
+The parent never starts a thread, so forking it is safe.
+"""
+import os
+import sys
+import json
+import signal
+import select
+import socket
+from importlib import import_module
+from typing import List
+
+# modules imported before the first fork, the game and all of its pages
+PRELOAD: List[str] = [
+    'dungeon_and_dragons.game',
+    'dungeon_and_dragons.leaderboard',
+    'dungeon_and_dragons.multiplayer',
+    'dungeon_and_dragons.realtime',
+    'dungeon_and_dragons.mapcache',
+    'dungeon_and_dragons.bulk',
+    'argparse',
+    'tempfile',
+    'heapq',
+]
+# largest hello message, see connect_command
+HELLO_SIZE: int = 64 * 1024
+# seconds a session waits for the hello before it plays on the socket
+HELLO_WAIT: float = 0.05
+# seconds accept waits before finished sessions are reaped
+REAP_EVERY: float = 1.0
+
+
+def preload():
+    """Imports the game modules, creates the player store if needed, keeps
+    the clear sequence of the server's terminal and builds the command
+    line parser the sessions use
+
+    Returns the parser
+    -------
+
+    """
+    for module in PRELOAD:
+        import_module(module)
+    from dungeon_and_dragons.cli import make_parser
+    from dungeon_and_dragons.database import make_initial_database
+    from dungeon_and_dragons.render import clear_sequence
+
+    make_initial_database()
+    # most sessions run in the same kind of terminal as the server
+    clear_sequence(os.environ.get('TERM', ''))
+    return make_parser()
+
+
+def reap_sessions() -> None:
+    """Collects the exit status of sessions that have ended"""
+    try:
+        while os.waitpid(-1, os.WNOHANG)[0]:
+            pass
+    except ChildProcessError:
+        # no sessions left
+        pass
+
+
+def read_hello(connection: socket.socket) -> tuple:
+    """Reads the settings and terminal a client sends when it connects
+
+    The hello is a json object, sent on its own with the file descriptors
+    of the terminal. Anything else is left to be read as the game's input
+
+    Parameters
+    ----------
+    connection: socket : the client's connection
+
+
+    Returns the hello dict and the list of file descriptors sent with it
+    -------
+
+    """
+    readable, _, _ = select.select([connection], [], [], HELLO_WAIT)
+    if not readable or connection.recv(1, socket.MSG_PEEK) != b'{':
+        return dict(), list()
+
+    hello, fds, _, _ = socket.recv_fds(connection, HELLO_SIZE, 3)
+    try:
+        return json.loads(hello), fds
+    except ValueError:
+        return dict(), fds
+
+
+def run_session(connection: socket.socket, parser) -> None:
+    """Plays one session in a forked child, never returns
+
+    Parameters
+    ----------
+    connection: socket : the client's connection
+
+    parser: ArgumentParser : see preload
+
+
+    Returns None
+    -------
+
+    """
+    # out of the server's session, so the client's terminal never sees it
+    # as a background job
+    os.setsid()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    hello, fds = read_hello(connection)
+    for target, fd in enumerate(fds or [connection.fileno()] * 3):
+        os.dup2(fd, target)
+    for fd in fds:
+        os.close(fd)
+    # the streams were set up for the server's stdio
+    sys.stdin = open(0, 'r', closefd=False)
+    sys.stdout = open(1, 'w', buffering=1, closefd=False)
+    sys.stderr = open(2, 'w', buffering=1, closefd=False)
+    if hello.get('term'):
+        os.environ['TERM'] = hello['term']
+    # the NumPy engine has its own generator, random reseeds by itself
+    kernel = sys.modules.get('dungeon_and_dragons.helper.dragon_kernel')
+    if kernel is not None:
+        kernel.rng = kernel.np.random.default_rng()
+    if fds:
+        # only a client that gave its terminal reads replies
+        connection.sendall(f"pid {os.getpid()}\n".encode())
+
+    code = 0
+    try:
+        args = parser.parse_args(['play', *hello.get('args', [])])
+        args.handler(args)
+    except SystemExit as exit:
+        # like the interpreter does, None is success and a message failure
+        code = exit.code if isinstance(exit.code, int) else int(
+            exit.code is not None
+        )
+    except KeyboardInterrupt:
+        code = 128 + signal.SIGINT
+    sys.stdout.flush()
+    if fds:
+        connection.sendall(f"exit {code}\n".encode())
+    # ends the child the normal way, so the game's atexit handlers run
+    sys.exit(code)
+
+
+def serve_command(args) -> None:
+    """Preloads the game and forks a session for every connection
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    parser = preload()
+    if os.path.exists(args.socket):
+        os.remove(args.socket)
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    listener.bind(args.socket)
+    listener.listen(socket.SOMAXCONN)
+    listener.settimeout(REAP_EVERY)
+    server_pid = os.getpid()
+    # so a terminated server removes its socket too
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+    print(f"serving on {args.socket}", file=sys.stderr)
+    try:
+        while True:
+            reap_sessions()
+            try:
+                connection, _ = listener.accept()
+            except socket.timeout:
+                continue
+            connection.settimeout(None)
+            if not os.fork():
+                listener.close()
+                run_session(connection, parser)
+            connection.close()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # a session's SystemExit passes through here too
+        if os.getpid() == server_pid:
+            listener.close()
+            os.remove(args.socket)
+
+
+def connect_command(args) -> None:
+    """Plays a game on this terminal in a session forked by the server
+
+    Parameters
+    ----------
+    args: Namespace : parsed command line arguments
+
+
+    Returns None
+    -------
+
+    """
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(args.socket)
+    except OSError as error:
+        sys.exit(f"no server on {args.socket}: {error.strerror}")
+    play_args = args.play_args
+    if play_args[:1] == ['play']:
+        play_args = play_args[1:]
+    hello = {'args': play_args, 'term': os.environ.get('TERM', '')}
+    socket.send_fds(client, [json.dumps(hello).encode()], [0, 1, 2])
+
+    # keys like ^C signal this process, the session is told instead
+    session_pid = None
+
+    def forward(signum, _) -> None:
+        if session_pid is not None:
+            os.kill(session_pid, signum)
+
+    for signum in (signal.SIGINT, signal.SIGTERM, signal.SIGHUP):
+        signal.signal(signum, forward)
+
+    code = 1
+    with client.makefile('r') as replies:
+        for reply in replies:
+            name, _, value = reply.partition(' ')
+            if name == 'pid':
+                session_pid = int(value)
+            elif name == 'exit':
+                code = int(value)
+    sys.exit(code)
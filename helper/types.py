@@ -1,7 +0,0 @@
-from typing import (
-    List,
-    NewType
-)
-
-GameMap = NewType('GameMap', List[List[str]])
-Coordinate = NewType("Coordinate", tuple[int, int])
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""Tests of export, import and merge of player stats"""
+import io
+import json
+
+import pytest
+
+from dungeon_and_dragons import bulk
+from dungeon_and_dragons.rollups import (
+    add_game,
+    make_rollups,
+    merge_rollups
+)
+
+
+def make_stats(won, lost, games=()):
+    rollups = make_rollups()
+    for result, day in games:
+        add_game(rollups, result, 10, day)
+    return {
+        'password': 'pw',
+        'games won': won,
+        'games lost': lost,
+        'win ratio': won / (won + lost) * 100 if won + lost else 0,
+        'rollups': rollups,
+    }
+
+
+@pytest.mark.parametrize('file_format', ['ndjson', 'csv'])
+def test_records_round_trip(tmp_path, file_format):
+    players = [('amy', make_stats(3, 1)), ('bob', make_stats(0, 2))]
+    path = tmp_path / f'players.{file_format}'
+    with open(path, 'w', newline='') as out:
+        assert bulk.write_records(players, out, file_format) == 2
+
+    read = list(bulk.read_players(str(path)))
+    assert [name for name, _ in read] == ['amy', 'bob']
+    for (_, stats), (_, original) in zip(read, players):
+        for field in bulk.CSV_FIELDS[1:]:
+            assert stats[field] == original[field]
+    if file_format == 'ndjson':
+        assert read == players
+
+
+def test_database_round_trip(tmp_path, monkeypatch):
+    # values are cut off at the end of the buffer all the time
+    monkeypatch.setattr(bulk, 'CHUNK_SIZE', 7)
+    players = [(f'player {i}', make_stats(i, 1)) for i in range(20)]
+    path = str(tmp_path / 'database.json')
+    assert bulk.write_players(path, players) == 20
+    assert list(bulk.iter_players(path)) == players
+    with open(path) as data_base:
+        assert json.load(data_base)['players'] == dict(players)
+
+    assert bulk.write_players(path, []) == 0
+    assert list(bulk.iter_players(path)) == []
+
+
+def test_lines_without_a_name_are_skipped(tmp_path, capsys):
+    path = tmp_path / 'players.ndjson'
+    path.write_text(
+        '{"name": "amy", "games won": 1}\n'
+        '{"games won": 2}\n'
+        '\n'
+        '[1, 2]\n'
+        '{"name": "bob", "games won": 3}\n'
+    )
+    read = list(bulk.read_players(str(path)))
+    assert read == [('amy', {'games won': 1}), ('bob', {'games won': 3})]
+    err = capsys.readouterr().err
+    assert f'{path}:2: skipped' in err
+    assert f'{path}:4: skipped' in err
+
+
+def test_bad_csv_rows_are_skipped(tmp_path, capsys):
+    path = tmp_path / 'players.csv'
+    path.write_text(
+        'name,password,games won,games lost,win ratio\n'
+        'amy,pw,1,0,100\n'
+        ',pw,1,0,100\n'
+        'bob,pw,one,0,100\n'
+        'cat,pw,1\n'
+        'dan,pw,0,2,0.0\n'
+    )
+    read = list(bulk.read_players(str(path)))
+    assert [name for name, _ in read] == ['amy', 'dan']
+    assert read[1][1]['games lost'] == 2
+    err = capsys.readouterr().err
+    for line_number in (3, 4, 5):
+        assert f'{path}:{line_number}: skipped' in err
+    assert f'{path}:2:' not in err and f'{path}:6:' not in err
+
+
+def test_csv_without_the_stats_columns(tmp_path, capsys):
+    path = tmp_path / 'players.csv'
+    path.write_text('name,password\namy,pw\n')
+    assert list(bulk.read_players(str(path))) == []
+    assert f'{path}:2: skipped' in capsys.readouterr().err
+
+
+def test_merge_adds_up_the_sources(monkeypatch):
+    monkeypatch.setattr(bulk, 'RUN_SIZE', 2)
+    first = [('amy', make_stats(1, 1)), ('bob', make_stats(2, 0))]
+    second = [('amy', make_stats(3, 1)), ('cat', make_stats(0, 1))]
+    merged = dict(bulk.combine_players([first, second], bulk.add_stats))
+    assert list(merged) == ['amy', 'bob', 'cat']
+    assert merged['amy']['games won'] == 4
+    assert merged['amy']['games lost'] == 2
+    assert merged['amy']['win ratio'] == pytest.approx(4 / 6 * 100)
+    assert merged['bob']['games won'] == 2
+
+
+def test_merge_rebuilds_the_rollups():
+    first_games = [('win', '2026-10-01'), ('loss', '2026-10-01'),
+                   ('win', '2026-10-02'), ('win', '2026-10-02')]
+    second_games = [('win', '2026-10-02'), ('win', '2026-10-03')]
+    merged = bulk.add_stats([
+        make_stats(3, 1, first_games), make_stats(2, 0, second_games)
+    ])
+    # the same as if every game had been played on one host
+    assert merged['rollups'] == make_stats(5, 1, first_games + second_games)[
+        'rollups'
+    ]
+
+
+def test_merge_rollups_keeps_the_limits():
+    days = [f'2026-09-{day:02}' for day in range(1, 31)]
+    first = make_stats(30, 0, [('win', day) for day in days])['rollups']
+    second = make_stats(0, 3, [('loss', '2026-10-01')] * 3)['rollups']
+    merged = merge_rollups([first, second])
+    assert merged['games'] == 33
+    assert merged['streak'] == -3
+    assert merged['best streak'] == 30
+    assert merged['recent'] == 'W' * 7 + 'L' * 3
+    assert merged['recent win rate'] == pytest.approx(70)
+    assert len(merged['daily']) == 30
+    assert list(merged['daily'])[-1] == '2026-10-01'
+
+
+def test_merge_without_rollups():
+    stats = make_stats(1, 0)
+    del stats['rollups']
+    assert 'rollups' not in bulk.add_stats([stats, dict(stats)])
+
+
+def test_write_records_to_a_stream():
+    out = io.StringIO()
+    bulk.write_records([('amy', {'games won': 1})], out, 'ndjson')
+    assert json.loads(out.getvalue()) == {'name': 'amy', 'games won': 1}
@@ -0,0 +1,20 @@
+"""Tests of the command line parser"""
+import pytest
+
+from dungeon_and_dragons.cli import make_parser
+
+
+def test_tick_rate():
+    args = make_parser().parse_args(['play', '--tick-rate', '2.5'])
+    assert args.tick_rate == 2.5
+
+
+@pytest.mark.parametrize('rate', ['0', '-1', 'nan', 'inf', 'fast'])
+def test_tick_rate_must_be_above_zero(rate):
+    with pytest.raises(SystemExit):
+        make_parser().parse_args(['play', '--tick-rate', rate])
+
+
+def test_fps_must_be_above_zero():
+    with pytest.raises(SystemExit):
+        make_parser().parse_args(['spectate', '--fps', '0'])
@@ -0,0 +1,118 @@
+"""Tests of the turn rules on the flat cells of the grid"""
+import random
+from array import array
+from collections import Counter
+
+import pytest
+
+from dungeon_and_dragons import engine
+from dungeon_and_dragons.bitboard import make_bitboard
+from dungeon_and_dragons.cells import (
+    cell_of,
+    cells_of,
+    make_grid,
+    make_occupancy
+)
+
+ALT_MOVEMENTS = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+
+
+def make_world(size, dragon_num, seed):
+    """An open square map with walls around it and dragons packed on it"""
+    wall_board = make_bitboard(size, size)
+    border = (1 << size) - 1
+    wall_board['rows'] = (
+        [border] + [1 | 1 << (size - 1)] * (size - 2) + [border]
+    )
+    grid = make_grid(wall_board, ALT_MOVEMENTS)
+    inside = [(x, y) for y in range(1, size - 1) for x in range(1, size - 1)]
+    dragon_cells = cells_of(
+        grid, random.Random(seed).sample(inside, dragon_num)
+    )
+    return grid, dragon_cells, make_occupancy(grid, dragon_cells)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_parallel_moves_keep_occupancy(monkeypatch, seed):
+    grid, dragon_cells, occupancy = make_world(200, 300, seed)
+    # the region path only runs on free-threaded builds otherwise
+    monkeypatch.setattr(engine, 'parallel_enabled', lambda: True)
+    alerted = array('i', range(len(dragon_cells)))
+    random.seed(seed)
+    for _ in range(20):
+        engine.dragon_moves(
+            grid, alerted, dragon_cells, occupancy,
+            cell_of(grid, (100, 100))
+        )
+        assert occupancy == make_occupancy(grid, dragon_cells)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_serial_moves_keep_occupancy(seed):
+    grid, dragon_cells, occupancy = make_world(40, 300, seed)
+    alerted = array('i', range(0, len(dragon_cells), 2))
+    random.seed(seed)
+    for _ in range(20):
+        engine.dragon_moves(
+            grid, alerted, dragon_cells, occupancy, cell_of(grid, (20, 20))
+        )
+        assert occupancy == make_occupancy(grid, dragon_cells)
+        assert len(set(dragon_cells)) == len(dragon_cells)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_batched_moves_keep_occupancy(seed):
+    kernel = pytest.importorskip('dungeon_and_dragons.helper.dragon_kernel')
+    grid, dragon_cells, occupancy = make_world(60, 600, seed)
+    wall_mask = kernel.make_wall_mask(grid)
+    alerted = array('i', range(len(dragon_cells)))
+    for _ in range(20):
+        engine.dragon_moves(
+            grid, alerted, dragon_cells, occupancy,
+            cell_of(grid, (30, 30)), wall_mask
+        )
+        assert occupancy == make_occupancy(grid, dragon_cells)
+
+
+def move_counts(kernel=None):
+    """Counts the steps of dragons far apart, half of them near their
+    target and half far from it"""
+    grid, _, _ = make_world(100, 0, 0)
+    stride = grid['stride']
+    # 3 cells apart no two dragons can pick the same cell
+    dragon_cells = cells_of(grid, [
+        (x, y) for y in range(2, 97, 3) for x in range(2, 97, 3)
+    ])
+    alerted = array('i', range(len(dragon_cells)))
+    targets = array('i', [
+        cell + (1 + stride if dragon % 2 else 5 + 3 * stride)
+        for dragon, cell in enumerate(dragon_cells)
+    ])
+    counts = Counter()
+    for _ in range(4):
+        moved = array('i', dragon_cells)
+        occupancy = make_occupancy(grid, moved)
+        engine.dragon_moves(
+            grid, alerted, moved, occupancy, None,
+            kernel.make_wall_mask(grid) if kernel else None, targets
+        )
+        counts.update(
+            (dragon % 2, new - old)
+            for dragon, (old, new) in enumerate(zip(dragon_cells, moved))
+        )
+    return counts
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_batched_moves_follow_the_serial_odds(monkeypatch, seed):
+    kernel = pytest.importorskip('dungeon_and_dragons.helper.dragon_kernel')
+    random.seed(seed)
+    serial = move_counts()
+    monkeypatch.setattr(kernel, 'rng', kernel.np.random.default_rng(seed))
+    batched = move_counts(kernel)
+    # the same moves are possible, with the same odds within noise
+    assert set(serial) == set(batched)
+    total = sum(serial.values()) / 2
+    assert sum(batched.values()) / 2 == total
+    for step in serial:
+        assert abs(serial[step] - batched[step]) / total < 0.04
@@ -0,0 +1,110 @@
+"""Tests of the field of view on small hand-drawn maps"""
+import pytest
+
+from dungeon_and_dragons import fov
+from dungeon_and_dragons.bitboard import bitboard_from_map
+from dungeon_and_dragons.cells import (
+    cells_of,
+    make_grid,
+    make_occupancy
+)
+from dungeon_and_dragons.engine import is_dragonsmellrange
+
+ALT_MOVEMENTS = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+
+# a room split by a wall with a gap, P is where the player stands and
+# a and b are dragons, b is hidden behind the wall
+ROOM = [
+    '.........',
+    '.P...#...',
+    '.....#.b.',
+    '.a...#...',
+    '.........',
+]
+
+
+def board_of(rows):
+    return bitboard_from_map([list(row) for row in rows], '#')
+
+
+def find(rows, glyph):
+    return next(
+        (x, y) for y, row in enumerate(rows)
+        for x, cell in enumerate(row) if cell == glyph
+    )
+
+
+def test_open_map_sees_the_whole_radius():
+    board = board_of(['.' * 11] * 11)
+    visible = fov.field_of_view(fov.make_fov_cache(board, 3), (5, 5))
+    assert visible == {
+        (x, y) for x in range(11) for y in range(11)
+        if (x - 5) ** 2 + (y - 5) ** 2 <= 9
+    }
+
+
+def test_walls_block_sight():
+    board = board_of(ROOM)
+    visible = fov.field_of_view(fov.make_fov_cache(board, 8), find(ROOM, 'P'))
+    assert find(ROOM, 'a') in visible
+    assert find(ROOM, 'b') not in visible
+    # the wall itself is seen, what is right behind it isn't
+    assert (5, 1) in visible and (6, 1) not in visible
+    # sight goes around the end of the wall
+    assert (6, 4) in visible
+
+
+def test_walls_block_smell():
+    board = board_of(ROOM)
+    grid = make_grid(board, ALT_MOVEMENTS)
+    occupancy = make_occupancy(
+        grid, cells_of(grid, [find(ROOM, 'a'), find(ROOM, 'b')])
+    )
+    player = find(ROOM, 'P')
+    visible = fov.field_of_view(fov.make_fov_cache(board, 8), player)
+    assert list(is_dragonsmellrange(grid, occupancy, player, 8)) == [0, 1]
+    assert list(
+        is_dragonsmellrange(grid, occupancy, player, 8, visible)
+    ) == [0]
+
+
+def mirror(cells, width, height, flip_x, flip_y):
+    return {
+        (width - 1 - x if flip_x else x, height - 1 - y if flip_y else y)
+        for x, y in cells
+    }
+
+
+@pytest.mark.parametrize('origin', [(0, 0), (0, 3), (4, 0), (1, 1)])
+def test_map_edges_are_symmetric(origin):
+    # the map is symmetric, so the view from a mirrored origin is mirrored
+    rows = [
+        '........',
+        '.#....#.',
+        '........',
+        '........',
+        '.#....#.',
+        '........',
+    ]
+    width, height = len(rows[0]), len(rows)
+    cache = fov.make_fov_cache(board_of(rows), 5)
+    visible = fov.field_of_view(cache, origin)
+    assert all(0 <= x < width and 0 <= y < height for x, y in visible)
+    for flip_x, flip_y in ((True, False), (False, True), (True, True)):
+        (mirrored,) = mirror([origin], width, height, flip_x, flip_y)
+        assert fov.field_of_view(cache, mirrored) == mirror(
+            visible, width, height, flip_x, flip_y
+        )
+
+
+def test_views_are_cached_per_position(monkeypatch):
+    monkeypatch.setattr(fov, 'MAX_FIELDS', 3)
+    cache = fov.make_fov_cache(board_of(ROOM), 4)
+    first = fov.field_of_view(cache, (1, 1))
+    assert fov.field_of_view(cache, (1, 1)) is first
+    for origin in [(2, 1), (3, 1), (4, 1)]:
+        fov.field_of_view(cache, origin)
+    # the oldest view was dropped and is computed again
+    assert list(cache['fields']) == [(2, 1), (3, 1), (4, 1)]
+    again = fov.field_of_view(cache, (1, 1))
+    assert again == first and again is not first
@@ -0,0 +1,139 @@
+"""Tests of undoing moves with the turn history"""
+import random
+from array import array
+
+import pytest
+
+from dungeon_and_dragons import engine
+from dungeon_and_dragons.bitboard import make_bitboard
+from dungeon_and_dragons.cells import (
+    cell_of,
+    cells_of,
+    coord_of,
+    make_grid,
+    make_occupancy
+)
+from dungeon_and_dragons.history import (
+    KEYFRAME_EVERY,
+    make_history,
+    player_positions,
+    push_turn,
+    rewind
+)
+
+ALT_MOVEMENTS = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+SIZE = 30
+TURNS = 2 * KEYFRAME_EVERY + 5
+
+
+def play_game(seed):
+    """Plays TURNS turns on an open map and keeps the state of every turn"""
+    wall_board = make_bitboard(SIZE, SIZE)
+    border = (1 << SIZE) - 1
+    wall_board['rows'] = (
+        [border] + [1 | 1 << (SIZE - 1)] * (SIZE - 2) + [border]
+    )
+    grid = make_grid(wall_board, ALT_MOVEMENTS)
+    rng = random.Random(seed)
+    inside = [(x, y) for y in range(1, SIZE - 1) for x in range(1, SIZE - 1)]
+    dragon_cells = cells_of(grid, rng.sample(inside, 60))
+    occupancy = make_occupancy(grid, dragon_cells)
+    player_info = (1, 1)
+    health = 4
+    history = make_history(player_info, dragon_cells, health)
+    states = [(player_info, array('i', dragon_cells), health)]
+
+    random.seed(seed)
+    for turn in range(1, TURNS + 1):
+        player_info = rng.choice(inside)
+        health = max(health - (turn % 10 == 0), 0)
+        alerted = array('i', sorted(rng.sample(range(60), 20)))
+        engine.dragon_moves(
+            grid, alerted, dragon_cells, occupancy,
+            cell_of(grid, player_info)
+        )
+        push_turn(
+            history,
+            player_info,
+            [(dragon, dragon_cells[dragon]) for dragon in alerted],
+            dragon_cells,
+            health
+        )
+        states.append((player_info, array('i', dragon_cells), health))
+
+    return grid, history, states
+
+
+@pytest.mark.parametrize('turn', [
+    0, 1, KEYFRAME_EVERY - 1, KEYFRAME_EVERY, KEYFRAME_EVERY + 1,
+    2 * KEYFRAME_EVERY, TURNS - 1, TURNS
+])
+def test_rewind_restores_every_turn(turn):
+    _, history, states = play_game(1)
+    assert rewind(history, turn) == states[turn]
+    assert history['turn'] == turn
+    assert len(history['deltas']) == turn
+    assert all(key <= turn for key in history['keyframes'])
+
+
+def test_undo_one_turn_at_a_time():
+    _, history, states = play_game(2)
+    for turn in range(TURNS - 1, -1, -1):
+        assert rewind(history, turn) == states[turn]
+
+
+@pytest.mark.parametrize('turn', [-1, TURNS + 1])
+def test_rewind_outside_the_history(turn):
+    _, history, _ = play_game(3)
+    with pytest.raises(ValueError):
+        rewind(history, turn)
+    # a failed rewind forgets nothing
+    assert history['turn'] == TURNS
+
+
+def test_turns_after_a_rewind_across_a_keyframe():
+    _, history, states = play_game(4)
+    rewind(history, KEYFRAME_EVERY - 2)
+    # the keyframe dropped by the rewind is stored again
+    for turn in (KEYFRAME_EVERY - 1, KEYFRAME_EVERY):
+        player_info, dragon_cells, health = states[turn]
+        push_turn(
+            history,
+            player_info,
+            list(enumerate(dragon_cells)),
+            dragon_cells,
+            health
+        )
+    assert KEYFRAME_EVERY in history['keyframes']
+    assert rewind(history, KEYFRAME_EVERY) == states[KEYFRAME_EVERY]
+
+
+def test_occupancy_after_rewind():
+    grid, history, states = play_game(5)
+    _, dragon_cells, _ = rewind(history, KEYFRAME_EVERY + 3)
+    occupancy = make_occupancy(grid, dragon_cells)
+    assert len(set(dragon_cells)) == len(dragon_cells)
+    for dragon, cell in enumerate(dragon_cells):
+        assert occupancy[cell] == dragon + 1
+    assert sum(1 for dragon in occupancy if dragon) == len(dragon_cells)
+    # the dragons can move on from the rewound turn
+    engine.dragon_moves(
+        grid, array('i', range(len(dragon_cells))), dragon_cells,
+        occupancy, cell_of(grid, (15, 15))
+    )
+    assert occupancy == make_occupancy(grid, dragon_cells)
+    assert all(
+        0 <= coord_of(grid, cell)[0] < SIZE for cell in dragon_cells
+    )
+
+
+def test_player_positions():
+    _, history, states = play_game(6)
+    assert player_positions(history, 3) == [
+        state[0] for state in states[-3:]
+    ]
+    rewind(history, 2)
+    # the start of the game is added when there are fewer turns
+    assert player_positions(history, 5) == [
+        state[0] for state in states[:3]
+    ]
@@ -0,0 +1,59 @@
+"""Tests of the cache of generated levels"""
+import pytest
+
+from dungeon_and_dragons import mapcache
+from dungeon_and_dragons.bitboard import make_bitboard
+
+TILE = '.'
+WALL = '#'
+
+
+def test_level_round_trip(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    level = mapcache.load_level(20, 15, '4', 12, TILE, WALL, seed=3)
+    cached = mapcache.load_level(20, 15, '4', 5, TILE, WALL, seed=3)
+    assert cached['wall_board'] == level['wall_board']
+    assert cached['game_map'] == level['game_map']
+    assert cached['player_info'] == level['player_info']
+    assert cached['dungeon_door_pos'] == level['dungeon_door_pos']
+    assert cached['dragons_pos'] == level['dragons_pos'][:5]
+
+
+def test_sizes_past_16_bits():
+    width, dragon_num = 70_000, 66_000
+    wall_board = make_bitboard(width, 3)
+    wall_board['rows'] = [(1 << width) - 1, 1 | 1 << (width - 1), 0]
+    level = {
+        'wall_board': wall_board,
+        'player_info': (width - 2, 1),
+        'dungeon_door_pos': (1, 1),
+        'dragons_pos': [(x, 2) for x in range(dragon_num)],
+    }
+    unpacked = mapcache.unpack_level(mapcache.pack_level(level), TILE, WALL)
+    assert unpacked['wall_board'] == wall_board
+    assert unpacked['player_info'] == level['player_info']
+    assert unpacked['dungeon_door_pos'] == level['dungeon_door_pos']
+    assert unpacked['dragons_pos'] == level['dragons_pos']
+
+
+def test_unseeded_levels_skip_the_cache(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    mapcache.load_level(20, 15, '4', 3, TILE, WALL)
+    assert not (tmp_path / mapcache.CACHE_DIR).exists()
+
+
+def test_cut_off_level_is_rejected(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    level = mapcache.load_level(20, 15, '4', 0, TILE, WALL, seed=3)
+    data = mapcache.pack_level(level)
+    with pytest.raises(ValueError):
+        mapcache.unpack_level(data[:-1], TILE, WALL)
+    with pytest.raises(ValueError):
+        mapcache.unpack_level(data + b'\0', TILE, WALL)
+
+    # a cut off file is generated again
+    path = mapcache.level_path(20, 15, '4', 3)
+    with open(path, 'wb') as level_file:
+        level_file.write(data[:mapcache.HEADER.size + 2])
+    reloaded = mapcache.load_level(20, 15, '4', 0, TILE, WALL, seed=3)
+    assert reloaded['wall_board'] == level['wall_board']
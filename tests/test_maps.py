@@ -0,0 +1,46 @@
+"""Tests of level generation"""
+import pytest
+
+from dungeon_and_dragons.maps import (
+    create_map,
+    dragon_room,
+    generate_level
+)
+from dungeon_and_dragons.regions import (
+    make_region_index,
+    region_of
+)
+
+TILE = '.'
+WALL = '#'
+
+
+@pytest.mark.parametrize('width', range(3, 31))
+def test_every_size_makes_a_level(width):
+    for height in range(3, 31):
+        level = generate_level(width, height, 0, TILE, WALL, seed=1)
+        game_map = level['game_map']
+        assert len(game_map) == height
+        assert all(len(row) == width for row in game_map)
+        assert all(isinstance(row, list) for row in game_map)
+        regions = make_region_index(level['wall_board'])
+        start = region_of(regions, level['player_info'])
+        assert start != -1
+        assert region_of(regions, level['dungeon_door_pos']) == start
+
+
+def test_plus_is_in_the_middle():
+    game_map = create_map(21, 11, TILE, WALL)
+    assert game_map[11 // 2][3:21 - 3] == [WALL] * (21 - 6)
+    assert [row[(21 - 1) // 2] for row in game_map[3:11 - 3]] == (
+        [WALL] * (11 - 6)
+    )
+    assert game_map[0] == [WALL] * 21 and game_map[-1] == [WALL] * 21
+
+
+@pytest.mark.parametrize('width', range(3, 31))
+def test_dragon_room_fits(width):
+    for height in range(3, 31):
+        room = dragon_room(width, height, TILE, WALL)
+        level = generate_level(width, height, room, TILE, WALL, seed=1)
+        assert len(set(level['dragons_pos'])) == room
@@ -0,0 +1,64 @@
+"""Tests of the move parser"""
+import io
+
+import pytest
+
+from dungeon_and_dragons.menus import (
+    MAX_REPEAT,
+    get_input,
+    parse_moves
+)
+
+VALID = ('up', 'down', 'left', 'right', 'undo')
+
+
+def test_single_moves():
+    assert parse_moves('up', VALID) == ['up']
+    assert parse_moves('  Up  LEFT\n', VALID) == ['up', 'left']
+
+
+def test_chains_are_expanded():
+    assert parse_moves('up*3 left*2 down', VALID) == (
+        ['up'] * 3 + ['left'] * 2 + ['down']
+    )
+    assert parse_moves('up*0', VALID) == []
+
+
+@pytest.mark.parametrize('player_input', [
+    'jump',
+    'up*-1',
+    'up*x',
+    'up*1.5',
+    'up*²',
+    'up*⑤',
+    f'up*{MAX_REPEAT + 1}',
+    'up*99999999999999999999',
+    'up left*2 jump',
+])
+def test_invalid_input_is_rejected(player_input):
+    assert parse_moves(player_input, VALID) == []
+
+
+def test_repeat_limit():
+    assert len(parse_moves(f'up*{MAX_REPEAT}', VALID)) == MAX_REPEAT
+
+
+def test_stream_input_is_read_line_by_line(monkeypatch):
+    # like a socket, it has no file behind it
+    monkeypatch.setattr('sys.stdin', io.StringIO('up*2\nleft\n'))
+    assert get_input(VALID) == ['up', 'up']
+    assert get_input(VALID) == ['left']
+    with pytest.raises(EOFError):
+        get_input(VALID)
+
+
+def test_move_script_is_chained(tmp_path, monkeypatch):
+    script = tmp_path / 'moves.txt'
+    script.write_text('up*2\njump\n\nleft\ndown*2 right\n')
+    with open(script) as stdin:
+        monkeypatch.setattr('sys.stdin', stdin)
+        assert get_input(VALID) == [
+            'up', 'up', 'left', 'down', 'down', 'right'
+        ]
+        with pytest.raises(EOFError):
+            get_input(VALID)
@@ -0,0 +1,270 @@
+"""Tests of the shared-map mode with several players"""
+import random
+from array import array
+
+import pytest
+
+from dungeon_and_dragons import (
+    engine,
+    multiplayer,
+    telemetry
+)
+from dungeon_and_dragons.bitboard import (
+    bitboard_from_map,
+    make_bitboard
+)
+from dungeon_and_dragons.cells import (
+    cell_of,
+    cells_of,
+    coords_of,
+    make_grid,
+    make_occupancy
+)
+from dungeon_and_dragons.fov import make_fov_cache
+from dungeon_and_dragons.nearest import (
+    make_player_index,
+    place_player
+)
+from dungeon_and_dragons.scent import trail_from
+
+MOVEMENTS = {'up': (0, -1), 'down': (0, 1), 'right': (1, 0), 'left': (-1, 0)}
+ALT_MOVEMENTS = list(MOVEMENTS.values())
+
+# A and B are players, a b c and h are dragons, h is hidden from A behind
+# the wall and too far from B
+ROOM = [
+    '................',
+    '.A...#.......B..',
+    '.....#h.b.......',
+    '.a...#.......c..',
+    '................',
+]
+
+
+def find(rows, glyph):
+    return next(
+        (x, y) for y, row in enumerate(rows)
+        for x, cell in enumerate(row) if cell == glyph
+    )
+
+
+def open_board(size):
+    wall_board = make_bitboard(size, size)
+    border = (1 << size) - 1
+    wall_board['rows'] = (
+        [border] + [1 | 1 << (size - 1)] * (size - 2) + [border]
+    )
+    return wall_board
+
+
+def make_game(wall_board, dragons_pos, players, smell_zone, wall_mask=None):
+    """The game dict of game.main, without what is only drawn"""
+    grid = make_grid(wall_board, ALT_MOVEMENTS)
+    dragon_cells = cells_of(grid, dragons_pos)
+    return {
+        'grid': grid,
+        'occupancy': make_occupancy(grid, dragon_cells),
+        'wall_mask': wall_mask,
+        'quit_button': 'q',
+        'valid_inputs': (*MOVEMENTS, 'q'),
+        'movements': MOVEMENTS,
+        'smell_zone': smell_zone,
+        'fov_cache': make_fov_cache(wall_board, max(smell_zone, 3)),
+        'dragon_cells': dragon_cells,
+        'dragon': 'D',
+        'visible_dragon': 'V',
+        'terrain': None,
+        'dungeon_door_pos': (-1, -1),
+        'players': players,
+        'broadcast': None,
+    }
+
+
+def place_players(game, positions):
+    """Puts the players on the map like play_multiplayer does"""
+    player_index = make_player_index(game['smell_zone'])
+    for player, position in zip(game['players'], positions):
+        player['pos'] = position
+        player['trail'] = trail_from([cell_of(game['grid'], position)])
+        place_player(player_index, player['name'], position)
+    return player_index
+
+
+def spy_on_dragon_moves(monkeypatch):
+    calls = list()
+    real_dragon_moves = multiplayer.dragon_moves
+
+    def dragon_moves(grid, alerted, dragon_cells, *args):
+        calls.append((array('i', alerted), array('i', dragon_cells), args))
+        real_dragon_moves(grid, alerted, dragon_cells, *args)
+
+    monkeypatch.setattr(multiplayer, 'dragon_moves', dragon_moves)
+    return calls
+
+
+@pytest.fixture
+def records(tmp_path, monkeypatch):
+    # telemetry of the players who are out is written to the work dir
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, 'pending', list())
+
+
+@pytest.fixture
+def quiet(records, monkeypatch):
+    for name in ('clear_terminal', 'draw_canvas', 'print_info', 'print_logo'):
+        monkeypatch.setattr(multiplayer, name, lambda *args: None)
+    monkeypatch.setattr(multiplayer, 'compose_frame', lambda *args: None)
+    monkeypatch.setattr(multiplayer.time, 'sleep', lambda seconds: None)
+
+
+def test_glyphs_in_login_order():
+    players = multiplayer.make_players(
+        ['amy', 'bob', 'cat'], (1, 2), 3, {'difficulty': 'easy'}
+    )
+    assert [player['name'] for player in players] == ['amy', 'bob', 'cat']
+    assert [player['glyph'] for player in players] == list(
+        multiplayer.PLAYER_GLYPHS[:3]
+    )
+    for player in players:
+        assert player['pos'] == (1, 2)
+        assert len(player['hearts']) == 3
+        assert player['state'] == 'ongoing'
+        assert player['telemetry']['settings']['players'] == 3
+    # every player has their own hearts and telemetry
+    assert players[0]['hearts'] is not players[1]['hearts']
+    assert players[0]['telemetry'] is not players[1]['telemetry']
+
+
+def test_dragons_chase_the_players_they_smell(monkeypatch):
+    players = multiplayer.make_players(['amy', 'bob'], (0, 0), 3, {})
+    dragons_pos = [find(ROOM, glyph) for glyph in 'ahbc']
+    game = make_game(
+        bitboard_from_map([list(row) for row in ROOM], '#'),
+        dragons_pos,
+        players,
+        smell_zone=6
+    )
+    player_index = place_players(game, [find(ROOM, 'A'), find(ROOM, 'B')])
+    calls = spy_on_dragon_moves(monkeypatch)
+    multiplayer.dragons_turn(game, player_index)
+
+    ((alerted, _, args),) = calls
+    # each dragon heads for the nearest player it smells, walls block smell
+    assert list(alerted) == [0, 2, 3]
+    amy_cell, bob_cell = cells_of(
+        game['grid'], [player['pos'] for player in players]
+    )
+    assert list(args[-1]) == [amy_cell, bob_cell, bob_cell]
+    assert game['dragon_cells'][1] == cell_of(game['grid'], dragons_pos[1])
+
+
+def test_players_out_of_the_game_are_not_chased(records, monkeypatch):
+    players = multiplayer.make_players(['amy', 'bob'], (0, 0), 3, {})
+    game = make_game(
+        bitboard_from_map([list(row) for row in ROOM], '#'),
+        [find(ROOM, glyph) for glyph in 'ahbc'],
+        players,
+        smell_zone=6
+    )
+    player_index = place_players(game, [find(ROOM, 'A'), find(ROOM, 'B')])
+    multiplayer.end_player(game, players[1], player_index, 'quit', 'quit')
+    calls = spy_on_dragon_moves(monkeypatch)
+    multiplayer.dragons_turn(game, player_index)
+
+    ((alerted, _, _),) = calls
+    assert list(alerted) == [0]
+
+
+def end_of_input():
+    raise EOFError
+
+
+def test_dragons_move_once_per_round(quiet, monkeypatch):
+    random.seed(0)
+    # amy walks to the door, bob walks past a dragon and then quits
+    moves = ['right', 'down'] * 3
+    monkeypatch.setattr(
+        multiplayer, 'get_input',
+        lambda valid_inputs: [moves.pop(0)] if moves else end_of_input()
+    )
+    results = dict()
+    monkeypatch.setattr(
+        multiplayer, 'update_results',
+        lambda won_lost, turns: results.update(won_lost=won_lost, turns=turns)
+    )
+    players = multiplayer.make_players(['amy', 'bob'], (1, 1), 4, {})
+    game = make_game(open_board(12), [(3, 5), (9, 9)], players, smell_zone=3)
+    game['dungeon_door_pos'] = (4, 1)
+
+    rounds = list()
+    dragons = list()
+    real_dragons_turn = multiplayer.dragons_turn
+
+    def dragons_turn(game, player_index):
+        before = coords_of(game['grid'], game['dragon_cells'])
+        real_dragons_turn(game, player_index)
+        after = coords_of(game['grid'], game['dragon_cells'])
+        rounds.append([player['pos'] for player in players])
+        dragons.append(after)
+        # no dragon takes more than one step in a round
+        for (x, y), (new_x, new_y) in zip(before, after):
+            assert abs(new_x - x) + abs(new_y - y) <= 1
+
+    monkeypatch.setattr(multiplayer, 'dragons_turn', dragons_turn)
+    multiplayer.play_multiplayer(game)
+
+    assert rounds == [
+        [(2, 1), (1, 2)],
+        [(3, 1), (1, 3)],
+        [(4, 1), (1, 4)],
+        # amy is through the door, bob quits at the end of the moves
+        [(4, 1), (1, 4)],
+    ]
+    assert [player['state'] for player in players] == ['win', 'quit']
+    assert results == {'won_lost': {'amy': 'win'}, 'turns': {'amy': 3}}
+    # the first dragon smells bob from the second round on, the other one
+    # is too far from both
+    assert dragons[0][0] == (3, 5)
+    assert dragons[1][0] != (3, 5)
+    assert all(round_dragons[1] == (9, 9) for round_dragons in dragons)
+
+
+def test_batched_dragons_keep_the_occupancy(monkeypatch):
+    kernel = engine.get_dragon_kernel()
+    if kernel is None:
+        pytest.skip('NumPy is not installed')
+    batches = list()
+    real_batched_dragon_moves = kernel.batched_dragon_moves
+
+    def batched_dragon_moves(wall_mask, grid, alerted, *args):
+        batches.append(len(alerted))
+        return real_batched_dragon_moves(wall_mask, grid, alerted, *args)
+
+    monkeypatch.setattr(kernel, 'batched_dragon_moves', batched_dragon_moves)
+
+    rng = random.Random(1)
+    wall_board = open_board(40)
+    grid = make_grid(wall_board, ALT_MOVEMENTS)
+    # two swarms, one around each player
+    dragons_pos = rng.sample([
+        (x, y) for y in range(1, 39) for x in range(1, 39)
+        if min(abs(x - 10) + abs(y - 10), abs(x - 28) + abs(y - 28)) in (3, 4)
+    ], 48)
+    players = multiplayer.make_players(['amy', 'bob'], (0, 0), 3, {})
+    game = make_game(
+        wall_board, dragons_pos, players,
+        smell_zone=6, wall_mask=kernel.make_wall_mask(grid)
+    )
+    player_index = place_players(game, [(10, 10), (28, 28)])
+    for _ in range(5):
+        before = coords_of(grid, game['dragon_cells'])
+        multiplayer.dragons_turn(game, player_index)
+        after = coords_of(grid, game['dragon_cells'])
+        assert len(set(after)) == len(after)
+        assert game['occupancy'] == make_occupancy(grid, game['dragon_cells'])
+        assert not any(grid['walls'][cell] for cell in game['dragon_cells'])
+        for (x, y), (new_x, new_y) in zip(before, after):
+            assert abs(new_x - x) + abs(new_y - y) <= 1
+
+    assert len(batches) == 5
+    assert all(size >= engine.MIN_BATCH_SIZE for size in batches)
@@ -0,0 +1,67 @@
+"""Tests of the bucket index of player positions"""
+import random
+from math import dist
+
+import pytest
+
+from dungeon_and_dragons.nearest import (
+    make_player_index,
+    place_player,
+    players_near,
+    remove_player
+)
+
+
+def brute_force(positions, cell, max_distance):
+    return sorted(
+        (dist(cell, position), name)
+        for name, position in positions.items()
+        if dist(cell, position) <= max_distance
+    )
+
+
+@pytest.mark.parametrize('bucket_size', [1, 3, 5, 12])
+def test_matches_a_brute_force_search(bucket_size):
+    rng = random.Random(bucket_size)
+    index = make_player_index(bucket_size)
+    positions = dict()
+    for step in range(300):
+        name = f'player {rng.randrange(20)}'
+        if name in positions and rng.random() < 0.2:
+            remove_player(index, name)
+            del positions[name]
+        else:
+            positions[name] = (rng.randrange(40), rng.randrange(40))
+            place_player(index, name, positions[name])
+
+        cell = (rng.randrange(40), rng.randrange(40))
+        max_distance = rng.choice([0, 1, 2.5, 5, 9])
+        assert players_near(index, cell, max_distance) == brute_force(
+            positions, cell, max_distance
+        )
+    # empty buckets are dropped
+    assert all(index['buckets'].values())
+    assert index['positions'] == positions
+
+
+def test_nearest_first_and_ties_by_name():
+    index = make_player_index(5)
+    place_player(index, 'bob', (3, 0))
+    place_player(index, 'amy', (0, 3))
+    place_player(index, 'cat', (1, 1))
+    place_player(index, 'dan', (20, 20))
+    assert [name for _, name in players_near(index, (0, 0), 5)] == [
+        'cat', 'amy', 'bob'
+    ]
+
+
+def test_moving_between_buckets():
+    index = make_player_index(4)
+    place_player(index, 'amy', (1, 1))
+    place_player(index, 'amy', (2, 2))
+    assert index['buckets'] == {(0, 0): {'amy'}}
+    place_player(index, 'amy', (9, 1))
+    assert index['buckets'] == {(2, 0): {'amy'}}
+    assert players_near(index, (1, 1), 5) == []
+    remove_player(index, 'amy')
+    assert index == make_player_index(4)
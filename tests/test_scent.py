@@ -0,0 +1,123 @@
+"""Tests of the player's decaying scent trail"""
+from dungeon_and_dragons.bitboard import make_bitboard
+from dungeon_and_dragons.cells import (
+    cell_of,
+    cells_of,
+    make_grid,
+    make_occupancy
+)
+from dungeon_and_dragons.scent import (
+    follow_trail,
+    freshest_neighbour,
+    leave_scent,
+    make_trail,
+    scent_at,
+    split_targets,
+    trail_from
+)
+
+ALT_MOVEMENTS = [(0, -1), (0, 1), (1, 0), (-1, 0)]
+
+
+def open_grid(size):
+    return make_grid(make_bitboard(size, size), ALT_MOVEMENTS)
+
+
+def test_scent_decays_along_the_trail():
+    trail = trail_from([10, 11, 12, 13], length=6)
+    assert [scent_at(trail, cell) for cell in (10, 11, 12, 13)] == [
+        3, 4, 5, 6
+    ]
+    assert scent_at(trail, 99) == 0
+
+
+def test_ring_buffer_wraps_around():
+    trail = make_trail(4)
+    for cell in range(100, 110):
+        leave_scent(trail, cell)
+    # slot turn % 4 holds the cell of that turn
+    assert list(trail['cells']) == [108, 109, 106, 107]
+    assert trail['scent'] == {106: 6, 107: 7, 108: 8, 109: 9}
+    assert [scent_at(trail, cell) for cell in (106, 107, 108, 109)] == [
+        1, 2, 3, 4
+    ]
+
+
+def test_scent_expires():
+    trail = trail_from([5], length=3)
+    for cell in (6, 7):
+        leave_scent(trail, cell)
+    assert scent_at(trail, 5) == 1
+    leave_scent(trail, 8)
+    assert scent_at(trail, 5) == 0
+    assert 5 not in trail['scent']
+
+
+def test_walking_a_cell_again_refreshes_it():
+    trail = trail_from([1, 2, 1], length=3)
+    # the slot of the first visit is reused, the second visit is kept
+    leave_scent(trail, 3)
+    assert scent_at(trail, 1) == 2
+    assert trail_from([1, 2, 1, 3], length=3) == trail
+
+
+def test_freshest_neighbour():
+    grid = open_grid(10)
+    path = [cell_of(grid, (x, 5)) for x in range(1, 6)]
+    trail = trail_from(path)
+    offsets = grid['offsets']
+    player_cell = path[-1]
+    # next to the trail, the dragon steps onto its freshest cell
+    below = cell_of(grid, (3, 6))
+    assert freshest_neighbour(trail, offsets, below, player_cell) == (
+        cell_of(grid, (3, 5))
+    )
+    # on the trail, it heads on towards the player
+    assert freshest_neighbour(trail, offsets, path[1], player_cell) == (
+        path[2]
+    )
+    # nothing fresher around, it heads for the player
+    assert freshest_neighbour(trail, offsets, path[-1], player_cell) == (
+        player_cell
+    )
+
+
+def test_only_dragons_near_the_trail_follow_it():
+    grid = open_grid(10)
+    path = [cell_of(grid, (x, 5)) for x in range(1, 6)]
+    trail = trail_from(path)
+    dragons = cells_of(grid, [(2, 5), (4, 6), (8, 8), (3, 1)])
+    occupancy = make_occupancy(grid, dragons)
+    # a dragon that already has a target keeps it
+    targets = {3: cell_of(grid, (0, 0))}
+    follow_trail(grid, trail, occupancy, path[-1], targets)
+    assert targets == {
+        0: cell_of(grid, (3, 5)),
+        1: cell_of(grid, (4, 5)),
+        3: cell_of(grid, (0, 0)),
+    }
+    alerted, cells = split_targets(targets)
+    assert list(alerted) == [0, 1, 3]
+    assert list(cells) == [targets[0], targets[1], targets[3]]
+
+
+def test_a_dragon_follows_the_trail_to_the_player():
+    grid = open_grid(12)
+    # an L shaped walk, the dragon can't cut the corner off the trail
+    path = [cell_of(grid, (1, y)) for y in range(1, 9)] + [
+        cell_of(grid, (x, 8)) for x in range(2, 9)
+    ]
+    trail = trail_from(path)
+    dragon_cells = cells_of(grid, [(0, 1)])
+    occupancy = make_occupancy(grid, dragon_cells)
+    walked = list()
+    for _ in range(len(path)):
+        targets = dict()
+        follow_trail(grid, trail, occupancy, path[-1], targets)
+        occupancy[dragon_cells[0]] = 0
+        dragon_cells[0] = targets[0]
+        occupancy[dragon_cells[0]] = 1
+        walked.append(dragon_cells[0])
+        if dragon_cells[0] == path[-1]:
+            break
+    assert walked == path
@@ -0,0 +1,134 @@
+"""Tests of the sharded player store"""
+import json
+import multiprocessing
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from dungeon_and_dragons import shards
+from dungeon_and_dragons.database import update_results
+from dungeon_and_dragons.rollups import make_rollups
+
+
+def make_stats(won, lost):
+    games = won + lost
+    return {
+        'password': 'pw',
+        'games won': won,
+        'games lost': lost,
+        'win ratio': won / games * 100 if games else 0,
+        'rollups': make_rollups(),
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # the store lives in the working directory
+    monkeypatch.chdir(tmp_path)
+    shards.make_store()
+    return tmp_path
+
+
+def shard_contents():
+    shard_num = shards.shard_count()
+    return {
+        path: open(path).read() for path in shards.shard_files(shard_num)
+    }
+
+
+def test_shard_of_is_stable():
+    assert shards.shard_of('amy', 16) == shards.shard_of('amy', 16)
+    assert all(
+        0 <= shards.shard_of(f'player {i}', 7) < 7 for i in range(100)
+    )
+
+
+def test_players_live_in_their_shard(store):
+    names = [f'player {i}' for i in range(50)]
+    shards.update_players({name: make_stats(1, 1) for name in names})
+    shard_num = shards.shard_count()
+    for name in names:
+        index = shards.shard_of(name, shard_num)
+        assert name in shards.read_shard(index, shard_num)
+        assert shards.get_player(name) == make_stats(1, 1)
+    assert shards.get_player('nobody') is None
+
+
+def test_update_rewrites_only_the_players_shards(store):
+    shards.update_players({f'player {i}': make_stats(0, 0) for i in range(50)})
+    before = shard_contents()
+    update_results({'player 1': 'win', 'player 2': 'loss'}, {'player 1': 7})
+    after = shard_contents()
+
+    shard_num = shards.shard_count()
+    changed = {
+        shards.shard_path(shards.shard_of(name, shard_num), shard_num)
+        for name in ('player 1', 'player 2')
+    }
+    assert {path for path in before if before[path] != after[path]} == (
+        changed
+    )
+    assert shards.get_player('player 1')['games won'] == 1
+    assert shards.get_player('player 1')['rollups']['total turns'] == 7
+    assert shards.get_player('player 2')['games lost'] == 1
+    with open('history.ndjson') as history:
+        assert [json.loads(line)['name'] for line in history] == [
+            'player 1', 'player 2'
+        ]
+
+
+def test_leaderboard_merges_the_shards(store):
+    players = {f'player {i}': make_stats(i % 5, 2) for i in range(40)}
+    shards.update_players(players)
+    leaderboard = list(shards.iter_leaderboard())
+    assert sorted(players.items(), key=shards.leaderboard_key) == leaderboard
+
+
+def test_reshard_keeps_every_player(store):
+    players = {f'player {i}': make_stats(i % 3, 1) for i in range(40)}
+    shards.update_players(players)
+    old_files = shards.shard_files(shards.shard_count())
+    shards.reshard_command(SimpleNamespace(shards=5))
+    assert shards.shard_count() == 5
+    assert not any(os.path.exists(path) for path in old_files)
+    assert dict(shards.iter_leaderboard()) == players
+    for name in players:
+        assert shards.get_player(name) == players[name]
+
+
+def register_players(worker):
+    for number in range(40):
+        shards.update_players({f'player {worker}-{number}': make_stats(1, 0)})
+
+
+def test_sessions_share_a_shard(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    # every player in the one shard, all sessions rewrite it
+    monkeypatch.setattr(shards, 'SHARDS', 1)
+    shards.make_store()
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=register_players, args=(worker,))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    # no session wrote over the players of another
+    assert sorted(dict(shards.iter_leaderboard())) == sorted(
+        f'player {worker}-{number}'
+        for worker in range(4) for number in range(40)
+    )
+
+
+def test_old_database_is_moved_in(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    players = {'amy': make_stats(2, 1), 'bob': make_stats(0, 1)}
+    with open(shards.OLD_DATABASE, 'w') as data_base:
+        json.dump({'players': players}, data_base)
+    shards.make_store()
+    assert dict(shards.iter_leaderboard()) == players
@@ -0,0 +1,56 @@
+"""Tests of broadcasting a game to spectators"""
+import os
+
+import pytest
+
+from dungeon_and_dragons import spectate
+
+
+@pytest.fixture
+def name(monkeypatch):
+    # the tests end their broadcasts themselves
+    monkeypatch.setattr(spectate.atexit, 'register', lambda *args: None)
+    return f'dnd-test-{os.getpid()}'
+
+
+def test_name_in_use(name, capsys):
+    broadcast = spectate.start_broadcast(name, 5, 4, 'amy')
+    try:
+        with pytest.raises(SystemExit) as exit_info:
+            spectate.start_broadcast(name, 5, 4, 'bob')
+        assert 'already broadcasting' in str(exit_info.value)
+    finally:
+        spectate.end_broadcast(broadcast)
+
+
+def test_frame_round_trip(name):
+    broadcast = spectate.start_broadcast(name, 3, 2, 'amy')
+    try:
+        frame = [['#', '.', '#'], ['.', '@', '.']]
+        spectate.publish(broadcast, frame, (1, 1), [(0, 1)], ['💜'] * 2)
+        read = spectate.read_frame(broadcast['block'], reveal=True)
+        assert read['user_name'] == 'amy'
+        assert read['hearts'] == 2
+        assert read['player_info'] == (1, 1)
+        assert read['rows'] == [['#', '.', '#'], ['🐉', '@', '.']]
+        assert not read['ended']
+    finally:
+        spectate.end_broadcast(broadcast)
+    # the name is free again once the game has ended
+    spectate.end_broadcast(spectate.start_broadcast(name, 3, 2, 'bob'))
+
+
+def test_maps_past_16_bits(name):
+    width = 70_000
+    broadcast = spectate.start_broadcast(name, width, 3, 'amy')
+    try:
+        frame = [['.'] * width for _ in range(3)]
+        spectate.publish(
+            broadcast, frame, (width - 1, 2), [(width - 2, 0)], ['💜']
+        )
+        read = spectate.read_frame(broadcast['block'], reveal=True)
+        assert read['player_info'] == (width - 1, 2)
+        assert read['rows'][0][width - 2] == '🐉'
+        assert len(read['rows'][2]) == width
+    finally:
+        spectate.end_broadcast(broadcast)
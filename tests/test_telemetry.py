@@ -0,0 +1,112 @@
+"""Tests of the telemetry histograms and of the rotated telemetry file"""
+import glob
+import json
+import multiprocessing
+import random
+
+import pytest
+
+from dungeon_and_dragons import telemetry
+
+
+def test_histogram_quantiles():
+    histogram = telemetry.make_histogram()
+    values = list(range(1, 1001))
+    random.Random(0).shuffle(values)
+    for value in values:
+        telemetry.add_to_histogram(histogram, value)
+    assert histogram['count'] == 1000
+    assert histogram['min'] == 1 and histogram['max'] == 1000
+    for quantile, exact in ((0.5, 500), (0.95, 950), (0.99, 990)):
+        estimate = telemetry.histogram_quantile(histogram, quantile)
+        assert estimate == pytest.approx(exact, rel=0.03)
+    for quantile, exact in ((0, 1), (1, 1000)):
+        estimate = telemetry.histogram_quantile(histogram, quantile)
+        # clamped to the values really seen
+        assert 1 <= estimate <= 1000
+        assert estimate == pytest.approx(exact, rel=0.03)
+
+
+def test_histogram_of_tiny_and_no_values():
+    histogram = telemetry.make_histogram()
+    assert telemetry.histogram_quantile(histogram, 0.5) is None
+    assert telemetry.summarise_histogram(histogram)['mean'] is None
+    for value in (0, 0, 0, 2):
+        telemetry.add_to_histogram(histogram, value)
+    assert telemetry.histogram_quantile(histogram, 0.5) == 0
+    summary = telemetry.summarise_histogram(histogram, scale=1000)
+    assert summary['count'] == 4
+    assert summary['mean'] == 500
+    assert summary['max'] == 2000
+
+
+@pytest.fixture
+def small_files(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(telemetry, 'MAX_BYTES', 1000)
+    monkeypatch.setattr(telemetry, 'BUFFER_SIZE', 0)
+    monkeypatch.setattr(telemetry, 'pending', list())
+    return tmp_path
+
+
+def record_lines(paths):
+    lines = list()
+    for path in paths:
+        with open(path) as telemetry_file:
+            lines += [json.loads(line) for line in telemetry_file]
+    return lines
+
+
+def test_rotation_keeps_backups(small_files, monkeypatch):
+    monkeypatch.setattr(telemetry, 'BACKUPS', 3)
+    for number in range(200):
+        telemetry.write_record({'number': number, 'padding': 'x' * 40})
+    assert sorted(glob.glob('telemetry.ndjson*')) == [
+        'telemetry.ndjson',
+        'telemetry.ndjson.1',
+        'telemetry.ndjson.2',
+        'telemetry.ndjson.3',
+    ]
+    for path in glob.glob('telemetry.ndjson.*'):
+        assert 1000 <= (small_files / path).stat().st_size < 1100
+    # the newest records are kept in order, the oldest were dropped
+    numbers = [record['number'] for record in record_lines([
+        'telemetry.ndjson.3', 'telemetry.ndjson.2', 'telemetry.ndjson.1',
+        'telemetry.ndjson',
+    ])]
+    assert numbers == list(range(200 - len(numbers), 200))
+
+
+def test_records_are_buffered(small_files, monkeypatch):
+    monkeypatch.setattr(telemetry, 'BUFFER_SIZE', 10_000)
+    telemetry.write_record({'number': 1})
+    assert not glob.glob('telemetry.ndjson*')
+    telemetry.flush_records()
+    assert record_lines(['telemetry.ndjson']) == [{'number': 1}]
+
+
+def write_records(worker):
+    for number in range(150):
+        telemetry.write_record({'worker': worker, 'number': number})
+
+
+def test_sessions_share_the_file(small_files, monkeypatch):
+    monkeypatch.setattr(telemetry, 'BACKUPS', 1000)
+    context = multiprocessing.get_context('fork')
+    workers = [
+        context.Process(target=write_records, args=(worker,))
+        for worker in range(4)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+        assert worker.exitcode == 0
+
+    # no record is lost to a file another session rotated
+    records = record_lines(glob.glob('telemetry.ndjson*'))
+    assert sorted((r['worker'], r['number']) for r in records) == [
+        (worker, number) for worker in range(4) for number in range(150)
+    ]
+    for path in glob.glob('telemetry.ndjson.*'):
+        assert (small_files / path).stat().st_size < 1100